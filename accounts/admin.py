@@ -4,7 +4,8 @@ from django.utils.html import format_html
 from .models import (
     CustomUser, Profession, CourseEnrollment, Lesson, VideoLesson, VideoProgress,
     Homework, HomeworkSubmission, Test, TestQuestion, TestAnswer, TestResult,
-    Certificate, Message, PaymentStatus
+    Certificate, Message, ArchivedMessage, PendingNotification, PaymentStatus,
+    StoredBlob, SimilarSubmissionPair, FilePreview
 )
 
 
@@ -163,6 +164,42 @@ class MessageAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+@admin.register(ArchivedMessage)
+class ArchivedMessageAdmin(admin.ModelAdmin):
+    list_display = ['title', 'message_type', 'recipient', 'created_at', 'archived_at']
+    list_filter = ['message_type', 'archived_at']
+    search_fields = ['title', 'recipient__username']
+    raw_id_fields = ['recipient', 'sender']
+
+
+@admin.register(PendingNotification)
+class PendingNotificationAdmin(admin.ModelAdmin):
+    list_display = ['title', 'message_type', 'user', 'created_at', 'delivered_at']
+    list_filter = ['message_type', 'delivered_at']
+    search_fields = ['title', 'user__username']
+    raw_id_fields = ['user', 'digest']
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'size', 'ref_count', 'created_at']
+    search_fields = ['name', 'sha256']
+    readonly_fields = ['name', 'sha256', 'size', 'created_at']
+
+
+@admin.register(SimilarSubmissionPair)
+class SimilarSubmissionPairAdmin(admin.ModelAdmin):
+    list_display = ['homework', 'first', 'second', 'score', 'detected_at']
+    raw_id_fields = ['homework', 'first', 'second']
+
+
+@admin.register(FilePreview)
+class FilePreviewAdmin(admin.ModelAdmin):
+    list_display = ['source', 'kind', 'width', 'height', 'created_at']
+    list_filter = ['kind']
+    search_fields = ['source']
+
+
 @admin.register(PaymentStatus)
 class PaymentStatusAdmin(admin.ModelAdmin):
     list_display = ['user', 'is_paid', 'last_payment_date', 'auto_blocked']
@@ -0,0 +1,111 @@
+"""
+Deploy marshrutlari keshi
+(username, folder_name) -> deploy ma'lumotlari (papka, asosiy fayl, faollik, versiya)
+va har bir deploy versiyasi uchun fayllar ro'yxati (manifest).
+Sahifadagi har bir asset uchun bazaga ham, realpath'ga ham murojaat qilinmaydi.
+Deploy saqlansa yoki o'chirilsa - kesh signals.py orqali tozalanadi.
+"""
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.cache import cache
+
+ROUTE_KEY = 'deploy_route:{username}:{folder}'
+MANIFEST_KEY = 'deploy_manifest:{pk}:{version}'
+
+# Mavjud bo'lmagan deploy ham qisqa muddat keshlanadi
+MISSING = {'missing': True}
+MISSING_TIMEOUT = 30
+
+
+def get_timeout():
+    return getattr(settings, 'DEPLOY_ROUTE_CACHE_TIMEOUT', 300)
+
+
+def route_key(username, folder_name):
+    return ROUTE_KEY.format(username=username, folder=folder_name)
+
+
+def resolve_deploy(username, folder_name):
+    """
+    Deploy marshrutini keshdan yoki bazadan olish.
+    Natija: dict (id, deploy_type, folder_path, entry_file, is_active, version) yoki None
+    """
+    from .models import HTMLDeploy
+
+    key = route_key(username, folder_name)
+    route = cache.get(key)
+    if route is None:
+        deploy = (
+            HTMLDeploy.objects.filter(user__username=username, folder_name=folder_name)
+            .select_related('user')
+            .only('id', 'deploy_type', 'folder_name', 'entry_file', 'is_active', 'updated_at', 'user__username')
+            .first()
+        )
+        if deploy is None:
+            cache.set(key, MISSING, MISSING_TIMEOUT)
+            return None
+        route = {
+            'id': deploy.pk,
+            'deploy_type': deploy.deploy_type,
+            # Symlink'ning o'zi ochilmaydi - qayta deploydan keyin ham yangi versiyaga olib boradi
+            'folder_path': _folder_path(deploy.get_folder_path()),
+            'entry_file': deploy.entry_file,
+            'is_active': deploy.is_active,
+            'version': int(deploy.updated_at.timestamp() * 1000),
+        }
+        cache.set(key, route, get_timeout())
+    if route.get('missing'):
+        return None
+    return route
+
+
+def _folder_path(folder):
+    return os.path.join(os.path.realpath(os.path.dirname(folder)), os.path.basename(folder))
+
+
+def get_manifest(route):
+    """Deploy papkasidagi fayllar (nisbiy yo'llar) - bir marta diskdan o'qiladi"""
+    key = MANIFEST_KEY.format(pk=route['id'], version=route['version'])
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = build_manifest(route['folder_path'])
+        cache.set(key, manifest, get_timeout())
+    return manifest
+
+
+def build_manifest(folder):
+    """Papkadan tashqariga ishora qiluvchi symlink'lar manifestga kirmaydi"""
+    files = set()
+    prefix = os.path.realpath(folder) + os.sep
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            if os.path.islink(full_path) and not os.path.realpath(full_path).startswith(prefix):
+                continue
+            files.add(os.path.relpath(full_path, folder).replace(os.sep, '/'))
+    return frozenset(files)
+
+
+def resolve_file(route, filepath):
+    """
+    So'ralgan fayl manifestda bo'lsa - diskdagi to'liq yo'l, aks holda None.
+    '..' va mutlaq yo'llar normallashtirilgach manifestdan topilmaydi.
+    """
+    relative = posixpath.normpath(filepath.replace('\\', '/')).lstrip('/')
+    if relative.startswith('../') or relative == '..':
+        return None
+    if relative not in get_manifest(route):
+        return None
+    return os.path.join(route['folder_path'], *relative.split('/'))
+
+
+def invalidate_deploy(deploy):
+    """Deploy o'zgarganda marshrut va manifestni tozalash"""
+    username = deploy.user.username
+    route = cache.get(route_key(username, deploy.folder_name))
+    keys = [route_key(username, deploy.folder_name)]
+    if route and not route.get('missing'):
+        keys.append(MANIFEST_KEY.format(pk=route['id'], version=route['version']))
+    cache.delete_many(keys)
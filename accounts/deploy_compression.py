@@ -0,0 +1,93 @@
+"""
+Deploy qilingan loyihalar uchun oldindan siqilgan fayllar
+ZIP ochilgach matnli fayllarning (html/css/js/svg/json) yoniga .gz va
+(brotli o'rnatilgan bo'lsa) .br nusxalari yoziladi. Siqish - WhiteNoise
+Compressor bilan (statik fayllar ham shu bilan siqiladi), oqimlar pulida.
+So'rovda Accept-Encoding bo'yicha mos nusxa tanlanadi.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from whitenoise.compress import Compressor
+
+COMPRESS_EXTENSIONS = ('.html', '.htm', '.css', '.js', '.mjs', '.svg', '.json', '.xml', '.txt', '.map')
+MIN_SIZE = 256
+
+# Afzallik tartibida: (Content-Encoding, fayl qo'shimchasi)
+VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def is_compressible(name):
+    return name.lower().endswith(COMPRESS_EXTENSIONS)
+
+
+def get_workers():
+    return getattr(settings, 'DEPLOY_COMPRESS_WORKERS', 4)
+
+
+def compress_deploy(folder, workers=None):
+    """
+    Papkadagi matnli fayllarni siqish.
+    Natija: {'files', 'original', 'gzip', 'brotli'} - baytlarda; siqish foyda
+    bermagan fayl uchun asl hajm hisoblanadi.
+    """
+    compressor = Compressor(quiet=True)
+    max_size = getattr(settings, 'DEPLOY_COMPRESS_MAX_SIZE', 10 * 1024 * 1024)
+
+    paths = []
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if is_compressible(filename) and not os.path.islink(path) and MIN_SIZE <= os.path.getsize(path) <= max_size:
+                paths.append(path)
+
+    def compress(path):
+        size = os.path.getsize(path)
+        # Eski nusxalar (qayta yuklashdan qolgan) o'chiriladi
+        for _, suffix in VARIANTS:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        written = compressor.compress(path)
+        sizes = {suffix: os.path.getsize(name) for name in written for suffix in ('.gz', '.br') if name.endswith(suffix)}
+        return size, sizes.get('.gz', size), sizes.get('.br', sizes.get('.gz', size))
+
+    stats = {'files': len(paths), 'original': 0, 'gzip': 0, 'brotli': 0}
+    if not paths:
+        return stats
+    with ThreadPoolExecutor(max_workers=workers or get_workers()) as pool:
+        for original, gzip_size, brotli_size in pool.map(compress, paths):
+            stats['original'] += original
+            stats['gzip'] += gzip_size
+            stats['brotli'] += brotli_size
+    return stats
+
+
+def accepted_encodings(header):
+    """Accept-Encoding dan q=0 bo'lmagan kodlashlar"""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name)
+    return accepted
+
+
+def pick_variant(accept_encoding, relative, manifest):
+    """Mijoz qabul qiladigan va diskda bor eng yaxshi nusxa: (encoding, suffix) yoki (None, None)"""
+    if not is_compressible(relative):
+        return None, None
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in VARIANTS:
+        if (encoding in accepted or '*' in accepted) and relative + suffix in manifest:
+            return encoding, suffix
+    return None, None
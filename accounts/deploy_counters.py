@@ -0,0 +1,98 @@
+"""
+Deploy ko'rishlari va trafigi uchun buferlangan hisoblagichlar
+Har bir so'rovda bazaga yozilmaydi: hisoblar jarayon xotirasida yig'iladi va
+DEPLOY_COUNTER_FLUSH_SECONDS da bir marta F('...') + delta bilan yoziladi.
+Bir vaqtdagi so'rovlar bir-birining hisobini yo'qotmaydi (UPDATE atomar).
+Kunlik yig'indilar DeployTraffic jadvalida - hisobotlar faqat shu jadvalni o'qiydi.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# (deploy_id, sana) -> [ko'rishlar, so'rovlar, baytlar]
+_buffer = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_flush_interval():
+    return getattr(settings, 'DEPLOY_COUNTER_FLUSH_SECONDS', 10)
+
+
+def record_hit(deploy_id, bytes_sent=0, view=False):
+    """Bitta so'rovni buferga yozish; vaqti kelgan bo'lsa - bazaga tushirish"""
+    key = (deploy_id, timezone.localdate())
+    with _lock:
+        row = _buffer.get(key)
+        if row is None:
+            row = _buffer[key] = [0, 0, 0]
+        row[0] += 1 if view else 0
+        row[1] += 1
+        row[2] += bytes_sent
+        due = time.monotonic() - _last_flush >= get_flush_interval()
+    if due:
+        flush()
+
+
+def flush():
+    """Buferdagi hisoblarni bazaga yozish. Xato bo'lsa - hisoblar buferga qaytadi"""
+    global _buffer, _last_flush
+    from .models import HTMLDeploy, DeployTraffic
+
+    with _lock:
+        pending, _buffer = _buffer, {}
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    views_by_deploy = {}
+    for (deploy_id, _), (views, _, _) in pending.items():
+        if views:
+            views_by_deploy[deploy_id] = views_by_deploy.get(deploy_id, 0) + views
+
+    try:
+        with transaction.atomic():
+            for deploy_id, views in views_by_deploy.items():
+                HTMLDeploy.objects.filter(pk=deploy_id).update(views_count=F('views_count') + views)
+
+            # Kunlik qatorlar yo'q bo'lsa yaratiladi, keyin atomar oshiriladi
+            existing = set(HTMLDeploy.objects.filter(pk__in={deploy_id for deploy_id, _ in pending}).values_list('pk', flat=True))
+            DeployTraffic.objects.bulk_create(
+                [DeployTraffic(deploy_id=deploy_id, date=date) for deploy_id, date in pending if deploy_id in existing],
+                ignore_conflicts=True,
+            )
+            for (deploy_id, date), (views, hits, bytes_sent) in pending.items():
+                if deploy_id in existing:
+                    DeployTraffic.objects.filter(deploy_id=deploy_id, date=date).update(
+                        views=F('views') + views,
+                        hits=F('hits') + hits,
+                        bytes_sent=F('bytes_sent') + bytes_sent,
+                    )
+    except Exception:
+        logger.exception("Deploy hisoblagichlari yozilmadi - keyingi safar qayta uriniladi")
+        with _lock:
+            for key, (views, hits, bytes_sent) in pending.items():
+                row = _buffer.setdefault(key, [0, 0, 0])
+                row[0] += views
+                row[1] += hits
+                row[2] += bytes_sent
+        return 0
+    return len(pending)
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
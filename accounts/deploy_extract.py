@@ -0,0 +1,356 @@
+"""
+Deploy ZIP arxivlarini xavfsiz ochish
+- Avval markaziy katalog tekshiriladi: fayllar soni, umumiy hajm, siqish
+  nisbati (zip-bomba), xavfli yo'llar va foydalanuvchi kvotasi.
+- Fayllar bittadan, bloklab yoziladi; sarlavhadagi hajmdan ko'p chiqsa - to'xtatiladi.
+- Katta arxivlar bir nechta oqimda ochiladi (har oqim o'z ZipFile'i bilan).
+- Har bir versiya alohida papkaga (deploys/<username>/.releases/<papka>/<id>/)
+  ochiladi; deploy papkasi shu versiyaga ishora qiluvchi symlink. Tayyor bo'lgach
+  symlink bitta os.replace bilan almashtiriladi - qayta deployda papka bir lahza
+  ham yo'qolmaydi va yarim ochilgan holat ko'rinmaydi.
+Bitta sahifali (html) deploylar ham shu yo'l bilan diskka yoziladi.
+"""
+import os
+import posixpath
+import shutil
+import stat
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+
+COPY_BLOCK = 1024 * 1024
+RELEASES_DIR = '.releases'
+SKIP_NAMES = ('__MACOSX/', '.DS_Store', 'Thumbs.db')
+# Kichik fayllarda (masalan, bo'sh joylar bilan to'la css) nisbat tabiiy ravishda katta
+RATIO_MIN_SIZE = 1024 * 1024
+
+
+class DeployExtractError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_limits():
+    return {
+        'max_entries': getattr(settings, 'DEPLOY_MAX_ENTRIES', 2000),
+        'max_size': getattr(settings, 'DEPLOY_MAX_UNCOMPRESSED_SIZE', 200 * 1024 * 1024),
+        'max_ratio': getattr(settings, 'DEPLOY_MAX_COMPRESSION_RATIO', 100),
+        'quota': getattr(settings, 'DEPLOY_USER_QUOTA', 500 * 1024 * 1024),
+        'workers': getattr(settings, 'DEPLOY_EXTRACT_WORKERS', 4),
+        'parallel_min_size': getattr(settings, 'DEPLOY_PARALLEL_EXTRACT_MIN_SIZE', 20 * 1024 * 1024),
+    }
+
+
+def user_storage_used(user, exclude_deploy=None):
+    """
+    Foydalanuvchi deploylari diskda egallagan joy (xotira hisobidan).
+    Natija: (jami, qayta deploy qilinayotgan deploy hajmi)
+    """
+    from .models import DeployManifest
+    from .storage_usage import usage_for
+
+    replaced = 0
+    if exclude_deploy is not None:
+        replaced = DeployManifest.objects.filter(deploy=exclude_deploy).values_list('disk_size', flat=True).first() or 0
+    return usage_for(user.pk).get('deploys', 0), replaced
+
+
+def get_quota_left(user, limits, exclude_deploy=None):
+    """Deploylar kvotasi va umumiy xotira kvotasidan kichigi; almashtiriladigan fayllar bo'shaydi"""
+    from .storage_usage import quota_left
+
+    used, replaced = user_storage_used(user, exclude_deploy)
+    left = limits['quota'] - used + replaced
+    if not user.is_admin:
+        total_left = quota_left(user.pk)
+        if total_left is not None:
+            left = min(left, total_left + replaced)
+    return left
+
+
+def safe_name(name):
+    """Arxiv ichidagi yo'lni tekshirish. Xavfli bo'lsa - None"""
+    name = name.replace('\\', '/')
+    if name.startswith('/') or (len(name) > 1 and name[1] == ':'):
+        return None
+    normalized = posixpath.normpath(name)
+    if normalized in ('.', '..') or normalized.startswith('../'):
+        return None
+    return normalized
+
+
+def inspect_archive(archive, limits, quota_left):
+    """Markaziy katalogni tekshirish. Natija: [(ZipInfo, nisbiy yo'l), ...]"""
+    entries = []
+    total = 0
+    for info in archive.infolist():
+        if info.is_dir() or info.filename.startswith(SKIP_NAMES) or os.path.basename(info.filename) in SKIP_NAMES:
+            continue
+        if stat.S_ISLNK(info.external_attr >> 16):
+            raise DeployExtractError(f"Arxivda symlink bor: {info.filename}")
+        name = safe_name(info.filename)
+        if name is None:
+            raise DeployExtractError(f"Arxivda ruxsat etilmagan yo'l: {info.filename}")
+        if info.flag_bits & 0x1:
+            raise DeployExtractError("Parol bilan himoyalangan arxivlar qabul qilinmaydi")
+        if info.file_size > RATIO_MIN_SIZE and info.file_size > info.compress_size * limits['max_ratio']:
+            raise DeployExtractError(f"Shubhali siqish nisbati: {info.filename}")
+
+        entries.append((info, name))
+        total += info.file_size
+        if len(entries) > limits['max_entries']:
+            raise DeployExtractError(f"Arxivda fayllar juda ko'p (ko'pi bilan {limits['max_entries']} ta)")
+
+    if total > limits['max_size']:
+        raise DeployExtractError(f"Ochilgan hajm juda katta (ko'pi bilan {filesizeformat(limits['max_size'])})")
+    if total > quota_left:
+        raise DeployExtractError(
+            f"Xotira kvotasi yetmaydi: kerak {filesizeformat(total)}, qolgan {filesizeformat(max(quota_left, 0))}"
+        )
+    return entries, total
+
+
+class _Budget:
+    """Haqiqatda yozilgan baytlar (sarlavhalar yolg'on bo'lishi mumkin)"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def take(self, size):
+        with self.lock:
+            self.used += size
+            if self.used > self.limit:
+                raise DeployExtractError("Ochilgan hajm ruxsat etilganidan oshib ketdi")
+
+
+def _extract_entries(source, entries, staging, budget):
+    """Fayllarni bittadan, bloklab yozish. Natija: {nisbiy yo'l: hajm}"""
+    written = {}
+    with zipfile.ZipFile(source) as archive:
+        for info, name in entries:
+            target = os.path.join(staging, *name.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            size = 0
+            with archive.open(info) as src, open(target, 'wb') as dst:
+                while True:
+                    block = src.read(COPY_BLOCK)
+                    if not block:
+                        break
+                    size += len(block)
+                    if size > info.file_size:
+                        raise DeployExtractError(f"Fayl hajmi sarlavhadagidan katta: {info.filename}")
+                    budget.take(len(block))
+                    dst.write(block)
+            written[name] = size
+    return written
+
+
+def extract_to_staging(source, target_folder, user, exclude_deploy=None):
+    """
+    Arxivni target_folder yonidagi vaqtinchalik papkaga ochish.
+    source - diskdagi yo'l yoki fayl obyekti.
+    Natija: (staging papka, {nisbiy yo'l: hajm}, umumiy hajm)
+    """
+    limits = get_limits()
+    quota_left = get_quota_left(user, limits, exclude_deploy)
+
+    try:
+        with zipfile.ZipFile(source) as archive:
+            entries, total = inspect_archive(archive, limits, quota_left)
+    except zipfile.BadZipFile:
+        raise DeployExtractError("ZIP fayl buzilgan yoki ZIP emas")
+    if not entries:
+        raise DeployExtractError("Arxiv bo'sh")
+
+    staging = make_staging(target_folder)
+    budget = _Budget(min(limits['max_size'], quota_left))
+
+    # Fayl obyektini bir nechta oqim o'qiy olmaydi - parallel faqat diskdagi arxiv uchun
+    workers = limits['workers'] if isinstance(source, str) and total >= limits['parallel_min_size'] else 1
+    try:
+        if workers > 1:
+            # Hajm bo'yicha navbatma-navbat taqsimlash - oqimlar teng yuklanadi
+            groups = [[] for _ in range(workers)]
+            for index, entry in enumerate(sorted(entries, key=lambda e: e[0].file_size, reverse=True)):
+                groups[index % workers].append(entry)
+            files = {}
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for written in pool.map(lambda group: _extract_entries(source, group, staging, budget), groups):
+                    files.update(written)
+        else:
+            if not isinstance(source, str):
+                source.seek(0)
+            files = _extract_entries(source, entries, staging, budget)
+    except (DeployExtractError, zipfile.BadZipFile, OSError, EOFError) as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        if isinstance(e, DeployExtractError):
+            raise
+        raise DeployExtractError(f"ZIP faylni ochishda xato: {e}")
+
+    return staging, files, sum(files.values())
+
+
+def release_root(target_folder):
+    """Deployning versiyalari turadigan papka: deploys/<username>/.releases/<papka>"""
+    return os.path.join(os.path.dirname(target_folder), RELEASES_DIR, os.path.basename(target_folder))
+
+
+def make_staging(target_folder):
+    """Yangi versiya uchun bo'sh papka (target_folder bilan bitta fayl tizimida)"""
+    root = release_root(target_folder)
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, uuid.uuid4().hex[:12])
+    os.makedirs(staging)
+    return staging
+
+
+def current_release(target_folder):
+    """Symlink hozir ishora qilayotgan versiya papkasi (eski, oddiy papka bo'lsa - None)"""
+    if os.path.islink(target_folder):
+        return os.path.realpath(target_folder)
+    return None
+
+
+def swap_in(staging, target_folder):
+    """
+    Tayyor versiyani joyiga qo'yish: yangi symlink vaqtinchalik nom bilan yaratiladi
+    va os.replace bilan deploy papkasi o'rniga qo'yiladi (atomar). Eski versiya keyin o'chiriladi.
+    Symlink'ga o'tmagan eski deployda (oddiy papka) bir martalik ikki rename
+    bajariladi; ikkinchisi muvaffaqiyatsiz bo'lsa eski papka joyiga qaytariladi.
+    """
+    link = f"{target_folder}.link-{uuid.uuid4().hex[:8]}"
+    # Nisbiy symlink - MEDIA_ROOT ko'chirilsa ham ishlaydi
+    os.symlink(os.path.relpath(staging, os.path.dirname(target_folder)), link)
+    try:
+        if os.path.isdir(target_folder) and not os.path.islink(target_folder):
+            old = f"{target_folder}.old-{uuid.uuid4().hex[:8]}"
+            os.rename(target_folder, old)
+            try:
+                os.replace(link, target_folder)
+            except OSError:
+                os.rename(old, target_folder)
+                raise
+        else:
+            old = current_release(target_folder)
+            os.replace(link, target_folder)
+    except OSError:
+        os.unlink(link)
+        raise
+    if old and old != os.path.realpath(staging):
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def remove_deploy_folder(target_folder):
+    """Deploy papkasini o'chirish: symlink, u ishora qilgan versiya va qolgan versiyalar"""
+    if os.path.islink(target_folder):
+        os.unlink(target_folder)
+    elif os.path.isdir(target_folder):
+        shutil.rmtree(target_folder, ignore_errors=True)
+    shutil.rmtree(release_root(target_folder), ignore_errors=True)
+
+
+def pick_entry_file(files, preferred=None):
+    """Asosiy HTML fayl: ko'rsatilgani, index.html yoki birinchi HTML (eng sayoz)"""
+    html_files = sorted((name for name in files if name.lower().endswith(('.html', '.htm'))), key=lambda n: (n.count('/'), n))
+    if not html_files:
+        return None
+    if preferred and preferred != 'index.html':
+        for name in html_files:
+            if name == preferred or os.path.basename(name) == preferred:
+                return name
+    for name in html_files:
+        if os.path.basename(name).lower() == 'index.html':
+            return name
+    return html_files[0]
+
+
+def upload_source(uploaded_file):
+    """Diskka yozilgan yuklama - yo'li (parallel ochish mumkin), xotiradagisi - fayl obyekti"""
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return uploaded_file.temporary_file_path()
+    return uploaded_file.file
+
+
+def deploy_archive(source, target_folder, user, preferred_entry=None, exclude_deploy=None):
+    """
+    To'liq jarayon: staging'ga ochish -> asosiy faylni tanlash -> siqish -> joyiga qo'yish.
+    Natija: {'files', 'total_size', 'disk_size', 'entry_file', 'compression'}
+    """
+    staging, files, total = extract_to_staging(source, target_folder, user, exclude_deploy)
+    try:
+        entry_file = pick_entry_file(files, preferred_entry)
+        if entry_file is None:
+            raise DeployExtractError("ZIP ichida HTML fayl topilmadi!")
+        return _publish(staging, target_folder, files, entry_file)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def html_entry_name(entry_file):
+    """Bitta sahifali deploy fayli nomi: ko'rsatilgan .html nomi yoki index.html"""
+    name = os.path.basename((entry_file or '').replace('\\', '/'))
+    return name if name.lower().endswith(('.html', '.htm')) else 'index.html'
+
+
+def deploy_html(content, target_folder, user, entry_file=None, exclude_deploy=None):
+    """
+    Bitta HTML sahifani ZIP loyihalar bilan bir xil tuzilishda diskka yozish:
+    deploys/<username>/<papka>/<fayl>.html (+ .gz/.br). Natija - deploy_archive kabi
+    """
+    data = content.encode('utf-8')
+    limits = get_limits()
+    quota_left = get_quota_left(user, limits, exclude_deploy)
+    if len(data) > quota_left:
+        raise DeployExtractError(
+            f"Xotira kvotasi yetmaydi: kerak {filesizeformat(len(data))}, qolgan {filesizeformat(max(quota_left, 0))}"
+        )
+
+    entry_file = html_entry_name(entry_file)
+    staging = make_staging(target_folder)
+    try:
+        with open(os.path.join(staging, entry_file), 'wb') as f:
+            f.write(data)
+        return _publish(staging, target_folder, {entry_file: len(data)}, entry_file)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def _publish(staging, target_folder, files, entry_file):
+    """Staging'dagi fayllarni siqish va joyiga qo'yish"""
+    from .deploy_compression import compress_deploy
+    from .storage_usage import scan_tree
+
+    # .gz/.br nusxalar ham staging'da tayyorlanadi - almashtirilgach darhol bor
+    compression = compress_deploy(staging)
+    disk_size = sum(scan_tree(staging, '').values())
+    swap_in(staging, target_folder)
+    return {
+        'files': files, 'total_size': sum(files.values()), 'disk_size': disk_size,
+        'entry_file': entry_file, 'compression': compression,
+    }
+
+
+def save_manifest(deploy, archive):
+    """Manifestni yozish va xotira hisobini yangi hajmga moslash"""
+    from .models import DeployManifest
+    from .storage_usage import add_usage
+
+    previous = DeployManifest.objects.filter(deploy=deploy).values_list('disk_size', flat=True).first() or 0
+    files = archive['files']
+    DeployManifest.objects.update_or_create(
+        deploy=deploy,
+        defaults={
+            'files': files, 'file_count': len(files),
+            'total_size': archive['total_size'], 'disk_size': archive['disk_size'],
+        },
+    )
+    add_usage(deploy.user_id, 'deploys', archive['disk_size'] - previous)
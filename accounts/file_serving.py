@@ -0,0 +1,165 @@
+"""
+Diskdagi fayllarni oqim (stream) bilan berish
+Fayl xotiraga to'liq o'qilmaydi: FileResponse bloklab uzatadi.
+ETag / Last-Modified, shartli GET (304), HTTP Range (206) qo'llab-quvvatlanadi.
+Sozlamada yoqilgan bo'lsa, faylni uzatish front-end serverga topshiriladi
+(nginx - X-Accel-Redirect, Apache/lighttpd - X-Sendfile).
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+BLOCK_SIZE = 256 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _FileRange:
+    """Faylning [start, start+length) qismini o'qiydigan obyekt (FileResponse uchun)"""
+
+    def __init__(self, f, start, length):
+        self._file = f
+        self._file.seek(start)
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def file_etag(stat):
+    """mtime va hajmdan ETag - faylni o'qimasdan"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    'bytes=a-b' sarlavhasini (start, end) ga aylantirish (end - ichida).
+    Bir nechta oraliq yoki noto'g'ri sarlavha - None (butun fayl beriladi).
+    Qoniqtirib bo'lmaydigan oraliq - False (416).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 - oxirgi 500 bayt
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    """If-Range: ETag yoki sana mos kelsagina Range bajariladi"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        return value == etag
+    date = parse_http_date_safe(value)
+    return date is not None and int(mtime) <= date
+
+
+def guess_content_type(path):
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def serve_file(request, path, content_type=None, cache_control=None, accel_path=None, content_encoding=None,
+               filename=None):
+    """
+    Faylni stream qilib qaytarish.
+    path - diskdagi to'liq yo'l (tekshirilgan bo'lishi kerak).
+    accel_path - front-end server uchun ichki URL (X-Accel-Redirect), bo'lsa.
+    content_encoding - path oldindan siqilgan nusxa bo'lsa ('gzip' / 'br').
+    filename - Content-Disposition dagi nom; siqilgan nusxada asl fayl nomi
+    (app.js.gz emas, app.js) berilishi kerak.
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    if content_type is None:
+        content_type = guess_content_type(path)
+    if filename is None:
+        filename = os.path.basename(path)
+
+    # 304 / 412 - faylni ochmasdan
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        _set_cache_headers(conditional, etag, last_modified, cache_control, content_encoding)
+        return conditional
+
+    backend = getattr(settings, 'DEPLOY_SENDFILE_BACKEND', None)
+    if backend and request.method in ('GET', 'HEAD'):
+        response = HttpResponse(content_type=content_type)
+        if backend == 'nginx' and accel_path:
+            # nginx o'zi Range va uzatishni bajaradi
+            response['X-Accel-Redirect'] = quote(accel_path)
+        elif backend == 'sendfile':
+            response['X-Sendfile'] = path
+        else:
+            response = None
+        if response is not None:
+            _set_cache_headers(response, etag, last_modified, cache_control, content_encoding)
+            return response
+
+    size = stat.st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and request.method in ('GET', 'HEAD') and _if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(range_header, size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+    f = open(path, 'rb')
+    if byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(_FileRange(f, start, length), content_type=content_type, status=206, filename=filename)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(f, content_type=content_type, filename=filename)
+        response['Content-Length'] = str(size)
+    response.block_size = BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    _set_cache_headers(response, etag, last_modified, cache_control, content_encoding)
+    return response
+
+
+def _set_cache_headers(response, etag, last_modified, cache_control, content_encoding=None):
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    if cache_control:
+        response['Cache-Control'] = cache_control
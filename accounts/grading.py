@@ -0,0 +1,166 @@
+"""
+Vazifalarni ommaviy baholash va statusini o'zgartirish
+Butun guruh bitta tranzaksiyada: bulk_update, coinlar bitta UPDATE (CASE),
+CoinTransaction / ActivityLog / bildirishnomalar bittadan bulk INSERT.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from coin.models import ActivityLog, CoinTransaction
+
+from .grading_queue import available_q
+from .models import CustomUser, HomeworkMessage, HomeworkSubmission
+from .notifications import homework_graded_message, send_notifications_bulk
+
+BULK_STATUS_ACTIONS = ('reviewing', 'accept', 'revision')
+
+
+def homework_coin_amount(submission):
+    """Baholangan vazifa uchun coin: vaqtida topshirish va yaxshi baho uchun bonus"""
+    coin_amount = 5
+    if not submission.is_late:
+        coin_amount = 10
+
+    if submission.grade >= 90:
+        coin_amount += 5
+    elif submission.grade >= 80:
+        coin_amount += 3
+    return coin_amount
+
+
+def _lock_submissions(teacher, ids):
+    """
+    Tanlangan vazifalarni qulflash. Boshqa o'qituvchida faol lease bo'lganlari
+    (admin bo'lmasa) o'tkazib yuboriladi.
+    """
+    qs = HomeworkSubmission.objects.select_for_update().select_related('homework__lesson').filter(id__in=ids)
+    if not teacher.is_admin:
+        qs = qs.filter(available_q(timezone.now()) | Q(claimed_by=teacher))
+    return list(qs.order_by('id'))
+
+
+def bulk_grade(teacher, items):
+    """
+    items: {submission_id: (grade, feedback)}.
+    Natija: {'graded': [...id], 'skipped': [...id], 'coins': jami coin}.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        submissions = _lock_submissions(teacher, list(items))
+
+        coin_by_user = defaultdict(int)
+        coin_rows = []
+        log_rows = []
+        notification_rows = []
+
+        for submission in submissions:
+            grade, feedback = items[submission.pk]
+            title = submission.homework.lesson.title
+
+            submission.grade = grade
+            submission.feedback = feedback
+            submission.status = 'graded'
+            submission.graded_by = teacher
+            submission.graded_at = now
+            submission.claimed_by = None
+            submission.claim_expires_at = None
+
+            if not submission.coin_awarded:
+                amount = homework_coin_amount(submission)
+                submission.coin_awarded = True
+                coin_by_user[submission.student_id] += amount
+                coin_rows.append(CoinTransaction(
+                    user_id=submission.student_id, amount=amount, action='add',
+                    reason=f"Vazifa baholandi: {title}",
+                ))
+                log_rows.append(ActivityLog(
+                    user_id=submission.student_id, action_type='homework_graded',
+                    description=f"Vazifa baholandi: {title} - Baho: {grade}, +{amount} coin",
+                ))
+
+            notification_rows.append((submission.student_id, *homework_graded_message(submission, grade), 'system'))
+
+        HomeworkSubmission.objects.bulk_update(submissions, [
+            'grade', 'feedback', 'status', 'graded_by', 'graded_at',
+            'claimed_by', 'claim_expires_at', 'coin_awarded',
+        ], batch_size=200)
+
+        if coin_by_user:
+            # Bitta UPDATE: coins = coins + CASE id WHEN ... THEN ... END
+            CustomUser.objects.filter(pk__in=coin_by_user).update(coins=F('coins') + Case(
+                *[When(pk=user_id, then=Value(amount)) for user_id, amount in coin_by_user.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+        CoinTransaction.objects.bulk_create(coin_rows, batch_size=500)
+        ActivityLog.objects.bulk_create(log_rows, batch_size=500)
+        send_notifications_bulk(notification_rows)
+
+    graded = {submission.pk for submission in submissions}
+    return {
+        'graded': sorted(graded),
+        'skipped': sorted(set(items) - graded),
+        'coins': sum(coin_by_user.values()),
+    }
+
+
+def bulk_set_status(teacher, ids, action, note=''):
+    """
+    Ko'plab vazifalar statusini o'zgartirish: reviewing / accept / revision.
+    revision - o'quvchiga chat xabari va ogohlantirish bildirishnomasi bilan.
+    """
+    if action not in BULK_STATUS_ACTIONS:
+        raise ValueError(action)
+
+    with transaction.atomic():
+        submissions = [
+            submission for submission in _lock_submissions(teacher, ids)
+            if submission.status != 'graded'
+        ]
+
+        if action == 'reviewing':
+            for submission in submissions:
+                submission.status = 'reviewing'
+            fields = ['status']
+        elif action == 'accept':
+            for submission in submissions:
+                submission.status = 'accepted'
+            fields = ['status']
+        else:
+            for submission in submissions:
+                submission.status = 'revision'
+                submission.feedback = note
+                submission.claimed_by = None
+                submission.claim_expires_at = None
+            fields = ['status', 'feedback', 'claimed_by', 'claim_expires_at']
+
+        HomeworkSubmission.objects.bulk_update(submissions, fields, batch_size=200)
+
+        if action == 'revision' and submissions:
+            chat_lines = HomeworkMessage.objects.bulk_create([
+                HomeworkMessage(submission=submission, sender=teacher, message=f"⚠️ Qayta ishlash kerak: {note}")
+                for submission in submissions
+            ])
+            send_notifications_bulk([
+                (
+                    submission.student_id,
+                    "Vazifani qayta ishlang",
+                    f"'{submission.homework.lesson.title}' vazifangizni qayta ishlashingiz kerak.\n\nIzoh: {note}",
+                    'warning',
+                )
+                for submission in submissions
+            ])
+
+            # bulk_create post_save chaqirmaydi - chat kanaliga o'zimiz yuboramiz
+            def publish():
+                from .realtime import publish_chat_message
+                for line in chat_lines:
+                    publish_chat_message(line)
+            transaction.on_commit(publish)
+
+    changed = {submission.pk for submission in submissions}
+    return {'updated': sorted(changed), 'skipped': sorted(set(ids) - changed)}
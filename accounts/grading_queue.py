@@ -0,0 +1,144 @@
+"""
+Baholash navbati (claim / lease)
+O'qituvchi navbatdan keyingi N ta vazifani oladi - ular muddat tugaguncha
+faqat unga band bo'ladi. Muddat o'tsa vazifa avtomatik navbatga qaytadi.
+PostgreSQL/MySQL da SELECT ... FOR UPDATE SKIP LOCKED, SQLite da shartli UPDATE.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import HomeworkSubmission
+
+# Navbatdagi (hali baholanmagan va o'quvchidan javob kutilmayotgan) statuslar
+QUEUE_STATUSES = ('pending', 'reviewing', 'accepted')
+STATUS_KEYS = [key for key, _ in HomeworkSubmission.STATUS_CHOICES]
+
+# Vazifalar ro'yxati (o'qituvchi va o'quvchi) sahifasi hajmi
+SUBMISSION_PAGE_SIZE = 25
+
+
+def get_lease():
+    return timedelta(minutes=getattr(settings, 'GRADING_LEASE_MINUTES', 20))
+
+
+def get_queue_order():
+    return getattr(settings, 'GRADING_QUEUE_ORDER', ['-is_late', '-revision_count', 'submitted_at', 'id'])
+
+
+def available_q(now):
+    """Hech kimga band qilinmagan yoki band qilish muddati o'tgan"""
+    return Q(claimed_by__isnull=True) | Q(claim_expires_at__isnull=True) | Q(claim_expires_at__lte=now)
+
+
+def queue_queryset(profession_id=None):
+    qs = HomeworkSubmission.objects.filter(status__in=QUEUE_STATUSES)
+    if profession_id:
+        qs = qs.filter(homework__lesson__profession_id=profession_id)
+    return qs
+
+
+def active_claims(teacher, now=None):
+    now = now or timezone.now()
+    return HomeworkSubmission.objects.filter(
+        claimed_by=teacher, claim_expires_at__gt=now, status__in=QUEUE_STATUSES,
+    )
+
+
+def claim_next(teacher, count=None, profession_id=None):
+    """
+    O'qituvchiga navbatdan vazifalar ajratish.
+    Avval olingan (muddati o'tmagan) vazifalar ham hisobga kiradi - jami count tagacha.
+    Natija: band qilingan vazifalar id ro'yxati (navbat tartibida).
+    """
+    count = count or getattr(settings, 'GRADING_CLAIM_BATCH', 5)
+    now = timezone.now()
+    expires = now + get_lease()
+
+    held = list(active_claims(teacher, now).order_by(*get_queue_order()).values_list('id', flat=True))
+    need = count - len(held)
+    if need <= 0:
+        return held[:count]
+
+    if connection.features.has_select_for_update_skip_locked:
+        claimed = _claim_skip_locked(teacher, need, profession_id, now, expires)
+    else:
+        claimed = _claim_conditional(teacher, need, profession_id, now, expires)
+    return held + claimed
+
+
+def _claim_skip_locked(teacher, need, profession_id, now, expires):
+    of = ('self',) if connection.features.has_select_for_update_of else ()
+    with transaction.atomic():
+        ids = list(
+            queue_queryset(profession_id)
+            .filter(available_q(now))
+            .select_for_update(skip_locked=True, of=of)
+            .order_by(*get_queue_order())
+            .values_list('id', flat=True)[:need]
+        )
+        if ids:
+            HomeworkSubmission.objects.filter(id__in=ids).update(claimed_by=teacher, claim_expires_at=expires)
+    return ids
+
+
+def _claim_conditional(teacher, need, profession_id, now, expires):
+    """
+    Qulflarsiz variant: bitta shartli UPDATE ... WHERE id IN (SELECT ... LIMIT n).
+    Tashqi WHERE ham "hali bo'sh" shartini qayta tekshiradi - bir vaqtda kelgan
+    so'rovlardan faqat bittasi qatorni oladi. Olingan qatorlar aynan shu
+    so'rovning expires qiymati bilan topiladi.
+    """
+    candidates = (
+        queue_queryset(profession_id)
+        .filter(available_q(now))
+        .order_by(*get_queue_order())
+        .values('id')[:need]
+    )
+    updated = HomeworkSubmission.objects.filter(
+        available_q(now), id__in=candidates, status__in=QUEUE_STATUSES,
+    ).update(claimed_by=teacher, claim_expires_at=expires)
+    if not updated:
+        return []
+    return list(
+        HomeworkSubmission.objects.filter(claimed_by=teacher, claim_expires_at=expires)
+        .order_by(*get_queue_order())
+        .values_list('id', flat=True)
+    )
+
+
+def claim_submission(submission, teacher):
+    """
+    Bitta vazifani band qilish yoki o'z lease'ini uzaytirish.
+    Boshqa o'qituvchida faol lease bo'lsa - False.
+    """
+    now = timezone.now()
+    expires = now + get_lease()
+    updated = HomeworkSubmission.objects.filter(
+        available_q(now) | Q(claimed_by=teacher), pk=submission.pk,
+    ).update(claimed_by=teacher, claim_expires_at=expires)
+    if updated:
+        submission.claimed_by = teacher
+        submission.claim_expires_at = expires
+    return bool(updated)
+
+
+def release(teacher, submission_ids=None):
+    """O'qituvchining band qilgan vazifalarini navbatga qaytarish"""
+    qs = HomeworkSubmission.objects.filter(claimed_by=teacher)
+    if submission_ids is not None:
+        qs = qs.filter(id__in=submission_ids)
+    return qs.update(claimed_by=None, claim_expires_at=None)
+
+
+def status_counts(queryset=None):
+    """Barcha statuslar soni bitta GROUP BY so'rov bilan"""
+    queryset = HomeworkSubmission.objects.all() if queryset is None else queryset
+    counts = dict.fromkeys(STATUS_KEYS, 0)
+    for row in queryset.order_by().values('status').annotate(total=Count('id')):
+        counts[row['status']] = row['total']
+    counts['open'] = sum(counts[key] for key in STATUS_KEYS if key != 'graded')
+    return counts
@@ -0,0 +1,55 @@
+"""
+Foydalanuvchi xabarlar qutisi
+Shaxsiy va umumiy xabarlar: sanash uchun bitta so'rov,
+sahifalash uchun har bir oqim alohida indeks bo'yicha
+"""
+from django.db.models import Q
+
+from .models import Message
+
+MESSAGE_PAGE_SIZE = 20
+
+MESSAGE_TYPE_KEYS = {key for key, _ in Message.MESSAGE_TYPES}
+
+
+def general_message_types(user):
+    """Foydalanuvchi roliga mos umumiy xabar turlari"""
+    if user.is_student:
+        return ['all', 'students']
+    if user.is_teacher:
+        return ['all', 'teachers']
+    return ['all']
+
+
+def user_messages_queryset(user, message_type=None):
+    """Shaxsiy + umumiy xabarlar (tartiblanmagan)"""
+    queryset = Message.objects.filter(
+        Q(recipient=user) |
+        Q(recipient__isnull=True, message_type__in=general_message_types(user))
+    )
+    if message_type in MESSAGE_TYPE_KEYS:
+        queryset = queryset.filter(message_type=message_type)
+    return queryset
+
+
+def user_message_querysets(user, message_type=None):
+    """
+    Sahifalash uchun alohida so'rovlar: shaxsiy xabarlar (recipient, created_at, id)
+    va har bir umumiy tur (recipient IS NULL, message_type, created_at, id) bo'yicha.
+    Har biri o'z indeksini tartib bilan o'qiydi - pagination.keyset_page_merged
+    """
+    types = general_message_types(user)
+    personal = Message.objects.filter(recipient=user)
+    if message_type in MESSAGE_TYPE_KEYS:
+        personal = personal.filter(message_type=message_type)
+        types = [message_type] if message_type in types else []
+    return [personal] + [
+        Message.objects.filter(recipient__isnull=True, message_type=key) for key in types
+    ]
+
+
+def inbox_page(user, message_type=None, cursor=None, limit=MESSAGE_PAGE_SIZE):
+    """Xabarlar qutisining bitta sahifasi: (xabarlar, keyingi cursor)"""
+    from .pagination import keyset_page_merged
+
+    return keyset_page_merged(user_message_querysets(user, message_type), cursor=cursor, limit=limit)
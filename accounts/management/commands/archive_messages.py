@@ -0,0 +1,90 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Message, ArchivedMessage
+
+ARCHIVE_FIELDS = ['id', 'title', 'content', 'message_type', 'recipient_id', 'sender_id', 'is_read', 'created_at']
+
+
+class Command(BaseCommand):
+    help = "Move read messages past their retention period into the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows moved per transaction')
+        parser.add_argument('--type', dest='message_type', help='Only archive this message_type')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+
+    def handle(self, *args, **options):
+        retention = getattr(settings, 'MESSAGE_RETENTION_DAYS', {})
+        batch_size = options['batch_size']
+        only_type = options['message_type']
+
+        if only_type:
+            if only_type not in retention:
+                self.stdout.write(self.style.WARNING(f"No retention policy for '{only_type}'."))
+                return
+            retention = {only_type: retention[only_type]}
+
+        now = timezone.now()
+        total = 0
+        started = time.monotonic()
+
+        for message_type, days in retention.items():
+            expired = Message.objects.filter(
+                message_type=message_type,
+                is_read=True,
+                created_at__lt=now - timedelta(days=days),
+            )
+
+            if options['dry_run']:
+                count = expired.count()
+                self.stdout.write(f"{message_type}: {count} messages older than {days} days")
+                total += count
+                continue
+
+            type_started = time.monotonic()
+            moved = 0
+            while True:
+                rows = list(expired.order_by('id').values(*ARCHIVE_FIELDS)[:batch_size])
+                if not rows:
+                    break
+                moved += self.move_batch(rows)
+
+            elapsed = time.monotonic() - type_started
+            rate = moved / elapsed if elapsed > 0 else 0
+            self.stdout.write(f"{message_type}: archived {moved} messages in {elapsed:.2f}s ({rate:.0f} rows/s)")
+            total += moved
+
+        elapsed = time.monotonic() - started
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {total} messages would be archived."))
+        else:
+            rate = total / elapsed if elapsed > 0 else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {total} messages in {elapsed:.2f}s ({rate:.0f} rows/s)."
+            ))
+
+    @staticmethod
+    def move_batch(rows):
+        """Bitta tranzaksiyada: arxivga yozish va asosiy jadvaldan o'chirish"""
+        ids = [row['id'] for row in rows]
+        with transaction.atomic():
+            ArchivedMessage.objects.bulk_create([
+                ArchivedMessage(
+                    original_id=row['id'],
+                    title=row['title'],
+                    content=row['content'],
+                    message_type=row['message_type'],
+                    recipient_id=row['recipient_id'],
+                    sender_id=row['sender_id'],
+                    is_read=row['is_read'],
+                    created_at=row['created_at'],
+                ) for row in rows
+            ], ignore_conflicts=True)
+            Message.objects.filter(pk__in=ids).delete()
+        return len(ids)
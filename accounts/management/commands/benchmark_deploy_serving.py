@@ -0,0 +1,85 @@
+import os
+import shutil
+import time
+import tracemalloc
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from accounts.models import CustomUser, HTMLDeploy
+from accounts.views import view_deployed_page
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark serving a large asset of a deployed project: peak memory and throughput of "
+        "reading the file into memory vs streaming, plus Range and conditional requests. "
+        "Creates a temporary bench_* user and deploy and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=50, help='Asset size in MB')
+        parser.add_argument('--requests', type=int, default=5, help='Requests per variant')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        user = CustomUser.objects.create_user(username=f'bench_{tag}', password=uuid.uuid4().hex, phone=f'bench_{tag}')
+        deploy = HTMLDeploy.objects.create(user=user, title='bench', deploy_type='project', folder_name='bench', entry_file='index.html')
+        folder = deploy.get_folder_path()
+        os.makedirs(folder, exist_ok=True)
+        size = options['size_mb'] * 1024 * 1024
+        asset = os.path.join(folder, 'video.mp4')
+        with open(asset, 'wb') as f:
+            for _ in range(options['size_mb']):
+                f.write(os.urandom(1024 * 1024))
+
+        factory = RequestFactory()
+        path = f'/coding/{user.username}/bench/video.mp4'
+
+        def streaming(**headers):
+            return view_deployed_page(factory.get(path, **headers), user.username, 'bench', 'video.mp4')
+
+        def in_memory(**headers):
+            # Avvalgi usul: butun fayl o'qilib HttpResponse qaytariladi
+            with open(asset, 'rb') as f:
+                return HttpResponse(f.read(), content_type='video/mp4')
+
+        try:
+            self.stdout.write(f"Asset: {options['size_mb']} MB, {options['requests']} requests per variant")
+            for label, view in (('in-memory (f.read)', in_memory), ('streaming (FileResponse)', streaming)):
+                peak, elapsed, sent = self.measure(view, options['requests'])
+                self.stdout.write(
+                    f"{label:26} peak memory {peak / 1024 / 1024:7.1f} MB, "
+                    f"throughput {sent / elapsed / 1024 / 1024:7.0f} MB/s"
+                )
+
+            response = streaming(HTTP_RANGE='bytes=1048576-2097151')
+            body = b''.join(response.streaming_content)
+            self.stdout.write(f"Range 1-2MB: {response.status_code}, {response['Content-Range']}, {len(body)} bytes")
+
+            etag = streaming()['ETag']
+            started = time.perf_counter()
+            response = streaming(HTTP_IF_NONE_MATCH=etag)
+            self.stdout.write(f"If-None-Match: {response.status_code} in {(time.perf_counter() - started) * 1000:.2f}ms")
+            if response.status_code == 304 and len(body) == 1024 * 1024:
+                self.stdout.write(self.style.SUCCESS("OK"))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+            user.delete()
+
+    def measure(self, view, count):
+        """Javoblarni to'liq o'qib chiqish (WSGI server kabi) - eng yuqori xotira va vaqt"""
+        tracemalloc.start()
+        sent = 0
+        started = time.perf_counter()
+        for _ in range(count):
+            response = view()
+            for chunk in response:
+                sent += len(chunk)
+            response.close()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, elapsed, sent
@@ -0,0 +1,116 @@
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from accounts.grading_queue import claim_next, status_counts
+from accounts.models import CustomUser, Profession, Lesson, Homework, HomeworkSubmission
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the grading queue: many simulated teachers claim submissions concurrently. "
+        "Creates temporary bench_* data and removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=20, help='Concurrent simulated teachers')
+        parser.add_argument('--submissions', type=int, default=500, help='Submissions in the queue')
+        parser.add_argument('--batch', type=int, default=5, help='Submissions claimed per request')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        profession, teachers = self.create_fixture(tag, options['teachers'], options['submissions'])
+        backend = 'SELECT ... SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else 'conditional UPDATE'
+        self.stdout.write(f"Backend: {connection.vendor} ({backend}), {len(teachers)} teachers, {options['submissions']} submissions")
+
+        try:
+            claimed, errors, latencies, elapsed = self.run(teachers, options['batch'], profession.pk)
+
+            counts = Counter(claimed)
+            duplicates = sum(1 for n in counts.values() if n > 1)
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] if latencies else 0
+            p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+
+            self.stdout.write(f"Claimed {len(counts)} submissions in {len(latencies)} requests, {elapsed:.2f}s")
+            self.stdout.write(f"Throughput: {len(counts) / elapsed:.0f} claims/s; latency p50 {p50 * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms")
+            self.stdout.write(f"Duplicate claims: {duplicates}, errors: {len(errors)}")
+            for error in errors[:5]:
+                self.stdout.write(f"  {error}")
+
+            started = time.monotonic()
+            status_counts()
+            self.stdout.write(f"status_counts(): {(time.monotonic() - started) * 1000:.1f}ms")
+
+            if not duplicates and len(counts) == options['submissions']:
+                self.stdout.write(self.style.SUCCESS("OK: every submission claimed exactly once"))
+            else:
+                self.stdout.write(self.style.ERROR("Queue invariant violated"))
+        finally:
+            profession.delete()
+            CustomUser.objects.filter(username__startswith=f'bench_{tag}_').delete()
+
+    def create_fixture(self, tag, teacher_count, submission_count):
+        profession = Profession.objects.create(name=f'bench_{tag}', photo='bench.png', description='benchmark')
+        lesson = Lesson.objects.create(profession=profession, title=f'bench_{tag}', lesson_type='homework')
+        homework = Homework.objects.create(lesson=lesson, description='benchmark')
+
+        def user(name, role):
+            return CustomUser(username=f'bench_{tag}_{name}', role=role, phone=f'bench_{tag}_{name}')
+
+        CustomUser.objects.bulk_create(
+            [user(f't{i}', 'teacher') for i in range(teacher_count)]
+            + [user(f's{i}', 'student') for i in range(submission_count)]
+        )
+        teachers = list(CustomUser.objects.filter(username__startswith=f'bench_{tag}_t'))
+        students = CustomUser.objects.filter(username__startswith=f'bench_{tag}_s').values_list('id', flat=True)
+        HomeworkSubmission.objects.bulk_create([
+            HomeworkSubmission(homework=homework, student_id=student_id, file='bench.zip', is_late=i % 7 == 0)
+            for i, student_id in enumerate(students)
+        ])
+        return profession, teachers
+
+    def run(self, teachers, batch, profession_id):
+        claimed = []
+        errors = []
+        latencies = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(teachers))
+
+        def worker(teacher):
+            failures = 0
+            try:
+                barrier.wait()
+                while failures < 10:
+                    started = time.monotonic()
+                    try:
+                        ids = claim_next(teacher, batch, profession_id)
+                        latency = time.monotonic() - started
+                        # "Baholash": vazifani navbatdan chiqarish
+                        HomeworkSubmission.objects.filter(id__in=ids).update(
+                            status='graded', claimed_by=None, claim_expires_at=None,
+                        )
+                    except Exception as e:
+                        failures += 1
+                        with lock:
+                            errors.append(f"{teacher.username}: {e}")
+                        continue
+                    with lock:
+                        latencies.append(latency)
+                        claimed.extend(ids)
+                    if not ids:
+                        break
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(teacher,)) for teacher in teachers]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return claimed, errors, latencies, time.monotonic() - started
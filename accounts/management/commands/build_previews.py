@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.models import HomeworkSubmission, HomeworkMessage, HomeworkRevision, FilePreview
+from accounts.previews import PREVIEW_SIZE, render_preview, store_result
+
+PREVIEW_FIELDS = (
+    (HomeworkSubmission, 'file'),
+    (HomeworkSubmission, 'feedback_file'),
+    (HomeworkRevision, 'file'),
+    (HomeworkMessage, 'file'),
+)
+
+
+class Command(BaseCommand):
+    help = "Generate missing previews for homework, revision and chat files in a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'PREVIEW_WORKERS', 2), help='Worker processes')
+        parser.add_argument('--rebuild', action='store_true', help='Regenerate existing previews')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        existing = set() if options['rebuild'] else set(FilePreview.objects.values_list('source', flat=True))
+
+        jobs = {}
+        for model, field in PREVIEW_FIELDS:
+            storage = model._meta.get_field(field).storage
+            for name in model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(field, flat=True).distinct().iterator():
+                if name not in existing and name not in jobs:
+                    jobs[name] = storage
+
+        self.stdout.write(f"Rendering {len(jobs)} previews with {options['workers']} workers...")
+        size = getattr(settings, 'PREVIEW_MAX_SIZE', PREVIEW_SIZE)
+        counts = {'image': 0, 'text': 0, 'none': 0}
+
+        names = list(jobs)
+        paths = [jobs[name].path(name) for name in names]
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for name, result in zip(names, pool.map(render_preview, paths, [size] * len(paths), chunksize=8)):
+                store_result(name, jobs[name], result)
+                counts[result['kind']] += 1
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {elapsed:.2f}s: {counts['image']} images, {counts['text']} text snippets, {counts['none']} without preview."
+        ))
@@ -0,0 +1,90 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import HomeworkSubmission, SubmissionFingerprint, SubmissionLSHBucket, SimilarSubmissionPair
+from accounts.similarity import (
+    compute_signature, get_threshold, pairs_from_buckets, store_fingerprint, unpack_signature,
+)
+
+
+class Command(BaseCommand):
+    help = "Compute MinHash signatures for homework files in a process pool and rebuild the LSH similarity pairs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--homework', type=int, action='append', help='Only this homework id (repeatable)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Worker processes')
+        parser.add_argument('--rebuild', action='store_true', help='Re-index files that already have a signature')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        submissions = HomeworkSubmission.objects.exclude(file='')
+        if options['homework']:
+            submissions = submissions.filter(homework_id__in=options['homework'])
+
+        indexed = dict(SubmissionFingerprint.objects.filter(
+            submission__in=submissions,
+        ).values_list('submission_id', 'file_name'))
+
+        jobs = []
+        for pk, homework_id, file_name in submissions.values_list('pk', 'homework_id', 'file').iterator():
+            if not options['rebuild'] and indexed.get(pk) == file_name:
+                continue
+            path = HomeworkSubmission._meta.get_field('file').storage.path(file_name)
+            jobs.append((pk, homework_id, file_name, path))
+
+        self.stdout.write(f"Indexing {len(jobs)} files with {options['workers']} workers...")
+        signed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            paths = [path for _, _, _, path in jobs]
+            chunksize = max(1, len(paths) // (options['workers'] * 4))
+            results = pool.map(compute_signature, paths, chunksize=chunksize)
+            for (pk, homework_id, file_name, _), (signature, token_count) in zip(jobs, results):
+                store_fingerprint(pk, homework_id, file_name, signature, token_count)
+                signed += signature is not None
+        extracted = time.monotonic() - started
+        self.stdout.write(f"Signatures: {signed} of {len(jobs)} files had enough text ({extracted:.2f}s)")
+
+        homework_ids = {homework_id for _, homework_id, _, _ in jobs}
+        if options['rebuild'] or options['homework']:
+            homework_ids |= set(submissions.values_list('homework_id', flat=True).distinct())
+
+        total_pairs = 0
+        total_candidates = 0
+        for homework_id in sorted(homework_ids):
+            pairs, candidates = self.rebuild_pairs(homework_id)
+            total_pairs += pairs
+            total_candidates += candidates
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(homework_ids)} homeworks: {total_candidates} candidate pairs checked, "
+            f"{total_pairs} similar pairs stored in {elapsed:.2f}s."
+        ))
+
+    def rebuild_pairs(self, homework_id):
+        """Bitta vazifa bo'yicha juftlarni bucket'lardan qayta hisoblash"""
+        fingerprints = dict(
+            SubmissionFingerprint.objects.filter(homework_id=homework_id, signature__isnull=False)
+            .values_list('pk', 'signature')
+        )
+        signatures = {pk: unpack_signature(data) for pk, data in fingerprints.items()}
+        rows = SubmissionLSHBucket.objects.filter(homework_id=homework_id).values_list('fingerprint_id', 'band', 'bucket')
+
+        found, candidates = pairs_from_buckets(rows.iterator(), signatures, get_threshold())
+
+        submission_of = dict(
+            SubmissionFingerprint.objects.filter(pk__in=signatures).values_list('pk', 'submission_id')
+        )
+        pairs = []
+        for first, second, score in found:
+            first_id, second_id = sorted((submission_of[first], submission_of[second]))
+            pairs.append(SimilarSubmissionPair(homework_id=homework_id, first_id=first_id, second_id=second_id, score=score))
+
+        with transaction.atomic():
+            SimilarSubmissionPair.objects.filter(homework_id=homework_id).delete()
+            SimilarSubmissionPair.objects.bulk_create(pairs, batch_size=500)
+        return len(pairs), candidates
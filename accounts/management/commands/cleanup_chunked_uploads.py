@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import ChunkedUpload
+from accounts.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned chunked uploads and their partial files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help='Inactivity before an upload is abandoned')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+
+        removed = 0
+        for upload in list(ChunkedUpload.objects.filter(status='uploading', updated_at__lt=cutoff)):
+            discard_upload(upload)
+            removed += 1
+
+        completed = ChunkedUpload.objects.filter(status='complete', updated_at__lt=cutoff).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {removed} abandoned uploads and {completed} completed upload records."
+        ))
@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from accounts.deploy_compression import compress_deploy, get_workers
+from accounts.models import HTMLDeploy
+
+
+class Command(BaseCommand):
+    help = "Precompress text assets (gzip, and brotli when installed) of deployed projects and pages and report the savings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deploy', type=int, action='append', help='Only this deploy id (repeatable)')
+        parser.add_argument('--workers', type=int, default=get_workers(), help='Compression threads per deploy')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        deploys = HTMLDeploy.objects.select_related('user').defer('html_content')
+        if options['deploy']:
+            deploys = deploys.filter(pk__in=options['deploy'])
+
+        totals = {'files': 0, 'original': 0, 'gzip': 0, 'brotli': 0}
+        for deploy in deploys.iterator():
+            folder = deploy.get_folder_path()
+            if not os.path.isdir(folder):
+                self.stdout.write(self.style.WARNING(f"{deploy}: folder missing, skipped"))
+                continue
+
+            stats = compress_deploy(folder, options['workers'])
+            for key in totals:
+                totals[key] += stats[key]
+
+            deploy.assets_size = stats['original']
+            deploy.compressed_size = stats['gzip']
+            # save() - marshrut keshi va manifest signal orqali yangilanadi
+            deploy.save(update_fields=['assets_size', 'compressed_size'])
+            self.stdout.write(
+                f"{deploy}: {stats['files']} files, {filesizeformat(stats['original'])} -> "
+                f"gzip {filesizeformat(stats['gzip'])}, brotli {filesizeformat(stats['brotli'])} "
+                f"({deploy.compression_percent}% saved)"
+            )
+
+        saved = totals['original'] - totals['gzip']
+        percent = saved * 100 / totals['original'] if totals['original'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.monotonic() - started:.2f}s: {totals['files']} files, "
+            f"{filesizeformat(totals['original'])} -> {filesizeformat(totals['gzip'])} with gzip ({percent:.0f}% saved)."
+        ))
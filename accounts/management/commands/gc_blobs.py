@@ -0,0 +1,134 @@
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import HomeworkSubmission, HomeworkMessage, HomeworkRevision, StoredBlob, FilePreview
+from accounts.storage import CAS_PREFIX, cas_storage
+
+# Blob yonida saqlanadigan preview fayllari (accounts.previews)
+PREVIEW_SUFFIXES = ('.preview.jpg', '.preview.txt')
+
+# Kontent bo'yicha saqlanadigan maydonlar
+BLOB_FIELDS = (
+    (HomeworkSubmission, 'file'),
+    (HomeworkSubmission, 'feedback_file'),
+    (HomeworkMessage, 'file'),
+    (HomeworkRevision, 'file'),
+)
+
+
+def count_references():
+    """Bazadagi barcha havolalarni sanash (mark bosqichi)"""
+    refs = Counter()
+    for model, field in BLOB_FIELDS:
+        names = model.objects.filter(**{f'{field}__startswith': CAS_PREFIX + '/'}).values_list(field, flat=True)
+        refs.update(names.iterator())
+    return refs
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = "Recount blob references, delete orphaned blobs and report storage saved by deduplication"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=1, help='Keep unreferenced blobs younger than this')
+        parser.add_argument('--dry-run', action='store_true', help='Report only, do not delete anything')
+        parser.add_argument('--report', action='store_true', help='Only print the deduplication report')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        refs = count_references()
+
+        if not options['report']:
+            self.recount(refs, options['dry_run'])
+            self.sweep(options['grace_hours'], options['dry_run'])
+
+        self.report(refs)
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.monotonic() - started:.2f}s."))
+
+    def recount(self, refs, dry_run):
+        changed = []
+        for blob in StoredBlob.objects.only('id', 'name', 'ref_count').iterator():
+            actual = refs.get(blob.name, 0)
+            if blob.ref_count != actual:
+                blob.ref_count = actual
+                changed.append(blob)
+
+        if changed and not dry_run:
+            StoredBlob.objects.bulk_update(changed, ['ref_count'], batch_size=500)
+        self.stdout.write(f"Reference counts corrected: {len(changed)}")
+
+    def sweep(self, grace_hours, dry_run):
+        cutoff = timezone.now() - timedelta(hours=grace_hours)
+
+        orphans = list(StoredBlob.objects.filter(ref_count=0, created_at__lt=cutoff).values_list('id', 'name', 'size'))
+        freed = 0
+        deleted = 0
+        for pk, name, size in orphans:
+            if dry_run or self.delete_blob(pk, name):
+                deleted += 1
+                freed += size
+
+        # Diskda bor, lekin bazada yozuvi yo'q fayllar (masalan, uzilgan yuklash)
+        known = set(StoredBlob.objects.values_list('name', flat=True))
+        stray = 0
+        root = cas_storage.path(CAS_PREFIX)
+        cutoff_ts = cutoff.timestamp()
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                name = os.path.relpath(full_path, cas_storage.location).replace(os.sep, '/')
+                if name in known:
+                    continue
+                if name.endswith(PREVIEW_SUFFIXES) and name.rsplit('.preview.', 1)[0] in known:
+                    continue
+                stat = os.stat(full_path)
+                if stat.st_mtime >= cutoff_ts:
+                    continue
+                stray += 1
+                freed += stat.st_size
+                if not dry_run:
+                    os.remove(full_path)
+
+        prefix = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(f"{prefix} {deleted} orphaned blobs and {stray} stray files ({format_size(freed)})")
+
+    def delete_blob(self, pk, name):
+        """
+        Avval yozuv egallanadi (ref_count=0 sharti bilan o'chiriladi), fayl shundan keyin
+        va shu tranzaksiya ichida o'chiriladi: parallel ingest_path yozuvni qulflay olmaguncha
+        kutadi, keyin faylni qayta yozadi. Blobni hozirgina kimdir olgan bo'lsa - False.
+        """
+        with transaction.atomic():
+            if not StoredBlob.objects.filter(pk=pk, ref_count=0).delete()[0]:
+                return False
+            # Blob va uning yonidagi preview fayllari
+            for path in [cas_storage.path(name)] + [cas_storage.path(name) + suffix for suffix in PREVIEW_SUFFIXES]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            FilePreview.objects.filter(source=name).delete()
+        return True
+
+    def report(self, refs):
+        sizes = dict(StoredBlob.objects.values_list('name', 'size'))
+        physical = sum(sizes.values())
+        logical = sum(sizes.get(name, 0) * count for name, count in refs.items())
+        saved = logical - physical if logical > physical else 0
+        ratio = (saved / logical * 100) if logical else 0
+
+        self.stdout.write(f"Blobs: {len(sizes)}, references: {sum(refs.values())}")
+        self.stdout.write(f"Logical size: {format_size(logical)}, on disk: {format_size(physical)}")
+        self.stdout.write(f"Saved by deduplication: {format_size(saved)} ({ratio:.1f}%)")
@@ -0,0 +1,74 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+
+from accounts.models import DeployManifest, StorageUsage
+from accounts.storage_usage import compute_usage, scan_media
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user storage accounting from MEDIA_ROOT (parallel scandir) and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=min(32, (os.cpu_count() or 1) * 4), help='Scanner threads')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drift, do not write')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        sizes = scan_media(settings.MEDIA_ROOT, options['workers'])
+        scanned = time.monotonic() - started
+        self.stdout.write(f"Scanned {len(sizes)} files ({filesizeformat(sum(sizes.values()))}) in {scanned:.2f}s")
+
+        expected, deploy_sizes = compute_usage(sizes)
+        current = {
+            (user_id, category): (pk, size)
+            for pk, user_id, category, size in StorageUsage.objects.values_list('pk', 'user_id', 'category', 'bytes')
+        }
+
+        drift = []
+        for key in set(expected) | set(current):
+            actual = current.get(key, (None, 0))[1]
+            if actual != expected.get(key, 0):
+                drift.append((key, actual, expected.get(key, 0)))
+        drift.sort(key=lambda item: abs(item[2] - item[1]), reverse=True)
+        for (user_id, category), actual, wanted in drift[:20]:
+            self.stdout.write(f"  user {user_id} {category}: {filesizeformat(actual)} -> {filesizeformat(wanted)}")
+        if len(drift) > 20:
+            self.stdout.write(f"  ... and {len(drift) - 20} more")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run: {len(drift)} rows differ, nothing written."))
+            return
+
+        # Skanerlash davomida yuklangan fayllar keyingi ishga tushirishda tuzatiladi
+        with transaction.atomic():
+            stale = [current[key][0] for key, _, wanted in drift if key in current and not wanted]
+            StorageUsage.objects.filter(pk__in=stale).delete()
+            updates = [
+                StorageUsage(pk=current[key][0], bytes=wanted)
+                for key, _, wanted in drift if key in current and wanted
+            ]
+            StorageUsage.objects.bulk_update(updates, ['bytes'], batch_size=500)
+            missing = [(key, wanted) for key, _, wanted in drift if key not in current]
+            StorageUsage.objects.bulk_create(
+                [StorageUsage(user_id=key[0], category=key[1], bytes=wanted) for key, wanted in missing],
+                batch_size=500, ignore_conflicts=True,
+            )
+            # Skanerlashdan keyin parallel yuklash shu (user, category) yozuvini yaratgan
+            # bo'lishi mumkin - ignore_conflicts o'tkazib yuborgan qatorlarga ham qiymat yoziladi
+            for (user_id, category), wanted in missing:
+                StorageUsage.objects.filter(user_id=user_id, category=category).exclude(bytes=wanted).update(bytes=wanted)
+            manifests = list(DeployManifest.objects.filter(deploy_id__in=deploy_sizes).only('pk', 'deploy_id', 'disk_size'))
+            changed = [m for m in manifests if m.disk_size != deploy_sizes[m.deploy_id]]
+            for manifest in changed:
+                manifest.disk_size = deploy_sizes[manifest.deploy_id]
+            DeployManifest.objects.bulk_update(changed, ['disk_size'], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.monotonic() - started:.2f}s: {len(drift)} usage rows fixed, "
+            f"{len(changed)} deploy manifests resized, total {filesizeformat(sum(expected.values()))}."
+        ))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.notifications import (
+    batch_inactivity, batch_progress_decrease, batch_homework_deadlines,
+    send_notifications_bulk,
+)
+
+RULES = {
+    'inactivity': batch_inactivity,
+    'progress_decrease': batch_progress_decrease,
+    'homework_deadline': batch_homework_deadlines,
+}
+
+
+class Command(BaseCommand):
+    help = "Evaluate notification rules for all users with grouped queries and bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rule', action='append', choices=sorted(RULES), help='Run only this rule (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Evaluate rules without sending anything')
+
+    def handle(self, *args, **options):
+        rule_names = options['rule'] or list(RULES)
+        now = timezone.now()
+        total_sent = 0
+        started = time.monotonic()
+
+        for name in rule_names:
+            rule_started = time.monotonic()
+            rows = RULES[name](now)
+            evaluated = time.monotonic() - rule_started
+
+            sent = 0
+            if rows and not options['dry_run']:
+                sent = send_notifications_bulk(rows)
+            elapsed = time.monotonic() - rule_started
+
+            total_sent += sent
+            self.stdout.write(
+                f"{name}: {len(rows)} matches, {sent} sent "
+                f"(evaluate {evaluated * 1000:.1f}ms, total {elapsed * 1000:.1f}ms)"
+            )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Rules finished in {elapsed:.2f}s, {total_sent} notifications sent."))
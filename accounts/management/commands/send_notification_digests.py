@@ -0,0 +1,96 @@
+import time
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Message, PendingNotification
+
+
+class Command(BaseCommand):
+    help = "Fold buffered low-priority notifications into one digest message per user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users processed per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+        users_done = 0
+        items_done = 0
+        last_user_id = 0
+
+        while True:
+            user_ids = list(
+                PendingNotification.objects.filter(delivered_at__isnull=True, user_id__gt=last_user_id)
+                .order_by('user_id')
+                .values_list('user_id', flat=True)
+                .distinct()[:batch_size]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+
+            created, items = self.process_chunk(user_ids)
+            users_done += len(user_ids)
+            items_done += items
+            self.stdout.write(f"Users up to #{last_user_id}: {len(created)} messages from {items} notifications")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Digested {items_done} notifications for {users_done} users in {elapsed:.2f}s."
+        ))
+
+    def process_chunk(self, user_ids):
+        now = timezone.now()
+
+        with transaction.atomic():
+            pending = list(
+                PendingNotification.objects.select_for_update()
+                .filter(delivered_at__isnull=True, user_id__in=user_ids)
+                .order_by('user_id', 'created_at', 'id')
+            )
+
+            groups = []
+            for user_id, items in groupby(pending, key=lambda item: item.user_id):
+                items = list(items)
+                groups.append((items, self.build_message(user_id, items)))
+
+            # SQLite 3.35+/PostgreSQL bulk_create pk'larni qaytaradi
+            created = Message.objects.bulk_create([message for _, message in groups])
+
+            for items, message in groups:
+                for item in items:
+                    item.digest = message
+                    item.delivered_at = now
+            PendingNotification.objects.bulk_update(pending, ['digest', 'delivered_at'])
+
+            # bulk_create post_save chaqirmaydi - real-time kanalga o'zimiz yuboramiz
+            def publish():
+                from accounts.realtime import publish_message
+                for message in created:
+                    publish_message(message)
+            transaction.on_commit(publish)
+
+        return created, len(pending)
+
+    @staticmethod
+    def build_message(user_id, items):
+        # Bitta bildirishnoma bo'lsa - o'zgarishsiz yetkaziladi
+        if len(items) == 1:
+            item = items[0]
+            return Message(
+                recipient_id=user_id,
+                title=item.title,
+                content=item.content,
+                message_type=item.message_type,
+            )
+
+        content = "\n\n".join(f"{item.title}\n{item.content}" for item in items)
+        return Message(
+            recipient_id=user_id,
+            title=f"📬 Sizga {len(items)} ta yangilik",
+            content=content,
+            message_type='digest',
+        )
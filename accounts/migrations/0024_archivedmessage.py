@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_message_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='Asl ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Sarlavha')),
+                ('content', models.TextField(verbose_name='Xabar matni')),
+                ('message_type', models.CharField(choices=[('all', 'Barchaga'), ('students', "O'quvchilarga"), ('teachers', "O'qituvchilarga"), ('personal', 'Shaxsiy'), ('system', 'Tizim xabari'), ('payment', "To'lov eslatmasi"), ('motivation', "Rag'batlantirish"), ('warning', 'Ogohlantirish'), ('achievement', 'Yutuq'), ('reminder', 'Eslatma'), ('recommendation', 'Tavsiya'), ('security', 'Xavfsizlik')], max_length=20)),
+                ('is_read', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('recipient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to=settings.AUTH_USER_MODEL)),
+                ('sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Arxivlangan xabar',
+                'verbose_name_plural': 'Arxivlangan xabarlar',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['recipient', '-created_at'], name='archived_message_inbox_idx')],
+            },
+        ),
+    ]
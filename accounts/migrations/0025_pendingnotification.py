@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_archivedmessage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedmessage',
+            name='message_type',
+            field=models.CharField(choices=[('all', 'Barchaga'), ('students', "O'quvchilarga"), ('teachers', "O'qituvchilarga"), ('personal', 'Shaxsiy'), ('system', 'Tizim xabari'), ('payment', "To'lov eslatmasi"), ('motivation', "Rag'batlantirish"), ('warning', 'Ogohlantirish'), ('achievement', 'Yutuq'), ('reminder', 'Eslatma'), ('recommendation', 'Tavsiya'), ('security', 'Xavfsizlik'), ('digest', 'Jamlanma')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='message_type',
+            field=models.CharField(choices=[('all', 'Barchaga'), ('students', "O'quvchilarga"), ('teachers', "O'qituvchilarga"), ('personal', 'Shaxsiy'), ('system', 'Tizim xabari'), ('payment', "To'lov eslatmasi"), ('motivation', "Rag'batlantirish"), ('warning', 'Ogohlantirish'), ('achievement', 'Yutuq'), ('reminder', 'Eslatma'), ('recommendation', 'Tavsiya'), ('security', 'Xavfsizlik'), ('digest', 'Jamlanma')], default='all', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200, verbose_name='Sarlavha')),
+                ('content', models.TextField(verbose_name='Xabar matni')),
+                ('message_type', models.CharField(choices=[('all', 'Barchaga'), ('students', "O'quvchilarga"), ('teachers', "O'qituvchilarga"), ('personal', 'Shaxsiy'), ('system', 'Tizim xabari'), ('payment', "To'lov eslatmasi"), ('motivation', "Rag'batlantirish"), ('warning', 'Ogohlantirish'), ('achievement', 'Yutuq'), ('reminder', 'Eslatma'), ('recommendation', 'Tavsiya'), ('security', 'Xavfsizlik'), ('digest', 'Jamlanma')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Yetkazilgan vaqt')),
+                ('digest', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='digest_items', to='accounts.message')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Kutilayotgan bildirishnoma',
+                'verbose_name_plural': 'Kutilayotgan bildirishnomalar',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['delivered_at', 'user'], name='pending_notification_queue_idx'), models.Index(fields=['user', 'message_type', '-created_at'], name='pending_notification_user_idx')],
+            },
+        ),
+    ]
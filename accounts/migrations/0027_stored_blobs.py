@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:08
+
+import accounts.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0026_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Storage nomi')),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField(verbose_name='Hajmi (bayt)')),
+                ('ref_count', models.IntegerField(default=0, verbose_name='Havolalar soni')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Saqlangan fayl (blob)',
+                'verbose_name_plural': 'Saqlangan fayllar (blob)',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='homeworkmessage',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=accounts.storage.ContentAddressedStorage(), upload_to='homework_chat/', verbose_name='Fayl'),
+        ),
+        migrations.AlterField(
+            model_name='homeworkrevision',
+            name='file',
+            field=models.FileField(storage=accounts.storage.ContentAddressedStorage(), upload_to='homework_revisions/'),
+        ),
+        migrations.AlterField(
+            model_name='homeworksubmission',
+            name='feedback_file',
+            field=models.FileField(blank=True, null=True, storage=accounts.storage.ContentAddressedStorage(), upload_to='homework_feedback/', verbose_name='Izoh fayli'),
+        ),
+        migrations.AlterField(
+            model_name='homeworksubmission',
+            name='file',
+            field=models.FileField(storage=accounts.storage.ContentAddressedStorage(), upload_to='homework_submissions/'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0027_stored_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworksubmission',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Band qilish muddati'),
+        ),
+        migrations.AddField(
+            model_name='homeworksubmission',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_submissions', to=settings.AUTH_USER_MODEL, verbose_name='Tekshiruvchi'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworksubmission',
+            index=models.Index(fields=['status', 'claim_expires_at'], name='submission_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworksubmission',
+            index=models.Index(fields=['claimed_by', 'claim_expires_at'], name='submission_claims_idx'),
+        ),
+    ]
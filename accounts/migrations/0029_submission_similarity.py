@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0028_grading_queue_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Indekslangan fayl')),
+                ('signature', models.BinaryField(blank=True, null=True)),
+                ('token_count', models.IntegerField(default=0, verbose_name="So'zlar soni")),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+                ('homework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='accounts.homework')),
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint', to='accounts.homeworksubmission')),
+            ],
+            options={
+                'verbose_name': 'Vazifa imzosi',
+                'verbose_name_plural': 'Vazifa imzolari',
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarSubmissionPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name="O'xshashlik")),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('first', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.homeworksubmission')),
+                ('homework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_pairs', to='accounts.homework')),
+                ('second', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.homeworksubmission')),
+            ],
+            options={
+                'verbose_name': "O'xshash vazifalar",
+                'verbose_name_plural': "O'xshash vazifalar",
+                'ordering': ['-score'],
+                'unique_together': {('first', 'second')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.SmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='accounts.submissionfingerprint')),
+                ('homework', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='accounts.homework')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['homework', 'band', 'bucket'], name='lsh_bucket_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0029_submission_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilePreview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, unique=True, verbose_name='Asl fayl')),
+                ('kind', models.CharField(choices=[('image', 'Rasm'), ('text', 'Matn'), ('none', "Preview yo'q")], max_length=10)),
+                ('preview', models.CharField(blank=True, max_length=255, verbose_name='Preview fayl')),
+                ('width', models.IntegerField(default=0)),
+                ('height', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Fayl preview',
+                'verbose_name_plural': "Fayl preview'lari",
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0030_file_previews'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='homeworkmessage',
+            index=models.Index(fields=['submission', 'is_read'], name='hw_message_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworksubmission',
+            index=models.Index(fields=['-submitted_at', '-id'], name='submission_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworksubmission',
+            index=models.Index(fields=['status', '-submitted_at', '-id'], name='submission_status_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworksubmission',
+            index=models.Index(fields=['student', '-submitted_at', '-id'], name='submission_student_list_idx'),
+        ),
+    ]
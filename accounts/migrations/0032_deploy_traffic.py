@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0031_submission_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemreport',
+            name='deploy_bytes',
+            field=models.BigIntegerField(default=0, verbose_name='Davrdagi trafik'),
+        ),
+        migrations.AddField(
+            model_name='systemreport',
+            name='deploy_hits',
+            field=models.IntegerField(default=0, verbose_name="Davrdagi so'rovlar"),
+        ),
+        migrations.AddField(
+            model_name='systemreport',
+            name='deploy_period_views',
+            field=models.IntegerField(default=0, verbose_name="Davrdagi ko'rishlar"),
+        ),
+        migrations.CreateModel(
+            name='DeployTraffic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Sana')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar")),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name="So'rovlar")),
+                ('bytes_sent', models.BigIntegerField(default=0, verbose_name='Yuborilgan hajm')),
+                ('deploy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='traffic', to='accounts.htmldeploy')),
+            ],
+            options={
+                'verbose_name': 'Deploy trafigi',
+                'verbose_name_plural': 'Deploy trafigi',
+                'indexes': [models.Index(fields=['date'], name='deploy_traffic_date_idx')],
+                'unique_together': {('deploy', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0032_deploy_traffic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='htmldeploy',
+            name='assets_size',
+            field=models.BigIntegerField(default=0, verbose_name='Matnli fayllar hajmi'),
+        ),
+        migrations.AddField(
+            model_name='htmldeploy',
+            name='compressed_size',
+            field=models.BigIntegerField(default=0, verbose_name='Siqilgan hajm'),
+        ),
+    ]
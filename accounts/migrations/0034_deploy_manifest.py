@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0033_deploy_compression'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='htmldeploy',
+            name='entry_file',
+            field=models.CharField(default='index.html', max_length=255, verbose_name='Asosiy fayl'),
+        ),
+        migrations.CreateModel(
+            name='DeployManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('files', models.JSONField(default=dict, verbose_name='Fayllar')),
+                ('file_count', models.PositiveIntegerField(default=0, verbose_name='Fayllar soni')),
+                ('total_size', models.BigIntegerField(default=0, verbose_name='Umumiy hajm')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deploy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='manifest', to='accounts.htmldeploy')),
+            ],
+            options={
+                'verbose_name': 'Deploy manifesti',
+                'verbose_name_plural': 'Deploy manifestlari',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0034_deploy_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deploymanifest',
+            name='disk_size',
+            field=models.BigIntegerField(default=0, verbose_name='Diskdagi hajm'),
+        ),
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('deploys', 'Deploylar'), ('homework_submissions', 'Vazifa fayllari'), ('homework_chat', 'Vazifa chati'), ('chat_images', 'AI chat rasmlari'), ('documents', 'Hujjatlar')], max_length=30, verbose_name='Kategoriya')),
+                ('bytes', models.BigIntegerField(default=0, verbose_name='Hajm (bayt)')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='storage_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Xotira hisobi',
+                'verbose_name_plural': 'Xotira hisobi',
+                'unique_together': {('user', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+import os
+
+from django.conf import settings
+from django.db import migrations
+
+
+def _entry_name(entry_file):
+    name = os.path.basename((entry_file or '').replace('\\', '/'))
+    return name if name.lower().endswith(('.html', '.htm')) else 'index.html'
+
+
+def html_deploys_to_disk(apps, schema_editor):
+    """Bazadagi bitta sahifali deploylarni deploys/<username>/<papka>/ ga yozish"""
+    HTMLDeploy = apps.get_model('accounts', 'HTMLDeploy')
+    DeployManifest = apps.get_model('accounts', 'DeployManifest')
+
+    deploys = HTMLDeploy.objects.filter(deploy_type='html', html_content__isnull=False).select_related('user')
+    for deploy in deploys.iterator(chunk_size=100):
+        entry_file = _entry_name(deploy.entry_file)
+        folder = os.path.join(settings.MEDIA_ROOT, 'deploys', deploy.user.username, deploy.folder_name)
+        data = deploy.html_content.encode('utf-8')
+        try:
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, entry_file), 'wb') as f:
+                f.write(data)
+        except OSError:
+            # Yozib bo'lmadi - sahifa bazadan berilishda davom etadi
+            continue
+        DeployManifest.objects.update_or_create(
+            deploy=deploy,
+            defaults={'files': {entry_file: len(data)}, 'file_count': 1, 'total_size': len(data), 'disk_size': len(data)},
+        )
+        HTMLDeploy.objects.filter(pk=deploy.pk).update(entry_file=entry_file, html_content=None)
+
+
+def html_deploys_to_database(apps, schema_editor):
+    HTMLDeploy = apps.get_model('accounts', 'HTMLDeploy')
+
+    deploys = HTMLDeploy.objects.filter(deploy_type='html', html_content__isnull=True).select_related('user')
+    for deploy in deploys.iterator(chunk_size=100):
+        path = os.path.join(settings.MEDIA_ROOT, 'deploys', deploy.user.username, deploy.folder_name, deploy.entry_file)
+        try:
+            with open(path, encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+        except OSError:
+            continue
+        HTMLDeploy.objects.filter(pk=deploy.pk).update(html_content=content)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0035_storage_usage'),
+    ]
+
+    operations = [
+        migrations.RunPython(html_deploys_to_disk, html_deploys_to_database),
+    ]
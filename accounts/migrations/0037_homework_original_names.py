@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:16
+
+import os
+
+from django.db import migrations, models
+
+CAS_PREFIX = 'cas/'
+
+
+def fill_original_names(apps, schema_editor):
+    """
+    Mavjud yozuvlar uchun asl nom: oddiy nomlarda - fayl nomi,
+    blob (hash) nomlarida - shu hash bilan yakunlangan bo'laklab yuklashdagi nom
+    """
+    ChunkedUpload = apps.get_model('accounts', 'ChunkedUpload')
+
+    uploaded = {}
+    for filename, digest in ChunkedUpload.objects.filter(status='complete').exclude(sha256='').values_list('filename', 'sha256').iterator():
+        ext = os.path.splitext(filename)[1].lower()[:16]
+        uploaded[f'{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}'] = filename
+
+    def original(name):
+        if not name:
+            return ''
+        if name.startswith(CAS_PREFIX):
+            return uploaded.get(name, '')
+        return os.path.basename(name)[:255]
+
+    for model_name, fields in (
+        ('HomeworkSubmission', (('file', 'original_name'), ('feedback_file', 'feedback_original_name'))),
+        ('HomeworkRevision', (('file', 'original_name'),)),
+        ('HomeworkMessage', (('file', 'original_name'),)),
+    ):
+        model = apps.get_model('accounts', model_name)
+        for file_field, name_field in fields:
+            rows = model.objects.exclude(**{f'{file_field}__isnull': True}).exclude(**{file_field: ''})
+            for pk, name in rows.values_list('pk', file_field).iterator():
+                value = original(name)
+                if value:
+                    model.objects.filter(pk=pk).update(**{name_field: value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0036_html_deploys_to_disk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeworkmessage',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Asl fayl nomi'),
+        ),
+        migrations.AddField(
+            model_name='homeworkrevision',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Asl fayl nomi'),
+        ),
+        migrations.AddField(
+            model_name='homeworksubmission',
+            name='feedback_original_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Izoh faylining asl nomi'),
+        ),
+        migrations.AddField(
+            model_name='homeworksubmission',
+            name='original_name',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Asl fayl nomi'),
+        ),
+        migrations.RunPython(fill_original_names, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,11 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from .storage import cas_storage, file_display_name
+
 
 class Profession(models.Model):
     name = models.CharField(max_length=200, verbose_name="Kasb nomi")
@@ -358,21 +362,33 @@ class HomeworkSubmission(models.Model):
     
     homework = models.ForeignKey(Homework, on_delete=models.CASCADE, related_name='submissions')
     student = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='homework_submissions')
-    file = models.FileField(upload_to='homework_submissions/')
+    file = models.FileField(upload_to='homework_submissions/', storage=cas_storage)
+    original_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Asl fayl nomi")
     submitted_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     grade = models.IntegerField(null=True, blank=True, verbose_name="Baho (1-100)")
     feedback = models.TextField(blank=True, null=True, verbose_name="Izoh")
-    feedback_file = models.FileField(upload_to='homework_feedback/', null=True, blank=True, verbose_name="Izoh fayli")
+    feedback_file = models.FileField(upload_to='homework_feedback/', storage=cas_storage, null=True, blank=True, verbose_name="Izoh fayli")
+    feedback_original_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Izoh faylining asl nomi")
     graded_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='graded_homeworks')
     graded_at = models.DateTimeField(null=True, blank=True)
     coin_awarded = models.BooleanField(default=False)
     is_late = models.BooleanField(default=False, verbose_name="Kech topshirilgan")
     revision_count = models.IntegerField(default=0, verbose_name="Qayta topshirish soni")
     version = models.IntegerField(default=1, verbose_name="Versiya")
+    claimed_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='claimed_submissions', verbose_name="Tekshiruvchi")
+    claim_expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Band qilish muddati")
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['status', 'claim_expires_at'], name='submission_queue_idx'),
+            models.Index(fields=['claimed_by', 'claim_expires_at'], name='submission_claims_idx'),
+            # Keyset sahifalash: (submitted_at, id) bo'yicha ro'yxatlar
+            models.Index(fields=['-submitted_at', '-id'], name='submission_list_idx'),
+            models.Index(fields=['status', '-submitted_at', '-id'], name='submission_status_list_idx'),
+            models.Index(fields=['student', '-submitted_at', '-id'], name='submission_student_list_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - {self.homework.lesson.title}"
@@ -380,6 +396,46 @@ class HomeworkSubmission(models.Model):
     @property
     def unread_messages_count(self):
         return self.messages.filter(is_read=False).exclude(sender=self.student).count()
+
+    @property
+    def is_claimed(self):
+        """Vazifa hozir biror o'qituvchiga band qilinganmi (muddati o'tmagan)"""
+        return bool(self.claimed_by_id and self.claim_expires_at and self.claim_expires_at > timezone.now())
+
+    @property
+    def display_name(self):
+        return file_display_name(self.file, self.original_name)
+
+    @property
+    def feedback_display_name(self):
+        return file_display_name(self.feedback_file, self.feedback_original_name)
+
+    def resubmit(self, new_file, note='', original_name=''):
+        """
+        Yangi versiyani topshirish: eski fayl HomeworkRevision sifatida saqlanadi.
+        new_file - yuklangan fayl yoki storage ichidagi tayyor fayl nomi
+        (bu holda asl nomi original_name da beriladi).
+        """
+        HomeworkRevision.objects.create(
+            submission=self,
+            file=self.file,
+            original_name=self.original_name,
+            note=f"Versiya {self.version}"
+        )
+        
+        self.file = new_file
+        self.original_name = original_name
+        self.version += 1
+        self.revision_count += 1
+        self.status = 'pending'
+        self.submitted_at = timezone.now()
+        self.save()
+        
+        HomeworkMessage.objects.create(
+            submission=self,
+            sender=self.student,
+            message=f"📎 Yangi versiya yuklandi (v{self.version}). {note}"
+        )
     
     def calculate_final_grade(self):
         if self.grade and self.is_late and self.homework.late_penalty:
@@ -392,20 +448,30 @@ class HomeworkMessage(models.Model):
     submission = models.ForeignKey(HomeworkSubmission, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='homework_messages')
     message = models.TextField(verbose_name="Xabar")
-    file = models.FileField(upload_to='homework_chat/', null=True, blank=True, verbose_name="Fayl")
+    file = models.FileField(upload_to='homework_chat/', storage=cas_storage, null=True, blank=True, verbose_name="Fayl")
+    original_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Asl fayl nomi")
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Ro'yxatlardagi o'qilmagan xabarlar soni
+            models.Index(fields=['submission', 'is_read'], name='hw_message_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.full_name}: {self.message[:30]}"
 
+    @property
+    def display_name(self):
+        return file_display_name(self.file, self.original_name)
+
 
 class HomeworkRevision(models.Model):
     submission = models.ForeignKey(HomeworkSubmission, on_delete=models.CASCADE, related_name='revisions')
-    file = models.FileField(upload_to='homework_revisions/')
+    file = models.FileField(upload_to='homework_revisions/', storage=cas_storage)
+    original_name = models.CharField(max_length=255, blank=True, default='', verbose_name="Asl fayl nomi")
     submitted_at = models.DateTimeField(auto_now_add=True)
     note = models.TextField(blank=True, null=True, verbose_name="Izoh")
     
@@ -415,6 +481,141 @@ class HomeworkRevision(models.Model):
     def __str__(self):
         return f"Revision {self.pk} - {self.submission}"
 
+    @property
+    def display_name(self):
+        return file_display_name(self.file, self.original_name)
+
+
+class FilePreview(models.Model):
+    """Fayl preview'i (kichik rasm yoki matn parchasi), asl fayl nomi bo'yicha"""
+    KIND_CHOICES = (
+        ('image', 'Rasm'),
+        ('text', 'Matn'),
+        ('none', "Preview yo'q"),
+    )
+    
+    source = models.CharField(max_length=255, unique=True, verbose_name="Asl fayl")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    preview = models.CharField(max_length=255, blank=True, verbose_name="Preview fayl")
+    width = models.IntegerField(default=0)
+    height = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Fayl preview"
+        verbose_name_plural = "Fayl preview'lari"
+    
+    def __str__(self):
+        return f"{self.source} ({self.kind})"
+
+
+class SubmissionFingerprint(models.Model):
+    """Vazifa faylining MinHash imzosi (ko'chirmachilikni aniqlash uchun)"""
+    submission = models.OneToOneField(HomeworkSubmission, on_delete=models.CASCADE, related_name='fingerprint')
+    homework = models.ForeignKey(Homework, on_delete=models.CASCADE, related_name='fingerprints')
+    file_name = models.CharField(max_length=255, verbose_name="Indekslangan fayl")
+    signature = models.BinaryField(null=True, blank=True)
+    token_count = models.IntegerField(default=0, verbose_name="So'zlar soni")
+    indexed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Vazifa imzosi"
+        verbose_name_plural = "Vazifa imzolari"
+    
+    def __str__(self):
+        return f"Fingerprint #{self.submission_id}"
+
+
+class SubmissionLSHBucket(models.Model):
+    """LSH indeksi: bir xil (band, bucket) dagi vazifalar - o'xshashlikka nomzod"""
+    fingerprint = models.ForeignKey(SubmissionFingerprint, on_delete=models.CASCADE, related_name='buckets')
+    homework = models.ForeignKey(Homework, on_delete=models.CASCADE, related_name='+')
+    band = models.SmallIntegerField()
+    bucket = models.BigIntegerField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['homework', 'band', 'bucket'], name='lsh_bucket_idx'),
+        ]
+
+
+class SimilarSubmissionPair(models.Model):
+    """O'xshash (ehtimol ko'chirilgan) vazifalar jufti, first_id < second_id"""
+    homework = models.ForeignKey(Homework, on_delete=models.CASCADE, related_name='similar_pairs')
+    first = models.ForeignKey(HomeworkSubmission, on_delete=models.CASCADE, related_name='+')
+    second = models.ForeignKey(HomeworkSubmission, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(verbose_name="O'xshashlik")
+    detected_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-score']
+        unique_together = ('first', 'second')
+        verbose_name = "O'xshash vazifalar"
+        verbose_name_plural = "O'xshash vazifalar"
+    
+    def __str__(self):
+        return f"#{self.first_id} ~ #{self.second_id} ({self.score:.0%})"
+
+
+class ChunkedUpload(models.Model):
+    """Bo'laklab (chunk) yuklanayotgan vazifa fayli - uzilsa davom ettirish mumkin"""
+    STATUS_CHOICES = (
+        ('uploading', 'Yuklanmoqda'),
+        ('complete', 'Yakunlangan'),
+    )
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='chunked_uploads')
+    homework = models.ForeignKey(Homework, on_delete=models.CASCADE, null=True, blank=True, related_name='chunked_uploads')
+    submission = models.ForeignKey(HomeworkSubmission, on_delete=models.CASCADE, null=True, blank=True, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255, verbose_name="Fayl nomi")
+    total_size = models.BigIntegerField(verbose_name="Hajmi (bayt)")
+    chunk_size = models.IntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    note = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Bo'laklab yuklash"
+        verbose_name_plural = "Bo'laklab yuklashlar"
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.filename}"
+    
+    @property
+    def next_chunk(self):
+        return self.received_bytes // self.chunk_size
+    
+    @property
+    def is_complete(self):
+        return self.received_bytes >= self.total_size
+    
+    def get_part_path(self):
+        import os
+        from django.conf import settings
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f'{self.pk}.part')
+
+
+class StoredBlob(models.Model):
+    """Kontent bo'yicha saqlangan fayl (cas/ab/cd/<sha256>) va unga havolalar soni"""
+    name = models.CharField(max_length=255, unique=True, verbose_name="Storage nomi")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(verbose_name="Hajmi (bayt)")
+    ref_count = models.IntegerField(default=0, verbose_name="Havolalar soni")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Saqlangan fayl (blob)"
+        verbose_name_plural = "Saqlangan fayllar (blob)"
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
 
 class Test(models.Model):
     TEST_TYPES = (
@@ -508,6 +709,7 @@ class Message(models.Model):
         ('reminder', 'Eslatma'),
         ('recommendation', 'Tavsiya'),
         ('security', 'Xavfsizlik'),
+        ('digest', 'Jamlanma'),
     )
     
     title = models.CharField(max_length=200, verbose_name="Sarlavha")
@@ -522,6 +724,59 @@ class Message(models.Model):
         ordering = ['-created_at']
         verbose_name = "Xabar"
         verbose_name_plural = "Xabarlar"
+        indexes = [
+            # Keyset pagination: (created_at, id) bo'yicha
+            models.Index(fields=['recipient', '-created_at', '-id'], name='message_inbox_idx'),
+            models.Index(fields=['recipient', 'message_type', '-created_at', '-id'], name='message_inbox_type_idx'),
+            models.Index(fields=['-created_at', '-id'], name='message_timeline_idx'),
+        ]
+    
+    def __str__(self):
+        return self.title
+
+
+class PendingNotification(models.Model):
+    """Jamlanmaga (digest) kutayotgan past ustuvorlikdagi bildirishnoma"""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='pending_notifications')
+    title = models.CharField(max_length=200, verbose_name="Sarlavha")
+    content = models.TextField(verbose_name="Xabar matni")
+    message_type = models.CharField(max_length=20, choices=Message.MESSAGE_TYPES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    digest = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='digest_items')
+    delivered_at = models.DateTimeField(null=True, blank=True, verbose_name="Yetkazilgan vaqt")
+    
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Kutilayotgan bildirishnoma"
+        verbose_name_plural = "Kutilayotgan bildirishnomalar"
+        indexes = [
+            models.Index(fields=['delivered_at', 'user'], name='pending_notification_queue_idx'),
+            models.Index(fields=['user', 'message_type', '-created_at'], name='pending_notification_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.title}"
+
+
+class ArchivedMessage(models.Model):
+    """Saqlash muddati o'tgan xabarlar arxivi (archive_messages buyrug'i)"""
+    original_id = models.BigIntegerField(unique=True, verbose_name="Asl ID")
+    title = models.CharField(max_length=200, verbose_name="Sarlavha")
+    content = models.TextField(verbose_name="Xabar matni")
+    message_type = models.CharField(max_length=20, choices=Message.MESSAGE_TYPES)
+    recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='archived_messages')
+    sender = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    is_read = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Arxivlangan xabar"
+        verbose_name_plural = "Arxivlangan xabarlar"
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='archived_message_inbox_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -627,11 +882,15 @@ class HTMLDeploy(models.Model):
     title = models.CharField(max_length=200, verbose_name="Loyiha nomi")
     deploy_type = models.CharField(max_length=20, choices=DEPLOY_TYPES, default='html', verbose_name="Turi")
     folder_name = models.CharField(max_length=100, verbose_name="Papka nomi", default='project')
-    entry_file = models.CharField(max_length=100, default='index.html', verbose_name="Asosiy fayl")
+    entry_file = models.CharField(max_length=255, default='index.html', verbose_name="Asosiy fayl")
+    # Eski deploylar uchun; yangi sahifalar diskda (deploys/<username>/<papka>/<entry_file>)
     html_content = models.TextField(blank=True, null=True, verbose_name="HTML kodi")
     description = models.TextField(blank=True, null=True, verbose_name="Tavsif")
     is_active = models.BooleanField(default=True, verbose_name="Faol")
     views_count = models.IntegerField(default=0, verbose_name="Ko'rishlar soni")
+    # Matnli fayllar hajmi va ularning siqilgan (gzip) nusxalari hajmi
+    assets_size = models.BigIntegerField(default=0, verbose_name="Matnli fayllar hajmi")
+    compressed_size = models.BigIntegerField(default=0, verbose_name="Siqilgan hajm")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -654,9 +913,88 @@ class HTMLDeploy(models.Model):
         from django.conf import settings
         return os.path.join(settings.MEDIA_ROOT, 'deploys', self.user.username, self.folder_name)
     
+    def read_html(self):
+        """Bitta sahifali deploy kodi - diskdan (eski deploylar uchun bazadagi nusxa)"""
+        import os
+        try:
+            with open(os.path.join(self.get_folder_path(), self.entry_file), encoding='utf-8', errors='ignore') as f:
+                return f.read()
+        except OSError:
+            return self.html_content or ''
+    
     @property
     def full_url(self):
         return self.get_url()
+    
+    @property
+    def compression_saved(self):
+        return max(self.assets_size - self.compressed_size, 0)
+    
+    @property
+    def compression_percent(self):
+        return round(self.compression_saved * 100 / self.assets_size) if self.assets_size else 0
+
+
+class DeployTraffic(models.Model):
+    """Deploy trafigi - kunlik yig'indi (accounts.deploy_counters yozadi)"""
+    deploy = models.ForeignKey(HTMLDeploy, on_delete=models.CASCADE, related_name='traffic')
+    date = models.DateField(verbose_name="Sana")
+    views = models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar")
+    hits = models.PositiveIntegerField(default=0, verbose_name="So'rovlar")
+    bytes_sent = models.BigIntegerField(default=0, verbose_name="Yuborilgan hajm")
+    
+    class Meta:
+        unique_together = ['deploy', 'date']
+        indexes = [
+            models.Index(fields=['date'], name='deploy_traffic_date_idx'),
+        ]
+        verbose_name = "Deploy trafigi"
+        verbose_name_plural = "Deploy trafigi"
+    
+    def __str__(self):
+        return f"{self.deploy} - {self.date}: {self.hits}"
+
+
+class DeployManifest(models.Model):
+    """ZIP loyihadan ochilgan fayllar va hajmlari (accounts.deploy_extract yozadi)"""
+    deploy = models.OneToOneField(HTMLDeploy, on_delete=models.CASCADE, related_name='manifest')
+    files = models.JSONField(default=dict, verbose_name="Fayllar")
+    file_count = models.PositiveIntegerField(default=0, verbose_name="Fayllar soni")
+    total_size = models.BigIntegerField(default=0, verbose_name="Umumiy hajm")
+    # Diskdagi hajm: ochilgan fayllar + .gz/.br nusxalar (xotira hisobi shu bilan yuritiladi)
+    disk_size = models.BigIntegerField(default=0, verbose_name="Diskdagi hajm")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Deploy manifesti"
+        verbose_name_plural = "Deploy manifestlari"
+    
+    def __str__(self):
+        return f"{self.deploy}: {self.file_count} ta fayl"
+
+
+class StorageUsage(models.Model):
+    """Foydalanuvchi egallagan joy - kategoriya bo'yicha (accounts.storage_usage yozadi)"""
+    CATEGORIES = (
+        ('deploys', 'Deploylar'),
+        ('homework_submissions', 'Vazifa fayllari'),
+        ('homework_chat', 'Vazifa chati'),
+        ('chat_images', 'AI chat rasmlari'),
+        ('documents', 'Hujjatlar'),
+    )
+    
+    user = models.ForeignKey('CustomUser', on_delete=models.CASCADE, related_name='storage_usage')
+    category = models.CharField(max_length=30, choices=CATEGORIES, verbose_name="Kategoriya")
+    bytes = models.BigIntegerField(default=0, verbose_name="Hajm (bayt)")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'category']
+        verbose_name = "Xotira hisobi"
+        verbose_name_plural = "Xotira hisobi"
+    
+    def __str__(self):
+        return f"{self.user} - {self.category}: {self.bytes}"
 
 
 class Discount(models.Model):
@@ -729,6 +1067,9 @@ class SystemReport(models.Model):
     total_deploys = models.IntegerField(default=0)
     new_deploys = models.IntegerField(default=0, verbose_name="Yangi loyihalar")
     deploy_views = models.IntegerField(default=0)
+    deploy_period_views = models.IntegerField(default=0, verbose_name="Davrdagi ko'rishlar")
+    deploy_hits = models.IntegerField(default=0, verbose_name="Davrdagi so'rovlar")
+    deploy_bytes = models.BigIntegerField(default=0, verbose_name="Davrdagi trafik")
     
     total_coins = models.IntegerField(default=0)
     coins_earned = models.IntegerField(default=0, verbose_name="Ishlangan coinlar")
@@ -2,17 +2,33 @@
 Avtomatik xabar yuborish tizimi
 Rag'batlantiruvchi va ogohlantiruvchi xabarlar
 """
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Avg, Count, Sum
 from .models import (
     Message, CustomUser, CourseEnrollment, Lesson, VideoProgress,
-    TestResult, HomeworkSubmission, Homework, Test, VideoLesson
+    TestResult, HomeworkSubmission, Homework, Test, VideoLesson,
+    PendingNotification
 )
 
 
+def is_digest_type(message_type):
+    """Past ustuvorlikdagi tur - jamlanmaga yig'iladi"""
+    return message_type in getattr(settings, 'NOTIFICATION_DIGEST_TYPES', ())
+
+
 def send_notification(user, title, content, message_type='motivation'):
-    """Xabar yuborish"""
+    """Xabar yuborish (past ustuvorlikdagilar jamlanmaga navbatga qo'yiladi)"""
+    if is_digest_type(message_type):
+        PendingNotification.objects.create(
+            user=user,
+            title=title,
+            content=content,
+            message_type=message_type
+        )
+        return
+
     Message.objects.create(
         recipient=user,
         sender=None,
@@ -22,6 +38,20 @@ def send_notification(user, title, content, message_type='motivation'):
     )
 
 
+def notification_exists(user, message_type, since=None, **lookups):
+    """
+    Bildirishnoma allaqachon yuborilganmi yoki navbatdami.
+    Jamlanmaga yig'ilganlar ham hisobga olinadi (asl sarlavhasi bilan).
+    """
+    filters = dict(lookups, message_type=message_type)
+    if since is not None:
+        filters['created_at__gte'] = since
+
+    if Message.objects.filter(recipient=user, **filters).exists():
+        return True
+    return PendingNotification.objects.filter(user=user, **filters).exists()
+
+
 def check_first_lesson_completed(user, lesson):
     """Birinchi darsni tugatganini tekshirish"""
     # Faqat birinchi marta video ko'rganda
@@ -84,11 +114,16 @@ def check_course_progress_milestones(user, profession):
     
     progress = (completed / total_items) * 100
     
-    # Avvalgi xabarlar yuborilganmi tekshirish
-    existing_titles = Message.objects.filter(
+    # Avvalgi xabarlar yuborilganmi tekshirish (jamlanmadagilar ham)
+    existing_titles = list(Message.objects.filter(
         recipient=user,
         message_type='motivation',
         title__icontains=profession.name
+    ).values_list('title', flat=True))
+    existing_titles += PendingNotification.objects.filter(
+        user=user,
+        message_type='motivation',
+        title__icontains=profession.name
     ).values_list('title', flat=True)
     
     if progress >= 75 and "75%" not in str(existing_titles):
@@ -144,24 +179,29 @@ def check_test_difficulty(user, test_result):
         )
 
 
+def homework_reminder_title(homework):
+    """Eslatma sarlavhasi - takrorlanishni tekshirish uchun dars nomi bilan"""
+    return f"⏰ '{homework.lesson.title[:150]}' vazifasi muddati yaqinlashmoqda!"
+
+
 def check_homework_reminder(user, homework):
     """Uyga vazifa eslatmasi"""
     # Vazifa topshirilmagan va deadline yaqin
-    if homework.deadline:
-        days_left = (homework.deadline - timezone.now().date()).days
+    if homework.due_date:
+        days_left = (homework.due_date.date() - timezone.now().date()).days
         if days_left <= 2 and days_left >= 0:
+            title = homework_reminder_title(homework)
             # Allaqachon eslatma yuborilganmi
-            exists = Message.objects.filter(
-                recipient=user,
-                message_type='reminder',
-                title__icontains=homework.lesson.title,
+            exists = notification_exists(
+                user, 'reminder',
+                title=title,
                 created_at__date=timezone.now().date()
-            ).exists()
+            )
             
             if not exists:
                 send_notification(
                     user,
-                    f"⏰ Uyga vazifa muddati yaqinlashmoqda!",
+                    title,
                     f"'{homework.lesson.title}' darsining uyga vazifasi {days_left} kun ichida tugaydi. Topshirishni unutmang!",
                     'reminder'
                 )
@@ -245,12 +285,11 @@ def check_streak_achievement(user, streak_days):
 def check_leaderboard_achievement(user, rank):
     """Reyting yutugi"""
     if rank <= 10:
-        exists = Message.objects.filter(
-            recipient=user,
-            message_type='achievement',
-            title__icontains="Top-10",
-            created_at__gte=timezone.now() - timedelta(days=7)
-        ).exists()
+        exists = notification_exists(
+            user, 'achievement',
+            since=timezone.now() - timedelta(days=7),
+            title__icontains="Top-10"
+        )
         
         if not exists:
             send_notification(
@@ -261,16 +300,20 @@ def check_leaderboard_achievement(user, rank):
             )
 
 
-def check_homework_graded(user, submission, grade):
-    """Uyga vazifa baholandi"""
-    send_notification(
-        user,
+def homework_graded_message(submission, grade):
+    """Baholash xabari sarlavhasi va matni (bittalik va ommaviy baholashda bir xil)"""
+    return (
         f"📝 Uyga vazifa baholandi!",
         f"'{submission.homework.lesson.title}' darsining vazifasi tekshirildi. Baho: {grade}. Natijani ko'ring!",
-        'system'
     )
 
 
+def check_homework_graded(user, submission, grade):
+    """Uyga vazifa baholandi"""
+    title, content = homework_graded_message(submission, grade)
+    send_notification(user, title, content, 'system')
+
+
 def check_teacher_comment(user, lesson_title, teacher_name):
     """O'qituvchi izoh qoldirdi"""
     send_notification(
@@ -331,12 +374,11 @@ def recommend_similar_courses(user):
         profession_names = ", ".join([p.name for p in other_professions])
         
         # Oxirgi 7 kunda shu xabar yuborilganmi
-        exists = Message.objects.filter(
-            recipient=user,
-            message_type='recommendation',
-            title__icontains="tavsiya",
-            created_at__gte=timezone.now() - timedelta(days=7)
-        ).exists()
+        exists = notification_exists(
+            user, 'recommendation',
+            since=timezone.now() - timedelta(days=7),
+            title__icontains="tavsiya"
+        )
         
         if not exists:
             send_notification(
@@ -383,3 +425,157 @@ def on_homework_graded(user, submission, grade):
     # Kurs progressi
     profession = submission.homework.lesson.profession
     check_course_progress_milestones(user, profession)
+
+
+# ============ Ko'plab bildirishnomalarni bitta batchda yuborish ============
+def send_notifications_bulk(rows):
+    """
+    rows: (user_id, title, content, message_type) ro'yxati.
+    Past ustuvorlikdagilar jamlanma navbatiga, qolganlari to'g'ridan-to'g'ri
+    Message jadvaliga - har biri bitta bulk INSERT bilan.
+    """
+    from django.db import transaction
+
+    pending = []
+    direct = []
+    for user_id, title, content, message_type in rows:
+        if is_digest_type(message_type):
+            pending.append(PendingNotification(
+                user_id=user_id, title=title, content=content, message_type=message_type
+            ))
+        else:
+            direct.append(Message(
+                recipient_id=user_id, title=title, content=content, message_type=message_type
+            ))
+
+    with transaction.atomic():
+        PendingNotification.objects.bulk_create(pending, batch_size=500)
+        created = Message.objects.bulk_create(direct, batch_size=500)
+
+        # bulk_create post_save chaqirmaydi - real-time kanalga o'zimiz yuboramiz
+        def publish():
+            from .realtime import publish_message
+            for message in created:
+                publish_message(message)
+        transaction.on_commit(publish)
+
+    return len(pending) + len(created)
+
+
+# ============ Batch (set-based) qoidalar - run_notification_rules ============
+def batch_inactivity(now):
+    """3+ kun faol bo'lmagan barcha o'quvchilar - bitta so'rov"""
+    already_warned = Message.objects.filter(
+        message_type='warning',
+        title__icontains="faollik yo'q",
+        created_at__date=now.date(),
+        recipient__isnull=False,
+    ).values('recipient_id')
+
+    users = CustomUser.objects.filter(
+        role='student',
+        is_blocked=False,
+        last_activity__lte=now - timedelta(days=3),
+    ).exclude(pk__in=already_warned).values_list('pk', 'last_activity')
+
+    rows = []
+    for user_id, last_activity in users:
+        days_inactive = (now - last_activity).days
+        rows.append((
+            user_id,
+            f"🙂 {days_inactive} kundan beri faollik yo'q",
+            f"Siz {days_inactive} kundan beri platformada faol emassiz. O'rganishni davom ettiraylikmi? Sizni kutib qolyapmiz!",
+            'warning',
+        ))
+    return rows
+
+
+def batch_progress_decrease(now):
+    """Oldingi haftaga nisbatan sekinlashganlar - (user, kurs) bo'yicha guruhlangan so'rov"""
+    from django.db.models import Q
+    from .models import Profession
+
+    week_ago = now - timedelta(days=7)
+    two_weeks_ago = now - timedelta(days=14)
+
+    activity = VideoProgress.objects.filter(
+        watched_at__gte=two_weeks_ago,
+        user__role='student',
+    ).values('user_id', 'video__lesson__profession_id').annotate(
+        recent=Count('id', filter=Q(watched_at__gte=week_ago)),
+        previous=Count('id', filter=Q(watched_at__lt=week_ago)),
+    ).filter(previous__gt=3, recent=0)
+
+    already_warned = set(Message.objects.filter(
+        message_type='warning',
+        title__icontains="sekinlash",
+        created_at__gte=week_ago,
+        recipient__isnull=False,
+    ).values_list('recipient_id', flat=True))
+
+    activity = list(activity)
+    names = dict(Profession.objects.filter(
+        pk__in={row['video__lesson__profession_id'] for row in activity}
+    ).values_list('pk', 'name'))
+
+    rows = []
+    for row in activity:
+        user_id = row['user_id']
+        # Har bir o'quvchiga haftasiga bittadan
+        if user_id in already_warned:
+            continue
+        already_warned.add(user_id)
+        rows.append((
+            user_id,
+            f"📉 {names.get(row['video__lesson__profession_id'], '')} kursida sekinlashdingiz",
+            f"Avval yaxshi edingiz, hozir sekinlashdingiz. Yordam kerakmi? O'qituvchiga murojaat qilishingiz mumkin.",
+            'warning',
+        ))
+    return rows
+
+
+def batch_homework_deadlines(now):
+    """Keyingi 24 soatda muddati tugaydigan, hali topshirilmagan vazifalar"""
+    homeworks = list(Homework.objects.filter(
+        due_date__gt=now,
+        due_date__lte=now + timedelta(hours=24),
+    ).select_related('lesson'))
+    if not homeworks:
+        return []
+
+    enrolled = CourseEnrollment.objects.filter(
+        profession_id__in={hw.lesson.profession_id for hw in homeworks},
+        user__role='student',
+        user__is_blocked=False,
+    ).values_list('profession_id', 'user_id')
+    students_by_profession = {}
+    for profession_id, user_id in enrolled:
+        students_by_profession.setdefault(profession_id, []).append(user_id)
+
+    submitted = set(HomeworkSubmission.objects.filter(
+        homework__in=homeworks
+    ).values_list('homework_id', 'student_id'))
+
+    # Bugun yuborilgan eslatmalar (jamlanma navbatidagilar ham)
+    today = now.date()
+    already_sent = set(Message.objects.filter(
+        message_type='reminder', created_at__date=today, recipient__isnull=False
+    ).values_list('recipient_id', 'title'))
+    already_sent |= set(PendingNotification.objects.filter(
+        message_type='reminder', created_at__date=today
+    ).values_list('user_id', 'title'))
+
+    rows = []
+    for homework in homeworks:
+        title = homework_reminder_title(homework)
+        hours_left = max(1, int((homework.due_date - now).total_seconds() // 3600))
+        for user_id in students_by_profession.get(homework.lesson.profession_id, []):
+            if (homework.pk, user_id) in submitted or (user_id, title) in already_sent:
+                continue
+            rows.append((
+                user_id,
+                title,
+                f"'{homework.lesson.title}' darsining uyga vazifasi {hours_left} soat ichida tugaydi. Topshirishni unutmang!",
+                'reminder',
+            ))
+    return rows
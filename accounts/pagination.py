@@ -0,0 +1,88 @@
+"""
+Keyset (cursor) pagination
+OFFSET o'rniga (vaqt, id) juftligi bo'yicha sahifalash -
+tarix qanchalik chuqur bo'lmasin, sahifa narxi bir xil qoladi
+"""
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(value, pk):
+    """(vaqt, id) juftligini URL uchun xavfsiz satrga aylantirish"""
+    raw = f"{value.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Cursor satrini (vaqt, id) juftligiga qaytarish. Noto'g'ri bo'lsa - None"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.rsplit('|', 1)
+        value = parse_datetime(value)
+        if value is None:
+            return None
+        return value, int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def _keyset_filter(queryset, decoded, field):
+    """Cursordan keyingi yozuvlar. Birinchi shart (<=) indeksni cursor joyidan boshlaydi"""
+    value, pk = decoded
+    return queryset.filter(
+        Q(**{f'{field}__lte': value}),
+        Q(**{f'{field}__lt': value}) | Q(id__lt=pk),
+    )
+
+
+def _next_cursor(items, has_more, field):
+    if has_more and items:
+        last = items[-1]
+        return encode_cursor(getattr(last, field), last.pk)
+    return None
+
+
+def keyset_page(queryset, cursor=None, limit=20, field='created_at'):
+    """
+    Eng yangilaridan boshlab bitta sahifa qaytarish.
+    Natija: (obyektlar ro'yxati, keyingi sahifa cursori yoki None)
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+
+    decoded = decode_cursor(cursor)
+    if decoded:
+        queryset = _keyset_filter(queryset, decoded, field)
+
+    # Bitta ortiqcha yozuv - keyingi sahifa borligini bilish uchun
+    items = list(queryset[:limit + 1])
+    has_more = len(items) > limit
+    items = items[:limit]
+    return items, _next_cursor(items, has_more, field)
+
+
+def keyset_page_merged(querysets, cursor=None, limit=20, field='created_at'):
+    """
+    Bir nechta so'rovdan bitta umumiy sahifa.
+    OR bilan birlashtirilgan so'rovni ma'lumotlar bazasi indeks tartibida
+    o'qiy olmaydi va barcha mos yozuvlarni saralaydi. Shuning uchun har bir
+    so'rov o'z indeksi bo'yicha alohida (bir xil cursor va limit bilan)
+    o'qiladi, natijalar Python'da birlashtiriladi.
+    """
+    decoded = decode_cursor(cursor)
+    items = []
+    for queryset in querysets:
+        queryset = queryset.order_by(f'-{field}', '-id')
+        if decoded:
+            queryset = _keyset_filter(queryset, decoded, field)
+        items.extend(queryset[:limit + 1])
+
+    items.sort(key=lambda obj: (getattr(obj, field), obj.pk), reverse=True)
+    has_more = len(items) > limit
+    items = items[:limit]
+    return items, _next_cursor(items, has_more, field)
@@ -0,0 +1,215 @@
+"""
+Vazifa va chat fayllari uchun preview (kichik rasm yoki matn parchasi)
+Fayl yuklangach preview fonda, alohida jarayonlar pulida yaratiladi va
+asl faylning yoniga <nom>.preview.jpg / <nom>.preview.txt sifatida yoziladi.
+Baholash sahifasi faqat preview'larni yuklaydi, asl fayl - so'ralganda.
+
+render_preview() Django'ga bog'liq emas - jarayonlar pulida ishlaydi.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from .similarity import SKIP_DIRS, _is_text_name
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = 640
+JPEG_QUALITY = 70
+SNIPPET_LINES = 40
+SNIPPET_BYTES = 8 * 1024
+TREE_ENTRIES = 30
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'}
+
+
+# ==================== RENDER (jarayonlar pulida) ====================
+def render_preview(src_path, size=PREVIEW_SIZE):
+    """
+    Preview yaratish. Natija: {'kind': 'image'|'text'|'none', 'path', 'width', 'height'}.
+    path - asl fayl yonidagi preview fayl.
+    """
+    ext = os.path.splitext(src_path)[1].lower()
+    try:
+        if ext in IMAGE_EXTENSIONS:
+            return _render_image(src_path, size)
+        if ext == '.pdf':
+            return _render_pdf(src_path, size)
+        if zipfile.is_zipfile(src_path) or _is_text_name(src_path):
+            return _render_text(src_path)
+    except Exception as e:
+        logger.warning("Preview: %s yaratilmadi: %s", src_path, e)
+    return {'kind': 'none'}
+
+
+def _render_image(src_path, size):
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as img:
+        # JPEG uchun dekoderning o'zida kichraytirish - to'liq rasm xotiraga olinmaydi
+        img.draft('RGB', (size, size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size))
+        if img.mode not in ('RGB', 'L'):
+            background = Image.new('RGB', img.size, 'white')
+            background.paste(img.convert('RGBA'), mask=img.convert('RGBA').getchannel('A'))
+            img = background
+        path = src_path + '.preview.jpg'
+        img.save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+        return {'kind': 'image', 'path': path, 'width': img.width, 'height': img.height}
+
+
+def _render_pdf(src_path, size):
+    """Birinchi sahifa - PyMuPDF o'rnatilgan bo'lsa; aks holda preview yo'q"""
+    try:
+        import fitz
+    except ImportError:
+        return {'kind': 'none'}
+
+    from PIL import Image
+
+    with fitz.open(src_path) as document:
+        if not document.page_count:
+            return {'kind': 'none'}
+        page = document.load_page(0)
+        zoom = size / max(page.rect.width, page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        img = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+    path = src_path + '.preview.jpg'
+    img.save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return {'kind': 'image', 'path': path, 'width': img.width, 'height': img.height}
+
+
+def _render_text(src_path):
+    """Kod/matn: arxiv bo'lsa fayllar ro'yxati + asosiy faylning boshi"""
+    lines = []
+    if zipfile.is_zipfile(src_path):
+        with zipfile.ZipFile(src_path) as archive:
+            names = [
+                info.filename for info in archive.infolist()
+                if not info.is_dir() and not any(skip in info.filename for skip in SKIP_DIRS)
+            ]
+            lines.append(f"📦 {len(names)} ta fayl")
+            lines.extend(f"  {name}" for name in names[:TREE_ENTRIES])
+            if len(names) > TREE_ENTRIES:
+                lines.append(f"  ... yana {len(names) - TREE_ENTRIES} ta")
+
+            main = _pick_main_file([name for name in names if _is_text_name(name)])
+            if main:
+                with archive.open(main) as member:
+                    head = member.read(SNIPPET_BYTES).decode('utf-8', errors='replace')
+                lines.append('')
+                lines.append(f"── {main} ──")
+                lines.extend(head.splitlines()[:SNIPPET_LINES])
+    else:
+        with open(src_path, 'rb') as f:
+            head = f.read(SNIPPET_BYTES).decode('utf-8', errors='replace')
+        lines.extend(head.splitlines()[:SNIPPET_LINES])
+
+    if not lines:
+        return {'kind': 'none'}
+    path = src_path + '.preview.txt'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines)[:SNIPPET_BYTES])
+    return {'kind': 'text', 'path': path, 'width': 0, 'height': 0}
+
+
+def _pick_main_file(names):
+    preferred = ('readme', 'index', 'main', 'app')
+    for prefix in preferred:
+        for name in sorted(names, key=lambda n: (n.count('/'), n)):
+            if os.path.basename(name).lower().startswith(prefix):
+                return name
+    return min(names, key=lambda n: (n.count('/'), n)) if names else None
+
+
+# ==================== DJANGO TOMONI ====================
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Jarayonlar puli (spawn - ko'p oqimli web-server ichida fork xavfsiz emas).
+    Birinchi preview so'ralganda yaratiladi.
+    """
+    global _pool
+    from django.conf import settings
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'PREVIEW_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def store_result(source, storage, result):
+    """render_preview natijasini FilePreview yozuviga aylantirish"""
+    from .models import FilePreview
+
+    preview_name = ''
+    if result.get('path'):
+        preview_name = os.path.relpath(result['path'], storage.location).replace(os.sep, '/')
+    preview, _ = FilePreview.objects.update_or_create(
+        source=source,
+        defaults={
+            'kind': result['kind'],
+            'preview': preview_name,
+            'width': result.get('width', 0),
+            'height': result.get('height', 0),
+        },
+    )
+    return preview
+
+
+def schedule_preview(fieldfile):
+    """Fayl uchun preview'ni fonda yaratish (allaqachon bo'lsa - hech narsa)"""
+    from .models import FilePreview
+
+    if not fieldfile or FilePreview.objects.filter(source=fieldfile.name).exists():
+        return
+    storage = fieldfile.storage
+    source = fieldfile.name
+    try:
+        path = storage.path(source)
+    except NotImplementedError:
+        return
+
+    future = get_pool().submit(render_preview, path, _preview_size())
+
+    def done(future):
+        from django.db import close_old_connections
+        try:
+            store_result(source, storage, future.result())
+        except Exception:
+            logger.exception("Preview: %s saqlanmadi", source)
+        finally:
+            close_old_connections()
+
+    future.add_done_callback(done)
+
+
+def ensure_preview(fieldfile):
+    """Lazy: preview hali tayyor bo'lmasa - shu so'rov ichida yaratish"""
+    from .models import FilePreview
+
+    preview = FilePreview.objects.filter(source=fieldfile.name).first()
+    if preview is not None:
+        return preview
+    try:
+        path = fieldfile.storage.path(fieldfile.name)
+    except NotImplementedError:
+        return None
+    if not os.path.exists(path):
+        return None
+    return store_result(fieldfile.name, fieldfile.storage, render_preview(path, _preview_size()))
+
+
+def _preview_size():
+    from django.conf import settings
+    return getattr(settings, 'PREVIEW_MAX_SIZE', PREVIEW_SIZE)
@@ -0,0 +1,206 @@
+"""
+Real-time yetkazish (Server-Sent Events)
+Yangi xabarlar, o'qilmaganlar soni va vazifa chati qatorlarini
+ulangan mijozlarga push qilish.
+
+Stream faqat ASGI ostida ishlaydi (config/asgi.py). Development uchun
+jarayon ichidagi broker ishlatiladi; ko'p jarayonli production uchun
+REALTIME_BROKER sozlamasi orqali boshqa broker ulanadi (subscribe /
+unsubscribe / publish interfeysi bilan).
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+HEARTBEAT_SECONDS = 15
+STREAM_MAX_SECONDS = 300
+DELTA_LIMIT = 100
+
+
+class Subscription:
+    def __init__(self, channels, loop, maxsize=100):
+        self.channels = tuple(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Sekin mijoz - qayta ulanganda Last-Event-ID orqali yetib oladi
+            pass
+
+
+class InProcessBroker:
+    """Bitta jarayon ichidagi pub/sub (development va bitta ASGI worker uchun)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def subscribe(self, channels):
+        subscription = Subscription(channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def publish(self, channel, event, data, event_id=None):
+        payload = {'event': event, 'data': data, 'id': event_id}
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, payload)
+            except RuntimeError:
+                # Event loop yopilgan - keyingi unsubscribe tozalaydi
+                pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'REALTIME_BROKER', 'accounts.realtime.InProcessBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+# ==================== KANALLAR ====================
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def broadcast_channel(message_type):
+    return f'broadcast:{message_type}'
+
+
+def submission_channel(submission_id):
+    return f'submission:{submission_id}'
+
+
+def inbox_channels(user):
+    """Foydalanuvchi tinglaydigan barcha xabar kanallari"""
+    from .inbox import general_message_types
+    return [user_channel(user.pk)] + [broadcast_channel(t) for t in general_message_types(user)]
+
+
+# ==================== SERIALIZATSIYA ====================
+
+def serialize_message(message):
+    from django.urls import reverse
+    return {
+        'id': message.pk,
+        'title': message.title,
+        'message_type': message.message_type,
+        'is_read': message.is_read,
+        'created_at': message.created_at.isoformat(),
+        'url': reverse('message_detail', args=[message.pk]),
+    }
+
+
+def serialize_chat_message(chat_message):
+    from django.urls import reverse
+    return {
+        'id': chat_message.pk,
+        'submission_id': chat_message.submission_id,
+        'sender_id': chat_message.sender_id,
+        'sender_name': chat_message.sender.first_name,
+        'message': chat_message.message,
+        'file_url': reverse('homework_file_download', args=['chat', chat_message.pk]) if chat_message.file else None,
+        'file_name': chat_message.display_name,
+        'preview_url': reverse('file_preview', args=['chat', chat_message.pk]) if chat_message.file else None,
+        'created_at': chat_message.created_at.isoformat(),
+    }
+
+
+# ==================== PUBLISH ====================
+
+def publish_message(message):
+    if message.recipient_id:
+        channel = user_channel(message.recipient_id)
+    else:
+        channel = broadcast_channel(message.message_type)
+    get_broker().publish(channel, 'message', serialize_message(message), event_id=message.pk)
+
+
+def publish_chat_message(chat_message):
+    get_broker().publish(
+        submission_channel(chat_message.submission_id),
+        'chat',
+        serialize_chat_message(chat_message),
+        event_id=chat_message.pk,
+    )
+
+
+# ==================== STREAM ====================
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, ensure_ascii=False)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(channels, initial=None, after_event=None):
+    """
+    SSE generator: avval `initial` (qayta ulanishda o'tkazib yuborilganlar),
+    keyin broker eventlari. `after_event` - har bir eventdan keyin
+    qo'shimcha eventlar qaytaruvchi async funksiya (masalan, unread soni).
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(channels)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_MAX_SECONDS
+
+    try:
+        yield 'retry: 3000\n\n'
+        for event, data, event_id in (initial or []):
+            yield format_sse(event, data, event_id)
+
+        while loop.time() < deadline:
+            try:
+                payload = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+
+            yield format_sse(payload['event'], payload['data'], payload['id'])
+            if after_event:
+                for event, data in await after_event(payload):
+                    yield format_sse(event, data)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def is_asgi_request(request):
+    from django.core.handlers.asgi import ASGIRequest
+    return isinstance(request, ASGIRequest)
+
+
+def last_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
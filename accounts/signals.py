@@ -0,0 +1,119 @@
+import os
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Message, HomeworkMessage, HomeworkSubmission, HomeworkRevision, HTMLDeploy, DeployManifest
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender, instance, created, **kwargs):
+    """Yangi xabarni ulangan mijozlarga yuborish"""
+    if created:
+        from .realtime import publish_message
+        transaction.on_commit(lambda: publish_message(instance))
+
+
+@receiver(post_save, sender=HomeworkMessage)
+def push_new_chat_message(sender, instance, created, **kwargs):
+    """Vazifa chatidagi yangi qatorni yuborish"""
+    if created:
+        from .realtime import publish_chat_message
+        transaction.on_commit(lambda: publish_chat_message(instance))
+
+
+@receiver(pre_save, sender=HomeworkSubmission)
+@receiver(pre_save, sender=HomeworkMessage)
+@receiver(pre_save, sender=HomeworkRevision)
+def remember_original_names(sender, instance, **kwargs):
+    """Yangi yuklangan faylning asl nomi - blob nomi (hash) uni saqlamaydi"""
+    for file_field, name_field in (('file', 'original_name'), ('feedback_file', 'feedback_original_name')):
+        fieldfile = getattr(instance, file_field, None)
+        # _committed=False - storage ga hali yozilmagan yuklangan fayl
+        if fieldfile and not fieldfile._committed:
+            setattr(instance, name_field, os.path.basename(fieldfile.name)[:255])
+
+
+@receiver(post_delete, sender=HomeworkSubmission)
+@receiver(post_delete, sender=HomeworkMessage)
+@receiver(post_delete, sender=HomeworkRevision)
+def release_homework_files(sender, instance, **kwargs):
+    """O'chirilgan yozuvning bloblariga havolani kamaytirish (fayl gc_blobs da o'chadi)"""
+    from .storage import is_blob_name, release_blob
+    names = [
+        getattr(instance, field.attname).name
+        for field in sender._meta.fields
+        if getattr(field, 'storage', None) is not None and getattr(instance, field.attname)
+    ]
+    for name in names:
+        if is_blob_name(name):
+            transaction.on_commit(lambda name=name: release_blob(name))
+
+
+@receiver(post_save, sender=HomeworkSubmission)
+def index_submission_similarity(sender, instance, created, update_fields=None, **kwargs):
+    """Yangi yoki qayta topshirilgan faylni ko'chirmachilik indeksiga qo'shish (fonda)"""
+    if update_fields is not None and 'file' not in update_fields:
+        return
+    if instance.file:
+        from .similarity import schedule_index
+        transaction.on_commit(lambda: schedule_index(instance.pk))
+
+
+@receiver(post_save, sender=HomeworkSubmission)
+@receiver(post_save, sender=HomeworkMessage)
+@receiver(post_save, sender=HomeworkRevision)
+def schedule_file_previews(sender, instance, created, update_fields=None, **kwargs):
+    """Yangi yuklangan fayllar uchun preview'ni fonda tayyorlash"""
+    if update_fields is not None and not {'file', 'feedback_file'} & set(update_fields):
+        return
+    from .previews import schedule_preview
+    for name in ('file', 'feedback_file'):
+        fieldfile = getattr(instance, name, None)
+        if fieldfile:
+            transaction.on_commit(lambda fieldfile=fieldfile: schedule_preview(fieldfile))
+
+
+@receiver(post_save, sender=HTMLDeploy)
+@receiver(post_delete, sender=HTMLDeploy)
+def invalidate_deploy_route(sender, instance, update_fields=None, **kwargs):
+    """Deploy tahrirlansa, yoqilsa/o'chirilsa yoki o'chirilsa - marshrut keshini tozalash"""
+    if update_fields is not None and set(update_fields) <= {'views_count'}:
+        return
+    from .deploy_cache import invalidate_deploy
+    invalidate_deploy(instance)
+    # Tranzaksiya davomida parallel so'rov eski holatni qayta keshlab qo'ymasligi uchun
+    transaction.on_commit(lambda: invalidate_deploy(instance))
+
+
+def _connect_storage_usage():
+    """Fayl maydonlari bor modellardagi yuklash/almashtirish/o'chirish - xotira hisobiga"""
+    from django.db.models.signals import post_init
+    from .storage_usage import tracked_models, remember_files, track_file_changes, release_file_usage
+
+    def on_init(sender, instance, **kwargs):
+        remember_files(instance)
+
+    def on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+        if not raw:
+            track_file_changes(instance, created, update_fields)
+
+    def on_delete(sender, instance, **kwargs):
+        release_file_usage(instance)
+
+    for label in tracked_models():
+        post_init.connect(on_init, sender=label, weak=False, dispatch_uid=f'storage_init:{label}')
+        post_save.connect(on_save, sender=label, weak=False, dispatch_uid=f'storage_save:{label}')
+        post_delete.connect(on_delete, sender=label, weak=False, dispatch_uid=f'storage_delete:{label}')
+
+
+_connect_storage_usage()
+
+
+@receiver(post_delete, sender=DeployManifest)
+def release_deploy_usage(sender, instance, **kwargs):
+    """Deploy (va uning manifesti) o'chirildi - papka hajmi hisobdan ayriladi"""
+    from .storage_usage import add_usage
+    user_id = HTMLDeploy.objects.filter(pk=instance.deploy_id).values_list('user_id', flat=True).first()
+    add_usage(user_id, 'deploys', -instance.disk_size)
@@ -0,0 +1,307 @@
+"""
+Vazifalar orasida ko'chirmachilikni aniqlash (MinHash + LSH)
+Fayl (zip ichidagilar ham) matniga aylantiriladi, 5 so'zli shingle'lardan
+MinHash imzo hisoblanadi va LSH bandlari bo'yicha bucket'larga yoziladi.
+Faqat bir xil bucket'ga tushgan juftlar solishtiriladi - O(n²) emas.
+
+Hisoblash funksiyalari (extract_text, compute_signature) Django'ga bog'liq emas -
+build_similarity_index ham, yangi topshiriqlarni fonda indekslash ham ularni
+alohida jarayonlarda ishlatadi; web-jarayonda faqat bazaga yoziladi.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import random
+import re
+import threading
+import zipfile
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+MIN_TOKENS = 30
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Imzolar barqaror bo'lishi uchun permutatsiyalar qat'iy seed bilan
+_rng = random.Random(20240601)
+PERMUTATIONS = [(_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+MAX_TEXT_BYTES = 4 * 1024 * 1024
+MAX_MEMBER_BYTES = 1024 * 1024
+MAX_MEMBERS = 2000
+
+TEXT_EXTENSIONS = {
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.vue', '.html', '.htm', '.css', '.scss',
+    '.java', '.kt', '.c', '.h', '.cpp', '.hpp', '.cs', '.go', '.rs', '.php', '.rb',
+    '.swift', '.dart', '.sql', '.sh', '.txt', '.md', '.json', '.xml', '.yml', '.yaml',
+    '.ipynb',
+}
+SKIP_DIRS = ('__MACOSX/', 'node_modules/', '.git/', 'venv/', '.venv/', '__pycache__/', 'dist/', 'build/')
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+# ==================== MATN AJRATISH ====================
+def _is_text_name(name):
+    return os.path.splitext(name)[1].lower() in TEXT_EXTENSIONS
+
+
+def extract_text(path):
+    """Fayldan (yoki zip ichidagi matnli fayllardan) matn - hajmi cheklangan"""
+    if zipfile.is_zipfile(path):
+        parts = []
+        total = 0
+        with zipfile.ZipFile(path) as archive:
+            members = sorted(
+                (info for info in archive.infolist()
+                 if not info.is_dir() and _is_text_name(info.filename)
+                 and not any(skip in info.filename for skip in SKIP_DIRS)),
+                key=lambda info: info.filename,
+            )[:MAX_MEMBERS]
+            for info in members:
+                if total >= MAX_TEXT_BYTES:
+                    break
+                with archive.open(info) as member:
+                    data = member.read(min(MAX_MEMBER_BYTES, MAX_TEXT_BYTES - total))
+                total += len(data)
+                parts.append(data.decode('utf-8', errors='ignore'))
+        return '\n'.join(parts)
+
+    if not _is_text_name(path):
+        return ''
+    with open(path, 'rb') as f:
+        return f.read(MAX_TEXT_BYTES).decode('utf-8', errors='ignore')
+
+
+# ==================== MINHASH ====================
+def shingle_hashes(text):
+    tokens = TOKEN_RE.findall(text.lower())
+    if len(tokens) < MIN_TOKENS:
+        return set(), len(tokens)
+    return {
+        zlib.crc32(' '.join(tokens[i:i + SHINGLE_SIZE]).encode())
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }, len(tokens)
+
+
+def minhash(hashes):
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+
+def compute_signature(path):
+    """
+    (imzo baytlari yoki None, tokenlar soni).
+    Matn juda qisqa yoki binar fayl bo'lsa imzo None.
+    """
+    try:
+        hashes, token_count = shingle_hashes(extract_text(path))
+    except Exception as e:
+        # Buzilgan zip (zlib.error, EOFError), qo'llanmaydigan siqish (NotImplementedError) va h.k. -
+        # bitta o'quvchi fayli butun indekslashni to'xtatmasligi kerak
+        logger.warning("Similarity: %s o'qilmadi: %r", path, e)
+        return None, 0
+    if not hashes:
+        return None, token_count
+    return array('Q', minhash(hashes)).tobytes(), token_count
+
+
+def unpack_signature(data):
+    signature = array('Q')
+    signature.frombytes(bytes(data))
+    return signature
+
+
+def band_keys(signature):
+    """LSH: imzo BANDS ta bo'lakka bo'linadi, har biri 64-bit bucket kaliti"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(chunk.tobytes(), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return keys
+
+
+def estimate_similarity(first, second):
+    """Jaccard o'xshashlik bahosi - mos kelgan MinHash qiymatlari ulushi"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+# ==================== INDEKS (Django) ====================
+def get_threshold():
+    from django.conf import settings
+    return getattr(settings, 'HOMEWORK_SIMILARITY_THRESHOLD', 0.6)
+
+
+def store_fingerprint(submission_id, homework_id, file_name, signature_bytes, token_count):
+    """Imzo va LSH bucket'larini saqlash (eskilari almashtiriladi)"""
+    from .models import SubmissionFingerprint, SubmissionLSHBucket
+
+    fingerprint, _ = SubmissionFingerprint.objects.update_or_create(
+        submission_id=submission_id,
+        defaults={
+            'homework_id': homework_id,
+            'file_name': file_name,
+            'signature': signature_bytes,
+            'token_count': token_count,
+        },
+    )
+    SubmissionLSHBucket.objects.filter(fingerprint=fingerprint).delete()
+    if signature_bytes:
+        SubmissionLSHBucket.objects.bulk_create([
+            SubmissionLSHBucket(fingerprint=fingerprint, homework_id=homework_id, band=band, bucket=key)
+            for band, key in band_keys(unpack_signature(signature_bytes))
+        ])
+    return fingerprint
+
+
+def find_similar(fingerprint):
+    """Bitta topshiriq uchun o'xshashlarini bucket indeksidan topish va juftlarni yangilash"""
+    from django.db.models import Q
+    from .models import SimilarSubmissionPair, SubmissionFingerprint, SubmissionLSHBucket
+
+    submission_id = fingerprint.submission_id
+    SimilarSubmissionPair.objects.filter(Q(first_id=submission_id) | Q(second_id=submission_id)).delete()
+    if not fingerprint.signature:
+        return []
+
+    own_buckets = SubmissionLSHBucket.objects.filter(fingerprint=fingerprint)
+    matches = Q()
+    for band, bucket in own_buckets.values_list('band', 'bucket'):
+        matches |= Q(band=band, bucket=bucket)
+
+    candidate_ids = set(
+        SubmissionLSHBucket.objects.filter(matches, homework_id=fingerprint.homework_id)
+        .exclude(fingerprint=fingerprint)
+        .values_list('fingerprint_id', flat=True)
+    )
+    if not candidate_ids:
+        return []
+
+    signature = unpack_signature(fingerprint.signature)
+    threshold = get_threshold()
+    pairs = []
+    for other_id, other_submission_id, other_signature in SubmissionFingerprint.objects.filter(
+        pk__in=candidate_ids
+    ).values_list('pk', 'submission_id', 'signature'):
+        score = estimate_similarity(signature, unpack_signature(other_signature))
+        if score >= threshold:
+            first, second = sorted((submission_id, other_submission_id))
+            pairs.append(SimilarSubmissionPair(
+                homework_id=fingerprint.homework_id, first_id=first, second_id=second, score=score,
+            ))
+    return SimilarSubmissionPair.objects.bulk_create(pairs, ignore_conflicts=True)
+
+
+def _index_target(submission_id):
+    """(topshiriq, fayl yo'li) - indekslash kerak bo'lsa; fayl o'zgarmagan bo'lsa None"""
+    from .models import HomeworkSubmission, SubmissionFingerprint
+
+    submission = HomeworkSubmission.objects.filter(pk=submission_id).only('id', 'homework_id', 'file').first()
+    if submission is None or not submission.file:
+        return None
+    if SubmissionFingerprint.objects.filter(submission_id=submission_id, file_name=submission.file.name).exists():
+        return None
+    try:
+        return submission, submission.file.path
+    except NotImplementedError:
+        return None
+
+
+def _save_index(submission, file_name, signature_bytes, token_count):
+    from django.db import transaction
+
+    with transaction.atomic():
+        fingerprint = store_fingerprint(
+            submission.pk, submission.homework_id, file_name, signature_bytes, token_count,
+        )
+        return find_similar(fingerprint)
+
+
+def index_submission(submission_id):
+    """Yangi yoki qayta topshirilgan vazifani shu jarayonda indekslash (fayl o'zgarmagan bo'lsa - hech narsa)"""
+    target = _index_target(submission_id)
+    if target is None:
+        return None
+    submission, path = target
+    return _save_index(submission, submission.file.name, *compute_signature(path))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Jarayonlar puli (spawn - ko'p oqimli web-server ichida fork xavfsiz emas).
+    minhash() sof Python - web-jarayonda GIL'ni soniyalab band qiladi.
+    """
+    global _pool
+    from django.conf import settings
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'HOMEWORK_SIMILARITY_WORKERS', 1),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def schedule_index(submission_id):
+    """Imzo jarayonlar pulida hisoblanadi, natija (bazaga yozish) - shu jarayonda"""
+    target = _index_target(submission_id)
+    if target is None:
+        return
+    submission, path = target
+    file_name = submission.file.name
+    try:
+        future = get_pool().submit(compute_signature, path)
+    except Exception:
+        # Pul buzilgan yoki yopilmoqda - build_similarity_index keyinroq indekslaydi
+        logger.exception("Similarity: vazifa #%s navbatga qo'yilmadi", submission_id)
+        return
+
+    def done(future):
+        from django.db import close_old_connections
+        try:
+            _save_index(submission, file_name, *future.result())
+        except Exception:
+            logger.exception("Similarity: vazifa #%s indekslanmadi", submission_id)
+        finally:
+            close_old_connections()
+
+    future.add_done_callback(done)
+
+
+# ==================== OMMAVIY QURISH ====================
+def pairs_from_buckets(rows, signatures, threshold):
+    """
+    rows: (fingerprint_id, band, bucket); signatures: {fingerprint_id: array}.
+    Bir bucket'dagi hujjatlar juftlari nomzod - faqat ular solishtiriladi.
+    """
+    buckets = {}
+    for fingerprint_id, band, bucket in rows:
+        buckets.setdefault((band, bucket), []).append(fingerprint_id)
+
+    candidates = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        members.sort()
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                candidates.add((first, second))
+
+    result = []
+    for first, second in candidates:
+        score = estimate_similarity(signatures[first], signatures[second])
+        if score >= threshold:
+            result.append((first, second, score))
+    return result, len(candidates)
@@ -0,0 +1,122 @@
+"""
+Kontent bo'yicha manzillanadigan storage (content-addressed)
+Fayllar MEDIA_ROOT/cas/ab/cd/<sha256><ext> ko'rinishida bir marta saqlanadi.
+Bir xil fayl qayta yuklansa - yangi nusxa yozilmaydi, faqat havola qo'shiladi.
+Yetim bloblarni gc_blobs buyrug'i tozalaydi.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+CAS_PREFIX = 'cas'
+HASH_BLOCK = 64 * 1024
+
+
+def blob_name(digest, ext=''):
+    return '/'.join([CAS_PREFIX, digest[:2], digest[2:4], f'{digest}{ext}'])
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(CAS_PREFIX + '/')
+
+
+def file_display_name(fieldfile, original_name=''):
+    """
+    Foydalanuvchiga ko'rsatiladigan va yuklab olishda beriladigan nom.
+    Blob nomi (hash) asl nomni saqlamaydi - u modeldagi original_name da turadi.
+    """
+    if original_name:
+        return original_name
+    if not fieldfile:
+        return ''
+    if is_blob_name(fieldfile.name):
+        return 'fayl' + os.path.splitext(fieldfile.name)[1]
+    return os.path.basename(fieldfile.name)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # Nom kontentdan kelib chiqadi - to'qnashuv bo'lmaydi
+        return name
+
+    def _save(self, name, content):
+        ext = os.path.splitext(name)[1].lower()[:16]
+        tmp_dir = os.path.join(self.location, CAS_PREFIX, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(HASH_BLOCK):
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        return self.ingest_path(tmp_path, hasher.hexdigest(), ext, size)
+
+    def ingest_path(self, tmp_path, digest, ext='', size=None):
+        """
+        Diskdagi tayyor faylni blob sifatida qabul qilish (rename, nusxasiz).
+        Avval yozuv qulflanadi (yoki yaratiladi), keyin fayl tekshiriladi: gc_blobs
+        yozuvni o'chirib faylni o'chirayotgan bo'lsa, u tugaguncha kutiladi va
+        yo'qolgan fayl vaqtinchalik fayldan qayta yoziladi. Blob bor bo'lsa -
+        vaqtinchalik fayl o'chiriladi.
+        """
+        from django.db import IntegrityError, transaction
+        from .models import StoredBlob
+
+        name = blob_name(digest, ext)
+        full_path = self.path(name)
+        if size is None:
+            size = os.path.getsize(tmp_path)
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                try:
+                    with transaction.atomic():
+                        StoredBlob.objects.create(name=name, sha256=digest, size=size, ref_count=1)
+                except IntegrityError:
+                    # Parallel yuklash shu blobni hozirgina yaratdi
+                    blob = StoredBlob.objects.select_for_update().get(name=name)
+            if blob is not None:
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.replace(tmp_path, full_path)
+                # rename mtime'ni saqlaydi - gc_blobs kutish muddati yozilgan vaqtdan hisoblansin
+                os.utime(full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        return name
+
+    def delete(self, name):
+        # Blobni boshqa yozuvlar ham ishlatishi mumkin - faqat havolani kamaytirish
+        if is_blob_name(name):
+            release_blob(name)
+            return
+        super().delete(name)
+
+
+def release_blob(name):
+    from .models import StoredBlob
+    StoredBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+
+cas_storage = ContentAddressedStorage()
@@ -0,0 +1,248 @@
+"""
+Foydalanuvchilar egallagan joy hisobi (kategoriya bo'yicha baytlar)
+- Har bir yuklash/o'chirishda StorageUsage qatori F('bytes') + delta bilan yangilanadi
+  (signals.py: kuzatiladigan fayl maydonlari va deploy manifestlari).
+- Kvota yuklash boshida bitta kichik so'rov bilan tekshiriladi - MEDIA_ROOT aylanilmaydi.
+- Hisob va disk orasidagi farqni reconcile_storage buyrug'i tuzatadi.
+CAS fayllari har bir havola uchun hisoblanadi: bir xil faylni ikki kishi
+yuklasa - diskda bitta nusxa, lekin har biriga o'z hajmi yoziladi.
+"""
+import os
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+
+# (model, fayl maydoni, kategoriya, egasi - values_list uchun yo'l)
+TRACKED_FILES = (
+    ('accounts.HomeworkSubmission', 'file', 'homework_submissions', 'student_id'),
+    ('accounts.HomeworkSubmission', 'feedback_file', 'homework_submissions', 'graded_by_id'),
+    ('accounts.HomeworkRevision', 'file', 'homework_submissions', 'submission__student_id'),
+    ('accounts.HomeworkMessage', 'file', 'homework_chat', 'sender_id'),
+    ('ai_yordamchi.ChatMessage', 'image', 'chat_images', 'session__user_id'),
+    ('accounts.CustomUser', 'id_card', 'documents', 'id'),
+    ('accounts.CustomUser', 'birth_certificate', 'documents', 'id'),
+)
+
+# reconcile_storage ko'rib chiqadigan MEDIA_ROOT papkalari
+SCAN_ROOTS = (
+    'deploys', 'cas', 'homework_submissions', 'homework_feedback',
+    'homework_revisions', 'homework_chat', 'chat_images', 'documents',
+)
+
+
+class StorageQuotaError(Exception):
+    def __init__(self, message, status=413):
+        super().__init__(message)
+        self.status = status
+
+
+def get_quota():
+    """Bitta foydalanuvchi uchun umumiy kvota (bayt). None - cheklanmagan"""
+    return getattr(settings, 'STORAGE_USER_QUOTA', 2 * 1024 * 1024 * 1024)
+
+
+def tracked_models():
+    return {label for label, _, _, _ in TRACKED_FILES}
+
+
+def specs_for(model):
+    label = model._meta.label
+    return [spec for spec in TRACKED_FILES if spec[0] == label]
+
+
+# ==================== HISOBNI YANGILASH ====================
+
+def add_usage(user_id, category, delta):
+    """Hisobga delta qo'shish. Manfiy delta yangi qator yaratmaydi"""
+    from .models import StorageUsage
+
+    if not user_id or not delta:
+        return
+    if delta > 0:
+        StorageUsage.objects.bulk_create(
+            [StorageUsage(user_id=user_id, category=category)], ignore_conflicts=True,
+        )
+    StorageUsage.objects.filter(user_id=user_id, category=category).update(
+        bytes=F('bytes') + delta, updated_at=timezone.now(),
+    )
+
+
+def file_size(storage, name):
+    try:
+        return storage.size(name)
+    except (OSError, NotImplementedError):
+        return 0
+
+
+def _owner_id(instance, path):
+    value = instance
+    for part in path.split('__'):
+        value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value
+
+
+def remember_files(instance):
+    """Yuklangan holatdagi fayl nomlari - saqlashda nima o'zgarganini bilish uchun"""
+    instance._storage_files = {
+        field: instance.__dict__[field] and str(instance.__dict__[field])
+        for _, field, _, _ in specs_for(type(instance))
+        if field in instance.__dict__
+    }
+
+
+def track_file_changes(instance, created, update_fields=None):
+    """Saqlangandan keyin: eski fayl hajmini ayirish, yangisini qo'shish"""
+    original = getattr(instance, '_storage_files', {})
+    for _, field, category, owner in specs_for(type(instance)):
+        if update_fields is not None and field not in update_fields:
+            continue
+        if not created and field not in original:
+            # Maydon yuklanmagan (defer) - o'zgarish noma'lum, reconcile tuzatadi
+            continue
+        fieldfile = getattr(instance, field)
+        old = '' if created else original.get(field) or ''
+        new = fieldfile.name or ''
+        if old == new:
+            continue
+        owner_id = _owner_id(instance, owner)
+        storage = fieldfile.storage
+        if old:
+            add_usage(owner_id, category, -file_size(storage, old))
+        if new:
+            add_usage(owner_id, category, file_size(storage, new))
+    remember_files(instance)
+
+
+def release_file_usage(instance):
+    """Yozuv o'chirildi - uning fayllari hisobdan ayriladi"""
+    for _, field, category, owner in specs_for(type(instance)):
+        fieldfile = getattr(instance, field)
+        if fieldfile:
+            add_usage(_owner_id(instance, owner), category, -file_size(fieldfile.storage, fieldfile.name))
+
+
+# ==================== KVOTA ====================
+
+def usage_for(user_id):
+    """{kategoriya: bayt}"""
+    from .models import StorageUsage
+
+    return dict(StorageUsage.objects.filter(user_id=user_id).values_list('category', 'bytes'))
+
+
+def quota_left(user_id):
+    quota = get_quota()
+    if quota is None:
+        return None
+    from .models import StorageUsage
+
+    used = StorageUsage.objects.filter(user_id=user_id).aggregate(total=Sum('bytes'))['total'] or 0
+    return quota - used
+
+
+def check_quota(user, size):
+    """Yuklashdan oldin: size bayt sig'adimi. Adminlar cheklanmaydi"""
+    if user.is_admin:
+        return
+    left = quota_left(user.pk)
+    if left is not None and size > left:
+        raise StorageQuotaError(
+            f"Xotira kvotasi yetmaydi: fayl {filesizeformat(size)}, qolgan {filesizeformat(max(left, 0))}"
+        )
+
+
+# ==================== DISKNI SKANERLASH ====================
+
+def scan_tree(root, prefix):
+    """Papkadagi barcha fayllar: {MEDIA_ROOT ga nisbatan nom: hajm}. Symlink'lar sanalmaydi"""
+    sizes = {}
+    stack = [(root, prefix)]
+    while stack:
+        path, rel = stack.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = f"{rel}/{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, name))
+                    elif entry.is_file(follow_symlinks=False):
+                        sizes[name] = entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            continue
+    return sizes
+
+
+def scan_units(media_root):
+    """Parallel skanerlash uchun ishlar: har bir kuzatiladigan papkaning bevosita ichidagilari"""
+    units, loose = [], {}
+    for top in SCAN_ROOTS:
+        path = os.path.join(media_root, top)
+        if not os.path.isdir(path):
+            continue
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    units.append((entry.path, f"{top}/{entry.name}"))
+                elif entry.is_file(follow_symlinks=False):
+                    loose[f"{top}/{entry.name}"] = entry.stat(follow_symlinks=False).st_size
+    return units, loose
+
+
+def scan_media(media_root, workers=8):
+    """MEDIA_ROOT dagi kuzatiladigan papkalarni oqimlar pulida skanerlash"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    units, sizes = scan_units(media_root)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(lambda unit: scan_tree(*unit), units):
+            sizes.update(part)
+    return sizes
+
+
+def compute_usage(sizes):
+    """
+    Skaner natijasidan kutilgan hisob: {(user_id, kategoriya): bayt}
+    va har bir deploy papkasi hajmi: {deploy_id: bayt}
+    """
+    from django.apps import apps
+    from .models import CustomUser, HTMLDeploy
+
+    expected = {}
+
+    def add(user_id, category, size):
+        if user_id and size:
+            expected[(user_id, category)] = expected.get((user_id, category), 0) + size
+
+    # deploys/<username>/.releases/<papka>/<versiya>/... (deploy papkasi - symlink, sanalmaydi)
+    # yoki eski tuzilishdagi deploys/<username>/<papka>/...; ochilayotgan versiyalar ham joy egallaydi
+    from .deploy_extract import RELEASES_DIR
+
+    by_user, by_folder = {}, {}
+    for name, size in sizes.items():
+        parts = name.split('/', 3)
+        if parts[0] != 'deploys' or len(parts) < 3:
+            continue
+        by_user[parts[1]] = by_user.get(parts[1], 0) + size
+        if len(parts) == 4:
+            folder = parts[3].split('/', 1)[0] if parts[2] == RELEASES_DIR else parts[2]
+            by_folder[(parts[1], folder)] = by_folder.get((parts[1], folder), 0) + size
+    user_ids = dict(CustomUser.objects.filter(username__in=by_user).values_list('username', 'pk'))
+    for username, size in by_user.items():
+        add(user_ids.get(username), 'deploys', size)
+
+    deploy_sizes = {
+        pk: by_folder.get((username, folder), 0)
+        for pk, username, folder in HTMLDeploy.objects.values_list('pk', 'user__username', 'folder_name')
+    }
+
+    for label, field, category, owner in TRACKED_FILES:
+        model = apps.get_model(label)
+        rows = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(owner, field)
+        for user_id, name in rows.iterator(chunk_size=2000):
+            add(user_id, category, sizes.get(name, 0))
+
+    return expected, deploy_sizes
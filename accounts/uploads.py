@@ -0,0 +1,244 @@
+"""
+Vazifa fayllarini bo'laklab (chunked) yuklash
+init -> PUT chunk N -> finalize. Bo'laklar to'g'ridan-to'g'ri diskka
+yoziladi, SHA-256 bo'lak-bo'lak hisoblanadi, uzilgan yuklash davom ettiriladi.
+"""
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import get_valid_filename
+
+from .models import ChunkedUpload
+
+READ_BLOCK = 64 * 1024
+
+# Jarayon ichidagi hash holati: upload_id -> (offset, hasher).
+# Boshqa jarayon yoki restartdan keyin qisman fayldan qayta tiklanadi.
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_chunk_size():
+    return getattr(settings, 'HOMEWORK_UPLOAD_CHUNK_SIZE', 2 * 1024 * 1024)
+
+
+def get_max_size():
+    return getattr(settings, 'HOMEWORK_UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+
+
+def start_upload(user, filename, total_size, homework=None, submission=None, note=''):
+    """Yangi yuklash sessiyasi yoki shu fayl uchun tugallanmagan sessiyani qaytarish"""
+    if total_size <= 0:
+        raise UploadError("Fayl bo'sh")
+    if total_size > get_max_size():
+        raise UploadError("Fayl hajmi juda katta", status=413)
+
+    # Kvota yuklash boshlanishidan oldin - 500 MB qabul qilib keyin rad etmaslik uchun
+    from .storage_usage import check_quota, StorageQuotaError
+    try:
+        check_quota(user, total_size)
+    except StorageQuotaError as e:
+        raise UploadError(str(e), status=e.status)
+
+    filename = get_valid_filename(os.path.basename(filename)) or 'file'
+
+    existing = ChunkedUpload.objects.filter(
+        user=user, homework=homework, submission=submission,
+        filename=filename, total_size=total_size, status='uploading',
+    ).first()
+    if existing and os.path.exists(existing.get_part_path()):
+        return existing
+
+    upload = ChunkedUpload.objects.create(
+        user=user,
+        homework=homework,
+        submission=submission,
+        filename=filename,
+        total_size=total_size,
+        chunk_size=get_chunk_size(),
+        note=note,
+    )
+    os.makedirs(os.path.dirname(upload.get_part_path()), exist_ok=True)
+    open(upload.get_part_path(), 'wb').close()
+    return upload
+
+
+def _get_hasher(upload):
+    with _hashers_lock:
+        cached = _hashers.get(upload.pk)
+    if cached and cached[0] == upload.received_bytes:
+        return cached[1]
+
+    # Resume: qisman yozilgan qismni bir marta o'qib hash holatini tiklash
+    hasher = hashlib.sha256()
+    remaining = upload.received_bytes
+    with open(upload.get_part_path(), 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(READ_BLOCK, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def write_chunk(upload_id, user, index, stream, length):
+    """
+    N-bo'lakni oqimdan diskka yozish.
+    Qayta yuborilgan bo'lak qabul qilinadi (idempotent), tartibsizi - 409.
+    """
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().filter(pk=upload_id, user=user).first()
+        if upload is None:
+            raise UploadError("Yuklash topilmadi", status=404)
+        if upload.status != 'uploading':
+            raise UploadError("Yuklash allaqachon yakunlangan", status=409)
+
+        offset = index * upload.chunk_size
+        expected = min(upload.chunk_size, upload.total_size - offset)
+
+        if offset < upload.received_bytes:
+            # Bu bo'lak avval qabul qilingan
+            return upload
+        if offset != upload.received_bytes:
+            raise UploadError("Bo'lak tartibi noto'g'ri", status=409)
+        if expected <= 0 or length != expected:
+            raise UploadError("Bo'lak hajmi noto'g'ri")
+
+        hasher = _get_hasher(upload)
+        written = 0
+        with open(upload.get_part_path(), 'r+b') as f:
+            f.seek(offset)
+            f.truncate()
+            while written < length:
+                block = stream.read(min(READ_BLOCK, length - written))
+                if not block:
+                    break
+                f.write(block)
+                hasher.update(block)
+                written += len(block)
+
+        if written != length:
+            # Ulanish uzildi - qisman bo'lakni olib tashlash
+            with open(upload.get_part_path(), 'r+b') as f:
+                f.truncate(offset)
+            with _hashers_lock:
+                _hashers.pop(upload.pk, None)
+            raise UploadError("Bo'lak to'liq kelmadi")
+
+        upload.received_bytes = offset + written
+        upload.save(update_fields=['received_bytes', 'updated_at'])
+
+    with _hashers_lock:
+        _hashers[upload.pk] = (upload.received_bytes, hasher)
+    return upload
+
+
+def finalize_upload(upload, upload_to, expected_sha256=None, storage=None):
+    """
+    Faylni storage ichidagi doimiy joyiga qo'yish (nusxa olmasdan - hard link).
+    Kontent bo'yicha storage bo'lsa - tayyor hash bilan blob sifatida qabul qilinadi.
+    Natija: FileField ga beriladigan storage nomi.
+    transaction.atomic() ichida, yozuv select_for_update() bilan olingan holda chaqiriladi.
+    .part fayl faqat tranzaksiya tasdiqlangach o'chiriladi - bekor qilinsa,
+    yuklash 'uploading' holatiga qaytadi va qayta yakunlash mumkin.
+    """
+    # Qayta tekshirish: takroriy yoki parallel finalize faylni allaqachon ko'chirgan bo'lishi mumkin.
+    # Shartli UPDATE - satr qulfi bo'lmagan bazada ham faqat bitta chaqiruv o'tadi,
+    # keyingi xatolarda tranzaksiya bilan birga bekor qilinadi
+    claimed = ChunkedUpload.objects.filter(pk=upload.pk, status='uploading').update(status='complete')
+    if upload.status != 'uploading' or not claimed:
+        raise UploadError("Yuklash allaqachon yakunlangan", status=409)
+
+    if not upload.is_complete:
+        raise UploadError("Fayl to'liq yuklanmagan", status=409)
+
+    digest = _get_hasher(upload).hexdigest()
+    if expected_sha256 and expected_sha256.lower() != digest:
+        raise UploadError("SHA-256 mos kelmadi", status=422)
+
+    part_path = upload.get_part_path()
+    source = _link_part(part_path)
+    try:
+        name = _store(source, upload, digest, upload_to, storage)
+    except BaseException:
+        if os.path.exists(source):
+            os.remove(source)
+        raise
+
+    transaction.on_commit(lambda: _remove_part(part_path))
+    return _complete(upload, digest, name)
+
+
+def _link_part(part_path):
+    """.part faylning ikkinchi nomi (hard link; bo'lmasa - nusxa). Ko'chiriladigani shu"""
+    source = f'{part_path}.{uuid.uuid4().hex[:8]}'
+    try:
+        os.link(part_path, source)
+    except OSError:
+        shutil.copyfile(part_path, source)
+    return source
+
+
+def _remove_part(part_path):
+    try:
+        os.remove(part_path)
+    except FileNotFoundError:
+        pass
+
+
+def _store(source, upload, digest, upload_to, storage):
+    if hasattr(storage, 'ingest_path'):
+        ext = os.path.splitext(upload.filename)[1].lower()[:16]
+        return storage.ingest_path(source, digest, ext, upload.total_size)
+
+    name = default_storage.get_available_name(os.path.join(upload_to, upload.filename))
+
+    try:
+        target = default_storage.path(name)
+    except NotImplementedError:
+        target = None
+
+    if target:
+        # Lokal storage: rename - qo'shimcha nusxa yo'q
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(source, target)
+    else:
+        from django.core.files import File
+        with open(source, 'rb') as f:
+            name = default_storage.save(name, File(f))
+        os.remove(source)
+    return name
+
+
+def _complete(upload, digest, name):
+    upload.sha256 = digest
+    upload.status = 'complete'
+    upload.save(update_fields=['sha256', 'status', 'updated_at'])
+
+    with _hashers_lock:
+        _hashers.pop(upload.pk, None)
+    return name
+
+
+def discard_upload(upload):
+    """Tugallanmagan yuklashni o'chirish (qisman fayl bilan birga)"""
+    with _hashers_lock:
+        _hashers.pop(upload.pk, None)
+    try:
+        os.remove(upload.get_part_path())
+    except FileNotFoundError:
+        pass
+    upload.delete()
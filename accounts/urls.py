@@ -23,6 +23,10 @@ urlpatterns = [
     path('lessons/<int:pk>/delete/', views.delete_lesson, name='delete_lesson'),
     path('video/<int:pk>/watched/', views.mark_video_watched, name='mark_video_watched'),
     path('homework/<int:pk>/submit/', views.submit_homework, name='submit_homework'),
+    path('uploads/init/', views.upload_init, name='upload_init'),
+    path('uploads/<uuid:upload_id>/', views.upload_status, name='upload_status'),
+    path('uploads/<uuid:upload_id>/chunk/<int:index>/', views.upload_chunk, name='upload_chunk'),
+    path('uploads/<uuid:upload_id>/finalize/', views.upload_finalize, name='upload_finalize'),
     
     # Tests
     path('test/<int:pk>/start/', views.start_test, name='start_test'),
@@ -49,15 +53,27 @@ urlpatterns = [
     
     # Teacher panel
     path('homework-submissions/', views.homework_submissions, name='homework_submissions'),
+    path('homework-submissions/claim/', views.grading_claim, name='grading_claim'),
+    path('homework-submissions/release/', views.grading_release, name='grading_release'),
+    path('homework-submissions/bulk/', views.grade_homework_bulk, name='grade_homework_bulk'),
+    path('homework-submissions/similar/', views.homework_similarity, name='homework_similarity'),
+    path('homework-submissions/download/', views.homework_download_all, name='homework_download_all'),
+    path('preview/<str:kind>/<int:pk>/', views.file_preview, name='file_preview'),
+    path('download/<str:kind>/<int:pk>/', views.homework_file_download, name='homework_file_download'),
     path('homework/<int:pk>/grade/', views.grade_homework, name='grade_homework'),
     path('test-results/', views.all_test_results, name='all_test_results'),
     
     # Student homework
     path('my-homeworks/', views.my_homework_list, name='my_homework_list'),
     path('homework/<int:pk>/chat/', views.homework_chat, name='homework_chat'),
+    path('homework/<int:pk>/chat/delta/', views.homework_chat_delta, name='homework_chat_delta'),
+    path('homework/<int:pk>/chat/stream/', views.homework_chat_stream, name='homework_chat_stream'),
     
     # Messages
     path('messages/', views.messages_view, name='messages'),
+    path('messages/feed/', views.messages_feed, name='messages_feed'),
+    path('messages/delta/', views.messages_delta, name='messages_delta'),
+    path('messages/stream/', views.message_stream, name='message_stream'),
     path('messages/<int:pk>/', views.message_detail, name='message_detail'),
     path('messages/<int:pk>/read/', views.mark_message_read, name='mark_message_read'),
     
@@ -127,6 +143,9 @@ urlpatterns = [
     path('dashboard/deploys/<int:pk>/toggle/', views.admin_deploy_toggle, name='admin_deploy_toggle'),
     path('dashboard/deploys/<int:pk>/delete/', views.admin_deploy_delete, name='admin_deploy_delete'),
     
+    # Admin: Xotira
+    path('dashboard/storage/', views.admin_storage, name='admin_storage'),
+    
     # Admin: Qurilmalar
     path('dashboard/users/<int:pk>/devices/', views.admin_user_devices, name='admin_user_devices'),
     path('dashboard/users/<int:user_pk>/devices/<int:device_pk>/logout/', views.admin_logout_user_device, name='admin_logout_user_device'),
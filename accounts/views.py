@@ -1,10 +1,11 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponse, JsonResponse
 from django.db.models import Count, Q, Sum, Avg
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from datetime import timedelta
 from .forms import (
@@ -318,13 +319,25 @@ def mark_video_watched(request, pk):
     return JsonResponse({'success': True, 'coins': request.user.coins})
 
 
+def _storage_quota_ok(request, *files):
+    """Yuklangan fayllar foydalanuvchi kvotasiga sig'adimi; sig'masa - xabar chiqariladi"""
+    from .storage_usage import check_quota, StorageQuotaError
+    
+    try:
+        check_quota(request.user, sum(f.size for f in files if f))
+    except StorageQuotaError as e:
+        messages.error(request, str(e))
+        return False
+    return True
+
+
 @login_required
 def submit_homework(request, pk):
     homework = get_object_or_404(Homework, pk=pk)
     
     if request.method == 'POST':
         form = HomeworkSubmissionForm(request.POST, request.FILES)
-        if form.is_valid():
+        if form.is_valid() and _storage_quota_ok(request, request.FILES.get('file')):
             submission = form.save(commit=False)
             submission.homework = homework
             submission.student = request.user
@@ -334,6 +347,130 @@ def submit_homework(request, pk):
     return redirect('lesson_view', pk=homework.lesson.pk)
 
 
+# ==================== BO'LAKLAB YUKLASH (CHUNKED UPLOAD) ====================
+
+def _upload_payload(upload):
+    base_url = reverse('upload_status', args=[upload.pk])
+    return {
+        'success': True,
+        'upload_id': str(upload.pk),
+        'chunk_size': upload.chunk_size,
+        'received_bytes': upload.received_bytes,
+        'next_chunk': upload.next_chunk,
+        'total_size': upload.total_size,
+        'status_url': base_url,
+        'chunk_url': base_url + 'chunk/',
+        'finalize_url': reverse('upload_finalize', args=[upload.pk]),
+    }
+
+
+@login_required
+def upload_init(request):
+    """Yangi topshiriq (homework) yoki qayta topshirish (submission) uchun yuklashni boshlash"""
+    from .uploads import start_upload, UploadError
+
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST only'}, status=405)
+
+    homework = submission = None
+    if request.POST.get('submission'):
+        submission = get_object_or_404(HomeworkSubmission, pk=request.POST['submission'], student=request.user)
+    else:
+        homework = get_object_or_404(Homework, pk=request.POST.get('homework'))
+
+    try:
+        upload = start_upload(
+            request.user,
+            request.POST.get('filename', ''),
+            int(request.POST.get('size', 0)),
+            homework=homework,
+            submission=submission,
+            note=request.POST.get('note', ''),
+        )
+    except ValueError:
+        return JsonResponse({'success': False, 'error': "Fayl hajmi noto'g'ri"}, status=400)
+    except UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+
+    return JsonResponse(_upload_payload(upload))
+
+
+@login_required
+def upload_status(request, upload_id):
+    """Davom ettirish uchun: qancha qabul qilingan"""
+    from .models import ChunkedUpload
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    return JsonResponse(_upload_payload(upload))
+
+
+@login_required
+def upload_chunk(request, upload_id, index):
+    """PUT: N-bo'lak (so'rov tanasi to'g'ridan-to'g'ri diskka oqadi)"""
+    from .uploads import write_chunk, UploadError
+
+    if request.method != 'PUT':
+        return JsonResponse({'success': False, 'error': 'PUT only'}, status=405)
+
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        upload = write_chunk(upload_id, request.user, index, request, length)
+    except UploadError as e:
+        from .models import ChunkedUpload
+        payload = {'success': False, 'error': str(e)}
+        upload = ChunkedUpload.objects.filter(pk=upload_id, user=request.user).first()
+        if upload:
+            payload['next_chunk'] = upload.next_chunk
+        return JsonResponse(payload, status=e.status)
+
+    return JsonResponse({
+        'success': True,
+        'received_bytes': upload.received_bytes,
+        'next_chunk': upload.next_chunk,
+    })
+
+
+@login_required
+def upload_finalize(request, upload_id):
+    """Yuklashni yakunlash va faylni topshiriqqa biriktirish"""
+    from .models import ChunkedUpload
+    from .uploads import finalize_upload, UploadError
+
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST only'}, status=405)
+
+    file_field = HomeworkSubmission._meta.get_field('file')
+    try:
+        # Qulf: ikki marta bosish yoki mijoz qayta urinishi ikkinchi finalize'ni 409 ga olib keladi
+        with transaction.atomic():
+            upload = get_object_or_404(ChunkedUpload.objects.select_for_update(), pk=upload_id, user=request.user)
+            file_name = finalize_upload(
+                upload, file_field.upload_to, request.POST.get('sha256'), storage=file_field.storage,
+            )
+
+            if upload.submission_id:
+                submission = upload.submission
+                submission.resubmit(file_name, upload.note, original_name=upload.filename)
+                redirect_url = reverse('homework_chat', args=[submission.pk])
+            else:
+                submission = HomeworkSubmission.objects.create(
+                    homework=upload.homework,
+                    student=request.user,
+                    file=file_name,
+                    original_name=upload.filename,
+                )
+                redirect_url = reverse('lesson_view', args=[upload.homework.lesson_id])
+    except UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=e.status)
+
+    messages.success(request, "Vazifa muvaffaqiyatli yuborildi!")
+    return JsonResponse({
+        'success': True,
+        'submission_id': submission.pk,
+        'sha256': upload.sha256,
+        'redirect_url': redirect_url,
+    })
+
+
 @login_required
 def start_test(request, pk):
     test = get_object_or_404(Test, pk=pk)
@@ -553,7 +690,7 @@ def student_public_profile(request, pk):
 def profile_edit_view(request):
     if request.method == 'POST':
         form = UserProfileForm(request.POST, request.FILES, instance=request.user)
-        if form.is_valid():
+        if form.is_valid() and _storage_quota_ok(request, request.FILES.get('id_card'), request.FILES.get('birth_certificate')):
             form.save()
             messages.success(request, "Profil muvaffaqiyatli yangilandi!")
             return redirect('profile')
@@ -859,37 +996,120 @@ def leaderboard(request):
 # Messages views
 @login_required
 def messages_view(request):
-    # Shaxsiy xabarlar
-    personal_messages = Message.objects.filter(recipient=request.user)
-    
-    # Umumiy xabarlar
-    if request.user.is_student:
-        general_messages = Message.objects.filter(
-            Q(message_type='all') | Q(message_type='students'),
-            recipient__isnull=True
-        )
-    elif request.user.is_teacher:
-        general_messages = Message.objects.filter(
-            Q(message_type='all') | Q(message_type='teachers'),
-            recipient__isnull=True
-        )
-    else:
-        general_messages = Message.objects.filter(message_type='all', recipient__isnull=True)
-    
-    all_messages = (personal_messages | general_messages).distinct().order_by('-created_at')
-    
-    # O'qilmagan xabarlar sonini yangilash
-    unread_count = all_messages.filter(is_read=False).count()
-    
+    from .inbox import inbox_page, user_messages_queryset
+
+    message_type = request.GET.get('type', '')
+
+    # Faqat birinchi sahifa - qolganlari messages_feed orqali yuklanadi
+    messages_list, next_cursor = inbox_page(request.user, message_type)
+
+    # O'qilmagan xabarlar soni
+    unread_count = user_messages_queryset(request.user).filter(is_read=False).count()
+
     return render(request, 'accounts/messages.html', {
-        'messages_list': all_messages,
+        'messages_list': messages_list,
+        'next_cursor': next_cursor,
+        'latest_id': max((msg.pk for msg in messages_list), default=0),
         'unread_count': unread_count,
+        'message_type': message_type,
+        'message_types': Message.MESSAGE_TYPES,
     })
 
 
+@login_required
+def messages_feed(request):
+    """Infinite scroll uchun JSON: keyingi sahifa xabarlari"""
+    from django.template.loader import render_to_string
+    from .inbox import inbox_page
+
+    message_type = request.GET.get('type', '')
+    cursor = request.GET.get('cursor')
+
+    items, next_cursor = inbox_page(request.user, message_type, cursor=cursor)
+
+    return JsonResponse({
+        'results': [{
+            'id': msg.pk,
+            'title': msg.title,
+            'message_type': msg.message_type,
+            'is_read': msg.is_read,
+            'created_at': msg.created_at.isoformat(),
+            'url': reverse('message_detail', args=[msg.pk]),
+        } for msg in items],
+        'html': render_to_string('accounts/messages_items.html', {'messages_list': items}, request=request),
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+def messages_delta(request):
+    """Polling uchun: berilgan ID dan keyingi yangi xabarlar"""
+    from django.template.loader import render_to_string
+    from .inbox import user_messages_queryset
+    from .realtime import serialize_message, last_event_id, DELTA_LIMIT
+
+    since = last_event_id(request) or 0
+    queryset = user_messages_queryset(request.user, request.GET.get('type', ''))
+    items = list(queryset.filter(pk__gt=since).order_by('pk')[:DELTA_LIMIT])
+    unread_count = user_messages_queryset(request.user).filter(is_read=False).count()
+
+    return JsonResponse({
+        'results': [serialize_message(msg) for msg in items],
+        'html': render_to_string('accounts/messages_items.html', {'messages_list': items[::-1]}, request=request),
+        'unread_count': unread_count,
+        'last_id': items[-1].pk if items else since,
+    })
+
+
+@login_required
+async def message_stream(request):
+    """SSE: yangi xabarlar va o'qilmaganlar soni (faqat ASGI)"""
+    from asgiref.sync import sync_to_async
+    from django.http import StreamingHttpResponse
+    from .inbox import user_messages_queryset
+    from .realtime import (
+        event_stream, inbox_channels, is_asgi_request, last_event_id,
+        serialize_message, DELTA_LIMIT,
+    )
+
+    # WSGI ostida cheksiz stream workerni band qiladi - 204 bilan mijoz polling'ga o'tadi
+    if not is_asgi_request(request):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    since = last_event_id(request)
+
+    def unread_count():
+        return user_messages_queryset(user).filter(is_read=False).count()
+
+    def missed_messages():
+        if since is None:
+            return []
+        items = user_messages_queryset(user).filter(pk__gt=since).order_by('pk')[:DELTA_LIMIT]
+        return [('message', serialize_message(msg), msg.pk) for msg in items]
+
+    initial = await sync_to_async(missed_messages)()
+    initial.append(('unread', {'count': await sync_to_async(unread_count)()}, None))
+
+    async def after_event(payload):
+        return [('unread', {'count': await sync_to_async(unread_count)()})]
+
+    response = StreamingHttpResponse(
+        event_stream(inbox_channels(user), initial=initial, after_event=after_event),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def message_detail(request, pk):
-    message = get_object_or_404(Message, pk=pk)
+    message = Message.objects.select_related('sender').filter(pk=pk).first()
+    if message is None:
+        # Arxivga ko'chirilgan xabar - sekinroq yo'l
+        from .models import ArchivedMessage
+        message = get_object_or_404(ArchivedMessage.objects.select_related('sender'), original_id=pk)
     
     # Faqat o'ziga tegishli xabarlarni ko'rish
     if message.recipient and message.recipient != request.user:
@@ -972,8 +1192,21 @@ def admin_messages(request):
     if not request.user.is_admin:
         return redirect('home')
     
-    all_messages = Message.objects.all().order_by('-created_at')[:100]
-    return render(request, 'accounts/admin/messages.html', {'messages_list': all_messages})
+    from .inbox import MESSAGE_TYPE_KEYS
+    from .pagination import keyset_page
+
+    message_type = request.GET.get('type', '')
+    all_messages = Message.objects.select_related('recipient')
+    if message_type in MESSAGE_TYPE_KEYS:
+        all_messages = all_messages.filter(message_type=message_type)
+
+    messages_list, next_cursor = keyset_page(all_messages, cursor=request.GET.get('cursor'), limit=100)
+    return render(request, 'accounts/admin/messages.html', {
+        'messages_list': messages_list,
+        'next_cursor': next_cursor,
+        'message_type': message_type,
+        'message_types': Message.MESSAGE_TYPES,
+    })
 
 from django.core.paginator import Paginator
 
@@ -1377,65 +1610,353 @@ def delete_test_question(request, pk):
     return redirect('manage_test_questions', pk=test_pk)
 
 
+def _attach_unread_counts(submissions, unread_filter):
+    """
+    Sahifadagi vazifalarga o'qilmagan xabarlar sonini (unread_count) qo'shish.
+    Faqat sahifa id'lari bo'yicha bitta GROUP BY - butun ro'yxatni guruhlab,
+    keyin LIMIT qilishdan ancha arzon.
+    """
+    counts = dict(
+        HomeworkSubmission.objects.filter(pk__in=[sub.pk for sub in submissions])
+        .annotate(unread_count=Count('messages', filter=unread_filter))
+        .values_list('pk', 'unread_count')
+    )
+    for sub in submissions:
+        sub.unread_count = counts.get(sub.pk, 0)
+
+
 # Homework submissions for teachers
 @login_required
 def homework_submissions(request):
     if not (request.user.is_admin or request.user.is_teacher):
         return redirect('home')
     
+    from .pagination import keyset_page
+    from .grading_queue import SUBMISSION_PAGE_SIZE, status_counts, active_claims
+    
     status_filter = request.GET.get('status', '')
     profession_filter = request.GET.get('profession', '')
+    if profession_filter and not profession_filter.isdigit():
+        profession_filter = ''
     
-    submissions = HomeworkSubmission.objects.select_related(
-        'homework__lesson__profession', 'student'
-    ).prefetch_related('messages')
-    
+    submissions = HomeworkSubmission.objects.all()
     if status_filter:
         submissions = submissions.filter(status=status_filter)
     else:
         submissions = submissions.exclude(status='graded')
-    
     if profession_filter:
         submissions = submissions.filter(homework__lesson__profession_id=profession_filter)
     
-    submissions = submissions.order_by('-submitted_at')
+    submissions_page, next_cursor = keyset_page(
+        submissions.select_related('homework__lesson__profession', 'student', 'claimed_by'),
+        cursor=request.GET.get('cursor'), limit=SUBMISSION_PAGE_SIZE, field='submitted_at',
+    )
+    # O'quvchidan kelgan o'qilmagan xabarlar
+    _attach_unread_counts(submissions_page, Q(messages__is_read=False, messages__sender=models.F('student')))
     
-    # Statistika
-    stats = {
-        'pending': HomeworkSubmission.objects.filter(status='pending').count(),
-        'reviewing': HomeworkSubmission.objects.filter(status='reviewing').count(),
-        'revision': HomeworkSubmission.objects.filter(status='revision').count(),
-        'accepted': HomeworkSubmission.objects.filter(status='accepted').count(),
-        'graded': HomeworkSubmission.objects.filter(status='graded').count(),
-    }
+    # Statistika - bitta GROUP BY so'rov
+    stats = status_counts()
+    if profession_filter:
+        filtered = status_counts(HomeworkSubmission.objects.filter(homework__lesson__profession_id=profession_filter))
+    else:
+        filtered = stats
+    total = filtered.get(status_filter, 0) if status_filter else filtered['open']
     
+    my_claims = active_claims(request.user).select_related('homework__lesson', 'student').order_by('claim_expires_at')
     professions = Profession.objects.all()
     
     return render(request, 'accounts/manage/homework_submissions.html', {
-        'submissions': submissions,
+        'submissions': submissions_page,
+        'next_cursor': next_cursor,
+        'total': total,
         'stats': stats,
+        'my_claims': my_claims,
         'professions': professions,
         'status_filter': status_filter,
         'profession_filter': profession_filter,
     })
 
 
+@login_required
+def grading_claim(request):
+    """Navbatdan keyingi vazifalarni olish (band qilish)"""
+    if not (request.user.is_admin or request.user.is_teacher):
+        return redirect('home')
+    if request.method != 'POST':
+        return redirect('homework_submissions')
+    
+    from .grading_queue import claim_next
+    try:
+        count = min(max(int(request.POST.get('count', 0)), 0), 50) or None
+    except ValueError:
+        count = None
+    claimed = claim_next(request.user, count, request.POST.get('profession') or None)
+    
+    if not claimed:
+        messages.info(request, "Navbatda bo'sh vazifa yo'q")
+        return redirect('homework_submissions')
+    
+    messages.success(request, f"Sizga {len(claimed)} ta vazifa ajratildi")
+    return redirect('grade_homework', pk=claimed[0])
+
+
+@login_required
+def grading_release(request):
+    """Band qilingan vazifalarni navbatga qaytarish"""
+    if not (request.user.is_admin or request.user.is_teacher):
+        return redirect('home')
+    if request.method == 'POST':
+        from .grading_queue import release
+        ids = request.POST.getlist('submission') or None
+        released = release(request.user, ids)
+        messages.info(request, f"{released} ta vazifa navbatga qaytarildi")
+    return redirect('homework_submissions')
+
+
+def _homework_file(request, kind, pk):
+    """Vazifa / izoh / versiya / chat fayli va uning asl nomi (ruxsat tekshiriladi)"""
+    from django.http import Http404
+    from .models import HomeworkMessage, HomeworkRevision
+    
+    if kind == 'submission':
+        submission = get_object_or_404(HomeworkSubmission, pk=pk)
+        fieldfile, name = submission.file, submission.display_name
+    elif kind == 'feedback':
+        submission = get_object_or_404(HomeworkSubmission, pk=pk)
+        fieldfile, name = submission.feedback_file, submission.feedback_display_name
+    elif kind == 'revision':
+        revision = get_object_or_404(HomeworkRevision.objects.select_related('submission'), pk=pk)
+        submission, fieldfile, name = revision.submission, revision.file, revision.display_name
+    elif kind == 'chat':
+        chat_message = get_object_or_404(HomeworkMessage.objects.select_related('submission'), pk=pk)
+        submission, fieldfile, name = chat_message.submission, chat_message.file, chat_message.display_name
+    else:
+        raise Http404
+    
+    user = request.user
+    if not (user.is_admin or user.is_teacher or submission.student_id == user.pk):
+        raise Http404
+    if not fieldfile:
+        raise Http404
+    return fieldfile, name
+
+
+@login_required
+def homework_file_download(request, kind, pk):
+    """Vazifa fayllarini asl nomi bilan yuklab berish (storage da ular hash nomi bilan turadi)"""
+    from django.http import FileResponse, Http404
+    
+    fieldfile, name = _homework_file(request, kind, pk)
+    try:
+        handle = fieldfile.open('rb')
+    except OSError:
+        raise Http404
+    response = FileResponse(handle, as_attachment=True, filename=name)
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@login_required
+def file_preview(request, kind, pk):
+    """Vazifa / versiya / chat fayli preview'i (rasm yoki matn parchasi)"""
+    from django.http import FileResponse, Http404
+    from .previews import ensure_preview
+    
+    fieldfile, _ = _homework_file(request, kind, pk)
+    
+    preview = ensure_preview(fieldfile)
+    if preview is None or preview.kind == 'none':
+        raise Http404
+    
+    try:
+        handle = fieldfile.storage.open(preview.preview, 'rb')
+    except OSError:
+        preview.delete()
+        raise Http404
+    
+    content_type = 'image/jpeg' if preview.kind == 'image' else 'text/plain; charset=utf-8'
+    response = FileResponse(handle, content_type=content_type)
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@login_required
+def homework_download_all(request):
+    """Vazifa yoki kurs bo'yicha barcha topshiriqlarni bitta ZIP qilib oqim bilan yuklash"""
+    if not (request.user.is_admin or request.user.is_teacher):
+        return redirect('home')
+    
+    from django.http import StreamingHttpResponse
+    from django.utils.http import content_disposition_header
+    from django.utils.text import get_valid_filename
+    from .zip_export import latest_submissions, stream_submissions_zip
+    
+    submissions = HomeworkSubmission.objects.select_related('student', 'homework__lesson').only(
+        'id', 'homework_id', 'student_id', 'file', 'version', 'submitted_at',
+        'student__username', 'student__first_name', 'student__last_name',
+        'homework__lesson__title', 'homework__lesson__order',
+    )
+    homework_id = request.GET.get('homework')
+    profession_id = request.GET.get('profession')
+    
+    if homework_id:
+        homework = get_object_or_404(Homework.objects.select_related('lesson'), pk=homework_id)
+        submissions = submissions.filter(homework=homework)
+        archive = homework.lesson.title
+        with_folders = False
+    elif profession_id:
+        profession = get_object_or_404(Profession, pk=profession_id)
+        submissions = submissions.filter(homework__lesson__profession=profession)
+        archive = profession.name
+        with_folders = True
+    else:
+        messages.error(request, "Vazifa yoki kurs tanlanmagan")
+        return redirect('homework_submissions')
+    
+    response = StreamingHttpResponse(
+        stream_submissions_zip(latest_submissions(submissions), with_lesson_folder=with_folders),
+        content_type='application/zip',
+    )
+    filename = get_valid_filename(f"{archive}_{timezone.localdate():%Y%m%d}") or 'vazifalar'
+    response['Content-Disposition'] = content_disposition_header(True, f"{filename}.zip")
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def homework_similarity(request):
+    """Ehtimol ko'chirilgan vazifalar juftlari (MinHash/LSH indeksidan)"""
+    if not (request.user.is_admin or request.user.is_teacher):
+        return redirect('home')
+    
+    from .models import SimilarSubmissionPair
+    homework_filter = request.GET.get('homework', '')
+    profession_filter = request.GET.get('profession', '')
+    
+    pairs = SimilarSubmissionPair.objects.select_related(
+        'homework__lesson__profession', 'first__student', 'second__student'
+    )
+    if homework_filter:
+        pairs = pairs.filter(homework_id=homework_filter)
+    if profession_filter:
+        pairs = pairs.filter(homework__lesson__profession_id=profession_filter)
+    
+    return render(request, 'accounts/manage/homework_similarity.html', {
+        'pairs': pairs.order_by('-score', '-detected_at')[:200],
+        'professions': Profession.objects.all(),
+        'homework_filter': homework_filter,
+        'profession_filter': profession_filter,
+    })
+
+
+@login_required
+def grade_homework_bulk(request):
+    """
+    Ko'plab vazifalarni bitta so'rovda baholash yoki statusini o'zgartirish.
+    Forma: submission=<id>... , action, grade (umumiy), grade_<id> (alohida), feedback.
+    JSON: {"action": "grade", "items": [{"id": 1, "grade": 90, "feedback": "..."}]}
+    """
+    if not (request.user.is_admin or request.user.is_teacher):
+        return JsonResponse({'success': False, 'error': 'Ruxsat yo\'q'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST only'}, status=405)
+    
+    import json
+    from django.utils.http import url_has_allowed_host_and_scheme
+    from .grading import BULK_STATUS_ACTIONS, bulk_grade, bulk_set_status
+    
+    is_json = request.content_type == 'application/json'
+    try:
+        if is_json:
+            payload = json.loads(request.body)
+            action = payload.get('action', 'grade')
+            rows = [
+                (int(item['id']), item.get('grade'), item.get('feedback', ''))
+                for item in payload.get('items', [])
+            ]
+            note = payload.get('note', '')
+        else:
+            action = request.POST.get('action', 'grade')
+            common_grade = request.POST.get('grade', '').strip()
+            feedback = request.POST.get('feedback', '')
+            rows = [
+                (int(pk), request.POST.get(f'grade_{pk}', '').strip() or common_grade, feedback)
+                for pk in request.POST.getlist('submission')
+            ]
+            note = feedback
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'error': "Noto'g'ri ma'lumot"}, status=400)
+    
+    error = None
+    result = None
+    if not rows:
+        error = "Hech qanday vazifa tanlanmagan"
+    elif action == 'grade':
+        items = {}
+        for pk, grade, feedback in rows:
+            try:
+                grade = int(grade)
+            except (TypeError, ValueError):
+                error = "Har bir vazifa uchun baho kiriting"
+                break
+            if not 0 <= grade <= 100:
+                error = "Baho 0 dan 100 gacha bo'lishi kerak"
+                break
+            items[pk] = (grade, feedback)
+        else:
+            result = bulk_grade(request.user, items)
+    elif action in BULK_STATUS_ACTIONS:
+        if action == 'revision' and not note.strip():
+            error = "Qayta ishlash uchun izoh yozing"
+        else:
+            result = bulk_set_status(request.user, [pk for pk, _, _ in rows], action, note)
+    else:
+        error = "Noma'lum amal"
+    
+    if is_json:
+        if error:
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        return JsonResponse({'success': True, **result})
+    
+    if error:
+        messages.error(request, error)
+    else:
+        done = len(result.get('graded', result.get('updated', [])))
+        messages.success(request, f"{done} ta vazifa yangilandi")
+        if result['skipped']:
+            messages.warning(request, f"{len(result['skipped'])} ta vazifa o'tkazib yuborildi (boshqa o'qituvchi tekshirmoqda)")
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('homework_submissions')
+
+
 @login_required
 def grade_homework(request, pk):
     if not (request.user.is_admin or request.user.is_teacher):
         return redirect('home')
     
-    submission = get_object_or_404(HomeworkSubmission, pk=pk)
+    submission = get_object_or_404(HomeworkSubmission.objects.select_related('claimed_by'), pk=pk)
     was_graded = submission.grade is not None
-    chat_messages = submission.messages.all().order_by('created_at')
+    chat_messages = list(submission.messages.select_related('sender').order_by('created_at'))
     revisions = submission.revisions.all()
     
     # Xabarlarni o'qilgan deb belgilash
     submission.messages.filter(is_read=False).exclude(sender=request.user).update(is_read=True)
     
+    # Navbat: ochilgan vazifani shu o'qituvchiga band qilish (yoki lease'ni uzaytirish)
+    from .grading_queue import QUEUE_STATUSES, claim_submission
+    claimed_by_other = None
+    if submission.status in QUEUE_STATUSES and not claim_submission(submission, request.user):
+        claimed_by_other = submission.claimed_by
+    
     if request.method == 'POST':
         action = request.POST.get('action')
         
+        if claimed_by_other and action in ('request_revision', 'accept', 'grade') and not request.user.is_admin:
+            messages.error(request, f"Bu vazifani hozir {claimed_by_other.full_name} tekshirmoqda")
+            return redirect('grade_homework', pk=pk)
+        
         # Xabar yuborish
         if action == 'send_message':
             message_text = request.POST.get('message', '').strip()
@@ -1463,6 +1984,8 @@ def grade_homework(request, pk):
             revision_note = request.POST.get('revision_note', '')
             submission.status = 'revision'
             submission.feedback = revision_note
+            submission.claimed_by = None
+            submission.claim_expires_at = None
             submission.save()
             
             # Xabar qoldirish
@@ -1505,20 +2028,15 @@ def grade_homework(request, pk):
                 submission.status = 'graded'
                 submission.graded_by = request.user
                 submission.graded_at = timezone.now()
+                submission.claimed_by = None
+                submission.claim_expires_at = None
                 submission.save()
                 
                 # Coin berish
                 if not submission.coin_awarded:
-                    # Vaqtida topshirganlar uchun bonus
-                    coin_amount = 5
-                    if not submission.is_late:
-                        coin_amount = 10
-                    
-                    # Yaxshi baho uchun bonus
-                    if submission.grade >= 90:
-                        coin_amount += 5
-                    elif submission.grade >= 80:
-                        coin_amount += 3
+                    # Vaqtida topshirish va yaxshi baho uchun bonus
+                    from .grading import homework_coin_amount
+                    coin_amount = homework_coin_amount(submission)
                     
                     submission.student.add_coins(coin_amount, f"Vazifa baholandi: {submission.homework.lesson.title}")
                     submission.coin_awarded = True
@@ -1535,11 +2053,28 @@ def grade_homework(request, pk):
                 on_homework_graded(submission.student, submission, submission.grade)
                 
                 messages.success(request, f"Vazifa baholandi: {submission.grade} ball!")
+                
+                # Navbatdagi keyingi band qilingan vazifaga o'tish
+                from .grading_queue import active_claims
+                next_claim = active_claims(request.user).order_by('claim_expires_at').values_list('id', flat=True).first()
+                if next_claim:
+                    return redirect('grade_homework', pk=next_claim)
                 return redirect('homework_submissions')
     
+    from .models import SimilarSubmissionPair
+    similar_submissions = [
+        (pair.second if pair.first_id == submission.pk else pair.first, pair.score)
+        for pair in SimilarSubmissionPair.objects.filter(
+            Q(first=submission) | Q(second=submission)
+        ).select_related('first__student', 'second__student')[:5]
+    ]
+    
     return render(request, 'accounts/manage/grade_homework.html', {
         'submission': submission,
+        'claimed_by_other': claimed_by_other,
+        'similar_submissions': similar_submissions,
         'chat_messages': chat_messages,
+        'last_chat_id': max((m.pk for m in chat_messages), default=0),
         'revisions': revisions,
     })
 
@@ -1548,7 +2083,7 @@ def grade_homework(request, pk):
 def homework_chat(request, pk):
     """O'quvchi uchun vazifa chat sahifasi"""
     submission = get_object_or_404(HomeworkSubmission, pk=pk, student=request.user)
-    chat_messages = submission.messages.all().order_by('created_at')
+    chat_messages = list(submission.messages.select_related('sender').order_by('created_at'))
     revisions = submission.revisions.all()
     
     # Xabarlarni o'qilgan deb belgilash
@@ -1561,7 +2096,7 @@ def homework_chat(request, pk):
         if action == 'send_message':
             message_text = request.POST.get('message', '').strip()
             message_file = request.FILES.get('message_file')
-            if message_text or message_file:
+            if (message_text or message_file) and _storage_quota_ok(request, message_file):
                 from .models import HomeworkMessage
                 HomeworkMessage.objects.create(
                     submission=submission,
@@ -1577,30 +2112,9 @@ def homework_chat(request, pk):
             new_file = request.FILES.get('new_file')
             note = request.POST.get('note', '')
             
-            if new_file:
-                from .models import HomeworkRevision
-                # Eski faylni revision sifatida saqlash
-                HomeworkRevision.objects.create(
-                    submission=submission,
-                    file=submission.file,
-                    note=f"Versiya {submission.version}"
-                )
-                
-                # Yangi faylni yuklash
-                submission.file = new_file
-                submission.version += 1
-                submission.revision_count += 1
-                submission.status = 'pending'
-                submission.submitted_at = timezone.now()
-                submission.save()
-                
-                # Xabar qoldirish
-                from .models import HomeworkMessage
-                HomeworkMessage.objects.create(
-                    submission=submission,
-                    sender=request.user,
-                    message=f"📎 Yangi versiya yuklandi (v{submission.version}). {note}"
-                )
+            if new_file and _storage_quota_ok(request, new_file):
+                # Eski fayl revision sifatida saqlanadi, yangi versiya yuklanadi
+                submission.resubmit(new_file, note)
                 
                 messages.success(request, "Vazifa qayta topshirildi!")
             return redirect('homework_chat', pk=pk)
@@ -1608,28 +2122,118 @@ def homework_chat(request, pk):
     return render(request, 'accounts/homework_chat.html', {
         'submission': submission,
         'chat_messages': chat_messages,
+        'last_chat_id': max((m.pk for m in chat_messages), default=0),
         'revisions': revisions,
     })
 
 
+def _chat_submission_for(user, pk):
+    """Chat kirish huquqi: o'quvchining o'zi yoki o'qituvchi/admin"""
+    queryset = HomeworkSubmission.objects.filter(pk=pk)
+    if not (user.is_admin or user.is_teacher):
+        queryset = queryset.filter(student=user)
+    return queryset.first()
+
+
+@login_required
+def homework_chat_delta(request, pk):
+    """Polling uchun: berilgan ID dan keyingi chat qatorlari"""
+    from .realtime import serialize_chat_message, last_event_id, DELTA_LIMIT
+
+    submission = _chat_submission_for(request.user, pk)
+    if submission is None:
+        return JsonResponse({'error': 'not found'}, status=404)
+
+    since = last_event_id(request) or 0
+    items = list(
+        submission.messages.filter(pk__gt=since).select_related('sender').order_by('pk')[:DELTA_LIMIT]
+    )
+
+    # Faqat yangi kelgan qatorlarni o'qilgan deb belgilash
+    unread_ids = [m.pk for m in items if not m.is_read and m.sender_id != request.user.pk]
+    if unread_ids:
+        submission.messages.filter(pk__in=unread_ids).update(is_read=True)
+
+    return JsonResponse({
+        'results': [serialize_chat_message(m) for m in items],
+        'last_id': items[-1].pk if items else since,
+    })
+
+
+@login_required
+async def homework_chat_stream(request, pk):
+    """SSE: vazifa chatidagi yangi qatorlar (faqat ASGI)"""
+    from asgiref.sync import sync_to_async
+    from django.http import StreamingHttpResponse, Http404
+    from .realtime import (
+        event_stream, submission_channel, is_asgi_request, last_event_id,
+        serialize_chat_message, DELTA_LIMIT,
+    )
+
+    if not is_asgi_request(request):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    submission = await sync_to_async(_chat_submission_for)(user, pk)
+    if submission is None:
+        raise Http404
+
+    since = last_event_id(request)
+
+    def missed_lines():
+        if since is None:
+            return []
+        items = submission.messages.filter(pk__gt=since).select_related('sender').order_by('pk')[:DELTA_LIMIT]
+        return [('chat', serialize_chat_message(m), m.pk) for m in items]
+
+    def mark_read(message_id):
+        submission.messages.filter(pk=message_id, is_read=False).exclude(sender=user).update(is_read=True)
+
+    async def after_event(payload):
+        if payload['data']['sender_id'] != user.pk:
+            await sync_to_async(mark_read)(payload['data']['id'])
+        return []
+
+    response = StreamingHttpResponse(
+        event_stream(
+            [submission_channel(submission.pk)],
+            initial=await sync_to_async(missed_lines)(),
+            after_event=after_event,
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def my_homework_list(request):
     """O'quvchining barcha vazifalari"""
-    submissions = HomeworkSubmission.objects.filter(student=request.user).select_related(
-        'homework__lesson__profession'
-    ).prefetch_related('messages').order_by('-submitted_at')
+    from .pagination import keyset_page
+    from .grading_queue import SUBMISSION_PAGE_SIZE
     
-    # Statistika
-    stats = {
-        'total': submissions.count(),
-        'pending': submissions.filter(status__in=['pending', 'reviewing']).count(),
-        'revision': submissions.filter(status='revision').count(),
-        'graded': submissions.filter(status='graded').count(),
-        'avg_grade': submissions.filter(grade__isnull=False).aggregate(avg=Avg('grade'))['avg'] or 0,
-    }
+    submissions = HomeworkSubmission.objects.filter(student=request.user)
+    
+    submissions_page, next_cursor = keyset_page(
+        submissions.select_related('homework__lesson__profession'),
+        cursor=request.GET.get('cursor'), limit=SUBMISSION_PAGE_SIZE, field='submitted_at',
+    )
+    _attach_unread_counts(submissions_page, Q(messages__is_read=False) & ~Q(messages__sender=request.user))
+    
+    # Statistika - bitta so'rov
+    stats = submissions.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status__in=['pending', 'reviewing'])),
+        revision=Count('id', filter=Q(status='revision')),
+        graded=Count('id', filter=Q(status='graded')),
+        avg_grade=Avg('grade'),
+    )
+    stats['avg_grade'] = stats['avg_grade'] or 0
     
     return render(request, 'accounts/my_homeworks.html', {
-        'submissions': submissions,
+        'submissions': submissions_page,
+        'next_cursor': next_cursor,
         'stats': stats,
     })
 
@@ -2596,7 +3200,7 @@ def admin_discount_delete(request, pk):
 @login_required
 def my_deploys(request):
     """O'quvchining deploy qilgan sahifalari"""
-    deploys = HTMLDeploy.objects.filter(user=request.user)
+    deploys = HTMLDeploy.objects.filter(user=request.user).defer('html_content')
     return render(request, 'accounts/coding/my_deploys.html', {'deploys': deploys})
 
 
@@ -2604,9 +3208,9 @@ def my_deploys(request):
 def create_deploy(request):
     """Yangi HTML deploy qilish"""
     import os
-    import zipfile
-    import shutil
     from django.conf import settings
+    from django.template.defaultfilters import filesizeformat
+    from .deploy_extract import DeployExtractError, deploy_archive, deploy_html, save_manifest, upload_source
     
     if request.method == 'POST':
         title = request.POST.get('title', '').strip()
@@ -2632,6 +3236,7 @@ def create_deploy(request):
             return redirect('create_deploy')
         
         deploy_type = 'html'
+        archive = None
         
         if uploaded_file:
             file_name = uploaded_file.name.lower()
@@ -2639,45 +3244,13 @@ def create_deploy(request):
             # ZIP fayl
             if file_name.endswith('.zip'):
                 deploy_type = 'project'
-                
-                # Papka yaratish
                 deploy_folder = os.path.join(settings.MEDIA_ROOT, 'deploys', request.user.username, folder_name)
-                os.makedirs(deploy_folder, exist_ok=True)
                 
-                # ZIP ni ochish
+                # Cheklovlar va kvota tekshiriladi, fayllar staging'ga ochilib siqiladi
                 try:
-                    import tempfile
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp:
-                        for chunk in uploaded_file.chunks():
-                            tmp.write(chunk)
-                        tmp_path = tmp.name
-                    
-                    with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-                        # HTML fayllarni topish
-                        html_files = [f for f in zip_ref.namelist() if f.endswith('.html') and not f.startswith('__MACOSX')]
-                        
-                        if not html_files:
-                            messages.error(request, "ZIP ichida HTML fayl topilmadi!")
-                            os.unlink(tmp_path)
-                            return redirect('create_deploy')
-                        
-                        # Agar entry_file ko'rsatilmagan bo'lsa
-                        if not entry_file or entry_file == 'index.html':
-                            # index.html ni izlash
-                            for hf in html_files:
-                                if 'index.html' in hf.lower():
-                                    entry_file = os.path.basename(hf)
-                                    break
-                            else:
-                                # Birinchi HTML ni olish
-                                entry_file = os.path.basename(html_files[0])
-                        
-                        zip_ref.extractall(deploy_folder)
-                    
-                    os.unlink(tmp_path)
-                    
-                except Exception as e:
-                    messages.error(request, f"ZIP faylni ochishda xato: {str(e)}")
+                    archive = deploy_archive(upload_source(uploaded_file), deploy_folder, request.user, entry_file)
+                except DeployExtractError as e:
+                    messages.error(request, str(e))
                     return redirect('create_deploy')
             
             # HTML fayl
@@ -2692,6 +3265,17 @@ def create_deploy(request):
             messages.error(request, "HTML kod yoki fayl yuklang!")
             return redirect('create_deploy')
         
+        # Bitta sahifa ham ZIP loyihalar kabi diskka yoziladi va fayl sifatida beriladi
+        if deploy_type == 'html':
+            deploy_folder = os.path.join(settings.MEDIA_ROOT, 'deploys', request.user.username, folder_name)
+            try:
+                archive = deploy_html(html_content, deploy_folder, request.user, entry_file)
+            except DeployExtractError as e:
+                messages.error(request, str(e))
+                return redirect('create_deploy')
+        entry_file = archive['entry_file']
+        compression = archive['compression']
+        
         # Deploy yaratish
         deploy = HTMLDeploy.objects.create(
             user=request.user,
@@ -2700,9 +3284,11 @@ def create_deploy(request):
             deploy_type=deploy_type,
             folder_name=folder_name,
             entry_file=entry_file,
-            html_content=html_content if deploy_type == 'html' else None,
             description=description,
+            assets_size=compression['original'],
+            compressed_size=compression['gzip'],
         )
+        save_manifest(deploy, archive)
         
         # Barcha foydalanuvchilarga xabar yuborish
         all_users = CustomUser.objects.filter(role='student', is_blocked=False).exclude(pk=request.user.pk)
@@ -2724,6 +3310,12 @@ def create_deploy(request):
         )
         
         messages.success(request, f"Loyiha muvaffaqiyatli deploy qilindi! URL: {deploy.get_url()}")
+        if deploy.compression_saved:
+            messages.info(
+                request,
+                f"{compression['files']} ta matnli fayl siqildi: {filesizeformat(deploy.assets_size)} → "
+                f"{filesizeformat(deploy.compressed_size)} ({deploy.compression_percent}% tejaldi)"
+            )
         return redirect('my_deploys')
     
     professions = Profession.objects.all()
@@ -2733,6 +3325,8 @@ def create_deploy(request):
 @login_required
 def edit_deploy(request, pk):
     """Deploy qilingan sahifani tahrirlash"""
+    from .deploy_extract import DeployExtractError, deploy_archive, deploy_html, save_manifest, upload_source
+    
     deploy = get_object_or_404(HTMLDeploy, pk=pk, user=request.user)
     
     if request.method == 'POST':
@@ -2745,12 +3339,46 @@ def edit_deploy(request, pk):
         html_file = request.FILES.get('html_file')
         html_content = request.POST.get('html_content', '').strip()
         
-        if html_file:
-            deploy.html_content = html_file.read().decode('utf-8', errors='ignore')
-        elif html_content:
-            deploy.html_content = html_content
+        if deploy.deploy_type == 'project':
+            # Yangi ZIP - eski fayllar yangi versiya to'liq tayyor bo'lgach almashtiriladi
+            project_zip = request.FILES.get('project_zip')
+            if project_zip:
+                if not project_zip.name.lower().endswith('.zip'):
+                    messages.error(request, "Faqat .zip fayl qabul qilinadi!")
+                    return redirect('edit_deploy', pk=deploy.pk)
+                try:
+                    archive = deploy_archive(
+                        upload_source(project_zip), deploy.get_folder_path(), request.user,
+                        deploy.entry_file, exclude_deploy=deploy,
+                    )
+                except DeployExtractError as e:
+                    messages.error(request, str(e))
+                    return redirect('edit_deploy', pk=deploy.pk)
+                deploy.entry_file = archive['entry_file']
+                deploy.assets_size = archive['compression']['original']
+                deploy.compressed_size = archive['compression']['gzip']
+                save_manifest(deploy, archive)
+        else:
+            if html_file:
+                html_content = html_file.read().decode('utf-8', errors='ignore')
+            # Kod o'zgarmagan bo'lsa fayl qayta yozilmaydi
+            if html_content and (deploy.html_content or html_content != deploy.read_html().strip()):
+                try:
+                    archive = deploy_html(
+                        html_content, deploy.get_folder_path(), request.user,
+                        deploy.entry_file, exclude_deploy=deploy,
+                    )
+                except DeployExtractError as e:
+                    messages.error(request, str(e))
+                    return redirect('edit_deploy', pk=deploy.pk)
+                deploy.entry_file = archive['entry_file']
+                deploy.html_content = None
+                deploy.assets_size = archive['compression']['original']
+                deploy.compressed_size = archive['compression']['gzip']
+                save_manifest(deploy, archive)
         
         deploy.is_active = 'is_active' in request.POST
+        # Saqlash signali marshrut va fayllar keshini tozalaydi
         deploy.save()
         
         # Activity log
@@ -2768,25 +3396,22 @@ def edit_deploy(request, pk):
     return render(request, 'accounts/coding/edit_deploy.html', {
         'deploy': deploy,
         'professions': professions,
+        'html_source': deploy.read_html() if deploy.deploy_type == 'html' else '',
     })
 
 
 @login_required
 def delete_deploy(request, pk):
     """Deploy qilingan sahifani o'chirish"""
-    import os
-    import shutil
+    from .deploy_extract import remove_deploy_folder
     
     deploy = get_object_or_404(HTMLDeploy, pk=pk, user=request.user)
     
     if request.method == 'POST':
         deploy_title = deploy.title
         
-        # Agar loyiha bo'lsa, papkani o'chirish
-        if deploy.deploy_type == 'project':
-            folder_path = deploy.get_folder_path()
-            if os.path.exists(folder_path):
-                shutil.rmtree(folder_path)
+        # Papkani o'chirish (loyiha ham, bitta sahifa ham diskda)
+        remove_deploy_folder(deploy.get_folder_path())
         
         deploy.delete()
         
@@ -2807,47 +3432,72 @@ def delete_deploy(request, pk):
 def view_deployed_page(request, username, folder_name, filepath=None):
     """Deploy qilingan sahifani ko'rsatish (login talab qilinmaydi)"""
     import os
-    import mimetypes
     from django.conf import settings
+    from django.http import Http404
+    from django.utils.cache import patch_vary_headers
+    from .deploy_cache import get_manifest, resolve_deploy, resolve_file
+    from .deploy_compression import is_compressible, pick_variant
+    from .deploy_counters import record_hit
+    from .file_serving import guess_content_type, serve_file
+    
+    # Marshrut keshdan - har bir asset uchun bazaga so'rov yo'q
+    route = resolve_deploy(username, folder_name)
+    if route is None or not route['is_active']:
+        raise Http404
+    
+    # Ko'rish - faqat asosiy sahifa; hisoblagich buferlanadi
+    is_view = not filepath or filepath == route['entry_file']
+    
+    # Bitta sahifali deploy - faqat asosiy fayl; diskka ko'chirilmagan eski deploy - bazadan
+    if route['deploy_type'] == 'html':
+        if filepath and filepath != route['entry_file']:
+            return HttpResponse("Fayl topilmadi", status=404)
+        if resolve_file(route, route['entry_file']) is None:
+            html_content = HTMLDeploy.objects.filter(pk=route['id']).values_list('html_content', flat=True).first()
+            response = HttpResponse(html_content, content_type='text/html')
+            record_hit(route['id'], len(response.content), view=is_view)
+            return response
     
-    user = get_object_or_404(CustomUser, username=username)
-    deploy = get_object_or_404(HTMLDeploy, user=user, folder_name=folder_name, is_active=True)
-    
-    # Ko'rishlar sonini oshirish (faqat asosiy sahifa uchun)
-    if not filepath or filepath == deploy.entry_file:
-        deploy.views_count += 1
-        deploy.save(update_fields=['views_count'])
-    
-    # HTML fayl (oddiy deploy)
-    if deploy.deploy_type == 'html':
-        return HttpResponse(deploy.html_content, content_type='text/html')
-    
-    # Loyiha (ZIP dan)
     if not filepath:
-        filepath = deploy.entry_file
+        filepath = route['entry_file']
     
-    # Fayl yo'lini tuzish
-    file_path = os.path.join(deploy.get_folder_path(), filepath)
+    # Fayl manifestda bo'lishi kerak - papkadan tashqariga chiqib bo'lmaydi
+    real_path = resolve_file(route, filepath)
+    if real_path is None:
+        return HttpResponse("Fayl topilmadi", status=404)
     
-    # Xavfsizlik tekshiruvi - papkadan tashqariga chiqmaslik
-    real_path = os.path.realpath(file_path)
-    deploy_folder = os.path.realpath(deploy.get_folder_path())
-    if not real_path.startswith(deploy_folder):
-        return HttpResponse("Ruxsat berilmagan", status=403)
+    # Oldindan siqilgan nusxa (.br / .gz) - Accept-Encoding bo'yicha
+    relative = os.path.relpath(real_path, route['folder_path']).replace(os.sep, '/')
+    encoding, suffix = pick_variant(request.META.get('HTTP_ACCEPT_ENCODING'), relative, get_manifest(route))
+    serve_path = real_path + suffix if encoding else real_path
     
-    if not os.path.exists(file_path):
-        return HttpResponse("Fayl topilmadi", status=404)
+    # HTML har safar qayta tekshiriladi (ETag), qolgan fayllar - keshlanadi
+    if real_path.lower().endswith(('.html', '.htm')):
+        cache_control = 'no-cache'
+    else:
+        cache_control = f"public, max-age={getattr(settings, 'DEPLOY_CACHE_MAX_AGE', 300)}"
     
-    # MIME turini aniqlash
-    mime_type, _ = mimetypes.guess_type(file_path)
-    if not mime_type:
-        mime_type = 'application/octet-stream'
+    # Front-end server uchun ichki yo'l (X-Accel-Redirect)
+    accel_path = getattr(settings, 'DEPLOY_ACCEL_PREFIX', '/_deploys/') + f"{username}/{folder_name}/" + relative + (suffix or '')
     
-    # Faylni o'qish va qaytarish
-    with open(file_path, 'rb') as f:
-        content = f.read()
+    try:
+        response = serve_file(
+            request, serve_path, content_type=guess_content_type(real_path),
+            cache_control=cache_control, accel_path=accel_path, content_encoding=encoding,
+            filename=os.path.basename(real_path),
+        )
+    except FileNotFoundError:
+        # Manifest eskirgan (fayl diskdan o'chirilgan)
+        return HttpResponse("Fayl topilmadi", status=404)
+    if is_compressible(relative):
+        patch_vary_headers(response, ('Accept-Encoding',))
     
-    return HttpResponse(content, content_type=mime_type)
+    if response.has_header('X-Accel-Redirect') or response.has_header('X-Sendfile'):
+        bytes_sent = os.path.getsize(serve_path)
+    else:
+        bytes_sent = int(response.get('Content-Length') or 0)
+    record_hit(route['id'], bytes_sent, view=is_view)
+    return response
 
 
 # ==================== ADMIN: HTML DEPLOYS ====================
@@ -2859,7 +3509,7 @@ def admin_deploys(request):
         messages.error(request, "Sizda bu sahifaga kirish huquqi yo'q!")
         return redirect('home')
     
-    deploys = HTMLDeploy.objects.select_related('user', 'profession').all()
+    deploys = HTMLDeploy.objects.select_related('user', 'profession').defer('html_content')
     
     # Filterlar
     user_id = request.GET.get('user')
@@ -2878,12 +3528,47 @@ def admin_deploys(request):
     
     users = CustomUser.objects.filter(deploys__isnull=False).distinct()
     
+    # Trafik - faqat kunlik yig'indilar jadvalidan
+    from .deploy_counters import flush
+    from .models import DeployTraffic
+    flush()
+    today = timezone.localdate()
+    week_ago = today - timedelta(days=6)
+    deploys = deploys.annotate(
+        week_hits=Sum('traffic__hits', filter=Q(traffic__date__gte=week_ago)),
+        week_bytes=Sum('traffic__bytes_sent', filter=Q(traffic__date__gte=week_ago)),
+    )
+    
+    trend_from = today - timedelta(days=13)
+    by_day = {
+        row['date']: row for row in
+        DeployTraffic.objects.filter(date__gte=trend_from).values('date').annotate(
+            views=Sum('views'), hits=Sum('hits'), bytes_sent=Sum('bytes_sent'),
+        )
+    }
+    traffic_trend = []
+    for offset in range(14):
+        day = trend_from + timedelta(days=offset)
+        row = by_day.get(day, {})
+        traffic_trend.append({
+            'date': day,
+            'views': row.get('views') or 0,
+            'hits': row.get('hits') or 0,
+            'bytes_sent': row.get('bytes_sent') or 0,
+        })
+    max_hits = max((row['hits'] for row in traffic_trend), default=0) or 1
+    for row in traffic_trend:
+        row['percent'] = round(row['hits'] * 100 / max_hits)
+    
     context = {
         'deploys': deploys,
         'users': users,
         'total_deploys': HTMLDeploy.objects.count(),
         'active_deploys': HTMLDeploy.objects.filter(is_active=True).count(),
         'total_views': HTMLDeploy.objects.aggregate(total=Sum('views_count'))['total'] or 0,
+        'traffic_trend': traffic_trend,
+        'week_hits': sum(row['hits'] for row in traffic_trend[-7:]),
+        'week_bytes': sum(row['bytes_sent'] for row in traffic_trend[-7:]),
     }
     return render(request, 'accounts/admin/deploys.html', context)
 
@@ -2906,12 +3591,15 @@ def admin_deploy_toggle(request, pk):
 @login_required
 def admin_deploy_delete(request, pk):
     """Admin: Deployni o'chirish"""
+    from .deploy_extract import remove_deploy_folder
+    
     if not request.user.is_admin:
         return redirect('home')
     
-    deploy = get_object_or_404(HTMLDeploy, pk=pk)
+    deploy = get_object_or_404(HTMLDeploy.objects.defer('html_content'), pk=pk)
     
     if request.method == 'POST':
+        remove_deploy_folder(deploy.get_folder_path())
         deploy.delete()
         messages.success(request, "Deploy o'chirildi!")
         return redirect('admin_deploys')
@@ -2919,6 +3607,57 @@ def admin_deploy_delete(request, pk):
     return render(request, 'accounts/admin/deploy_delete.html', {'deploy': deploy})
 
 
+# ==================== ADMIN: XOTIRA ====================
+
+@login_required
+def admin_storage(request):
+    """Admin: Foydalanuvchilar egallagan joy - eng ko'p ishlatuvchilar"""
+    if not request.user.is_admin:
+        messages.error(request, "Sizda bu sahifaga kirish huquqi yo'q!")
+        return redirect('home')
+    
+    from .models import StorageUsage
+    from .storage_usage import get_quota
+    
+    categories = StorageUsage.CATEGORIES
+    category = request.GET.get('category')
+    usage = StorageUsage.objects.all()
+    if category in dict(categories):
+        usage = usage.filter(category=category)
+    
+    top = list(
+        usage.values('user').annotate(total=Sum('bytes')).filter(total__gt=0).order_by('-total')[:50]
+    )
+    users = CustomUser.objects.in_bulk([row['user'] for row in top])
+    by_category = {}
+    for user_id, cat, size in StorageUsage.objects.filter(user_id__in=users).values_list('user_id', 'category', 'bytes'):
+        by_category.setdefault(user_id, {})[cat] = size
+    
+    quota = get_quota()
+    max_total = top[0]['total'] if top else 1
+    consumers = []
+    for row in top:
+        sizes = by_category.get(row['user'], {})
+        consumers.append({
+            'user': users.get(row['user']),
+            'total': row['total'],
+            'sizes': [(label, sizes.get(key, 0)) for key, label in categories],
+            'percent': round(row['total'] * 100 / max_total),
+            'quota_percent': round(sum(sizes.values()) * 100 / quota) if quota else None,
+        })
+    
+    totals = dict(StorageUsage.objects.values('category').annotate(total=Sum('bytes')).values_list('category', 'total'))
+    context = {
+        'consumers': consumers,
+        'categories': categories,
+        'category_totals': [(key, label, totals.get(key) or 0) for key, label in categories],
+        'grand_total': sum(totals.values()),
+        'quota': quota,
+        'selected_category': category,
+    }
+    return render(request, 'accounts/admin/storage.html', context)
+
+
 # ==================== ADMIN: DARSLAR STATISTIKASI ====================
 
 @login_required
@@ -3525,6 +4264,12 @@ def generate_report(request):
         total_deploys = HTMLDeploy.objects.count()
         new_deploys = HTMLDeploy.objects.filter(created_at__date__gte=date_from, created_at__date__lte=date_to).count()
         deploy_views = HTMLDeploy.objects.aggregate(total=Sum('views_count'))['total'] or 0
+        from .deploy_counters import flush
+        from .models import DeployTraffic
+        flush()
+        deploy_traffic = DeployTraffic.objects.filter(date__gte=date_from, date__lte=date_to).aggregate(
+            views=Sum('views'), hits=Sum('hits'), bytes_sent=Sum('bytes_sent'),
+        )
         
         # Coin
         total_coins = CustomUser.objects.aggregate(total=Sum('coins'))['total'] or 0
@@ -3568,6 +4313,9 @@ def generate_report(request):
             total_deploys=total_deploys,
             new_deploys=new_deploys,
             deploy_views=deploy_views,
+            deploy_period_views=deploy_traffic['views'] or 0,
+            deploy_hits=deploy_traffic['hits'] or 0,
+            deploy_bytes=deploy_traffic['bytes_sent'] or 0,
             total_coins=total_coins,
             coins_earned=coins_earned,
             coins_spent=abs(coins_spent),
@@ -3594,6 +4342,7 @@ def generate_report_pdf(report):
     from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
     from io import BytesIO
     from django.core.files.base import ContentFile
+    from django.template.defaultfilters import filesizeformat
     
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=30, bottomMargin=30)
@@ -3676,8 +4425,29 @@ def generate_report_pdf(report):
         ['Jami loyihalar', str(report.total_deploys)],
         ['Yangi loyihalar (davr)', str(report.new_deploys)],
         ["Jami ko'rishlar", str(report.deploy_views)],
+        ["Ko'rishlar (davr)", str(report.deploy_period_views)],
+        ["So'rovlar (davr)", str(report.deploy_hits)],
+        ['Trafik (davr)', filesizeformat(report.deploy_bytes)],
     ]
     elements.append(create_table(deploy_data))
+    
+    # Davrdagi eng ko'p ko'rilgan loyihalar
+    from .models import DeployTraffic
+    top_deploys = (
+        DeployTraffic.objects.filter(date__gte=report.date_from, date__lte=report.date_to)
+        .values('deploy__title', 'deploy__user__username')
+        .annotate(views=Sum('views'), hits=Sum('hits'), bytes_sent=Sum('bytes_sent'))
+        .order_by('-views', '-hits')[:5]
+    )
+    if top_deploys:
+        elements.append(Spacer(1, 10))
+        top_data = [['Loyiha', "Ko'rishlar", "So'rovlar", 'Trafik']]
+        for row in top_deploys:
+            top_data.append([
+                f"{row['deploy__title'][:40]} (@{row['deploy__user__username']})",
+                str(row['views']), str(row['hits']), filesizeformat(row['bytes_sent']),
+            ])
+        elements.append(create_table(top_data, col_widths=[240, 70, 70, 70]))
     elements.append(Spacer(1, 15))
     
     # 5. Coinlar
@@ -0,0 +1,120 @@
+"""
+Vazifalarni ZIP arxiv sifatida oqim (stream) bilan yuklab berish
+Arxiv diskka ham, xotiraga ham to'liq yig'ilmaydi: zipfile "seek qilib
+bo'lmaydigan" oqimga yozadi, har bir blok darhol javobga uzatiladi.
+"""
+import os
+import zipfile
+from datetime import datetime
+
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+READ_BLOCK = 256 * 1024
+
+# Allaqachon siqilgan formatlar qayta siqilmaydi
+STORED_EXTENSIONS = {
+    '.zip', '.rar', '.7z', '.gz', '.bz2', '.xz', '.png', '.jpg', '.jpeg', '.gif', '.webp',
+    '.mp4', '.mp3', '.pdf', '.docx', '.xlsx', '.pptx',
+}
+
+
+class _StreamBuffer:
+    """zipfile uchun yozish nishoni: tell/seek yo'q - zipfile data descriptor ishlatadi"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def latest_submissions(queryset):
+    """Har bir (vazifa, o'quvchi) uchun faqat eng oxirgi topshiriq"""
+    seen = set()
+    for submission in queryset.order_by('homework_id', 'student_id', '-submitted_at', '-id').iterator():
+        key = (submission.homework_id, submission.student_id)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield submission
+
+
+def archive_name(submission, with_lesson_folder=False):
+    """Arxiv ichidagi nom: O'quvchi_Ismi_username_v2.zip (kerak bo'lsa dars papkasida)"""
+    student = submission.student
+    ext = os.path.splitext(submission.file.name)[1].lower()
+    name = get_valid_filename(f"{student.full_name or student.username}_{student.username}_v{submission.version}") or f"submission_{submission.pk}"
+    if with_lesson_folder:
+        lesson = submission.homework.lesson
+        folder = get_valid_filename(f"{lesson.order:02d}_{lesson.title}") or f"homework_{submission.homework_id}"
+        return f"{folder}/{name}{ext}"
+    return f"{name}{ext}"
+
+
+def stream_submissions_zip(submissions, with_lesson_folder=False):
+    """
+    ZIP baytlarini bo'lak-bo'lak qaytaruvchi generator.
+    Xotirada faqat joriy blok va markaziy katalog yozuvlari turadi.
+    """
+    sink = _StreamBuffer()
+    used_names = set()
+    missing = []
+
+    with zipfile.ZipFile(sink, mode='w', allowZip64=True) as archive:
+        for submission in submissions:
+            if not submission.file:
+                continue
+            storage = submission.file.storage
+            name = archive_name(submission, with_lesson_folder)
+            if name in used_names:
+                root, ext = os.path.splitext(name)
+                name = f"{root}_{submission.pk}{ext}"
+            used_names.add(name)
+
+            try:
+                size = storage.size(submission.file.name)
+                source = storage.open(submission.file.name, 'rb')
+            except (OSError, NotImplementedError):
+                missing.append(name)
+                continue
+
+            info = zipfile.ZipInfo(name, date_time=_zip_time(submission.submitted_at))
+            info.file_size = size
+            ext = os.path.splitext(name)[1]
+            info.compress_type = zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+            with source, archive.open(info, mode='w') as target:
+                while True:
+                    block = source.read(READ_BLOCK)
+                    if not block:
+                        break
+                    target.write(block)
+                    chunk = sink.pop()
+                    if chunk:
+                        yield chunk
+            # Data descriptor (CRC va hajm) fayl yopilganda yoziladi
+            yield sink.pop()
+
+        if missing:
+            archive.writestr('_topilmadi.txt', "Quyidagi fayllar serverda topilmadi:\n" + "\n".join(missing))
+
+    yield sink.pop()
+
+
+def _zip_time(value):
+    if value is None:
+        value = timezone.now()
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = max(value.replace(tzinfo=None), datetime(1980, 1, 1))
+    return value.timetuple()[:6]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ChatSession, ChatMessage
+from .models import ChatSession, ChatMessage, AICall, CachedResponse
 
 
 class ChatMessageInline(admin.TabularInline):
@@ -24,11 +24,26 @@ class ChatSessionAdmin(admin.ModelAdmin):
 
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
-    list_display = ['session', 'role', 'short_content', 'coins_spent', 'created_at']
-    list_filter = ['role', 'created_at']
+    list_display = ['session', 'role', 'short_content', 'coins_spent', 'cached', 'created_at']
+    list_filter = ['role', 'cached', 'created_at']
     search_fields = ['content', 'session__user__username']
     readonly_fields = ['created_at']
     
     def short_content(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
     short_content.short_description = "Xabar"
+
+
+@admin.register(AICall)
+class AICallAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'use_case', 'model', 'provider', 'status', 'attempts', 'latency_ms', 'prompt_tokens', 'completion_tokens']
+    list_filter = ['status', 'use_case', 'model', 'provider', 'created_at']
+    readonly_fields = [f.name for f in AICall._meta.fields]
+
+
+@admin.register(CachedResponse)
+class CachedResponseAdmin(admin.ModelAdmin):
+    list_display = ['prompt', 'scope', 'hits', 'model', 'last_hit_at', 'expires_at']
+    list_filter = ['scope', 'model']
+    search_fields = ['prompt', 'response']
+    exclude = ['vector']
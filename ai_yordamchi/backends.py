@@ -0,0 +1,401 @@
+"""
+Chat model backends.
+
+A provider makes the raw calls: ``openai`` talks to the OpenAI API through
+one pooled HTTP client per process (per event loop for ``stream``), ``fake``
+is a local, deterministic stub - no network, no API key - with optional
+latency and failure rate, so the whole assistant can be load-tested offline.
+The provider is chosen with the AI_BACKEND setting.
+
+``Backend`` wraps a provider with what every call needs: the model for the
+use case (AI_MODELS), bounded retries with jitter for transient errors, a
+process-wide circuit breaker that fails fast while the upstream is down,
+and per-call latency/token metrics (metrics.py).
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+import weakref
+from collections import deque, namedtuple
+
+from django.conf import settings
+
+from . import metrics
+
+Usage = namedtuple('Usage', 'prompt_tokens completion_tokens')
+
+
+class ProviderUnavailable(Exception):
+    """The circuit breaker is open - the call was not attempted."""
+
+
+class FakeProviderError(Exception):
+    def __init__(self, message, transient=True):
+        super().__init__(message)
+        self.transient = transient
+
+
+def get_model(use_case):
+    models = getattr(settings, 'AI_MODELS', {})
+    return models.get(use_case) or getattr(settings, 'AI_MODEL', 'gpt-4o-mini')
+
+
+# ==================== PROVIDERS ====================
+
+_client_lock = threading.Lock()
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _pool_limits():
+    import httpx
+
+    size = getattr(settings, 'AI_POOL_SIZE', 20)
+    return httpx.Limits(max_connections=size, max_keepalive_connections=size)
+
+
+class OpenAIProvider:
+    name = 'openai'
+
+    def __init__(self, api_key, timeout):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def client(self):
+        """Process-wide client; connections are kept alive between requests."""
+        global _sync_client
+        if _sync_client is None:
+            import httpx
+            from openai import OpenAI
+
+            with _client_lock:
+                if _sync_client is None:
+                    _sync_client = OpenAI(
+                        api_key=self.api_key,
+                        timeout=self.timeout,
+                        max_retries=0,  # retries are done by Backend
+                        http_client=httpx.Client(limits=_pool_limits(), timeout=self.timeout),
+                    )
+        return _sync_client
+
+    def async_client(self):
+        """One client per event loop - an async connection pool cannot move between loops."""
+        loop = asyncio.get_running_loop()
+        client = _async_clients.get(loop)
+        if client is None:
+            import httpx
+            from openai import AsyncOpenAI
+
+            client = _async_clients[loop] = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=_pool_limits(), timeout=self.timeout),
+            )
+        return client
+
+    def is_transient(self, error):
+        import openai
+
+        if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409)
+
+    def complete(self, messages, model, max_tokens):
+        response = self.client().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+        )
+        usage = response.usage and Usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content or '', usage
+
+    async def stream(self, messages, model, max_tokens):
+        """Yield text deltas as the model generates them, then the Usage."""
+        stream = await self.async_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.usage:
+                yield Usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+
+
+class FakeProvider:
+    """Echoes the last user message back, one word per token."""
+    name = 'fake'
+
+    def __init__(self, delay=0.0, failure_rate=0.0, seed=0):
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def reply(self, messages):
+        text, images = '', 0
+        for message in reversed(messages):
+            if message['role'] != 'user':
+                continue
+            if isinstance(message['content'], list):
+                text = ' '.join(part['text'] for part in message['content'] if part['type'] == 'text')
+                images = sum(1 for part in message['content'] if part['type'] == 'image_url')
+            else:
+                text = message['content']
+            break
+        reply = f"Bu sinov javobi.\n\nSiz yozdingiz: {text}"
+        if images:
+            reply += f" ({images} ta rasm bilan)"
+        return reply
+
+    def tokens(self, messages, max_tokens):
+        return re.findall(r'\S+\s*|\s+', self.reply(messages))[:max_tokens]
+
+    def usage(self, messages, tokens):
+        prompt = sum(len(str(message['content'])) for message in messages) // 4
+        return Usage(prompt, len(tokens))
+
+    def should_fail(self):
+        with self.lock:
+            return self.failure_rate and self.random.random() < self.failure_rate
+
+    def is_transient(self, error):
+        return getattr(error, 'transient', False)
+
+    def complete(self, messages, model, max_tokens):
+        tokens = self.tokens(messages, max_tokens)
+        if self.should_fail():
+            # An upstream error still costs a round trip
+            time.sleep(self.delay)
+            raise FakeProviderError("fake upstream error")
+        if self.delay:
+            time.sleep(self.delay * len(tokens))
+        return ''.join(tokens), self.usage(messages, tokens)
+
+    async def stream(self, messages, model, max_tokens):
+        tokens = self.tokens(messages, max_tokens)
+        if self.should_fail():
+            await asyncio.sleep(self.delay)
+            raise FakeProviderError("fake upstream error")
+        for token in tokens:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield token
+        yield self.usage(messages, tokens)
+
+
+# ==================== CIRCUIT BREAKER ====================
+
+class CircuitBreaker:
+    """
+    closed -> (of the last AI_BREAKER_WINDOW calls, at least AI_BREAKER_FAILURES
+    and at least half failed) -> open: calls fail at once for
+    AI_BREAKER_COOLDOWN seconds -> half open: one trial call; success closes
+    the breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold, cooldown, window=20):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.outcomes = deque(maxlen=max(window, threshold))
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half_open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        """'closed' or 'trial' if the call may go ahead, None if it must fail fast."""
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return state
+            if state == 'half_open' and not self.trial:
+                self.trial = True
+                return 'trial'
+            return None
+
+    def success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                self.outcomes.clear()
+            self.outcomes.append(True)
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.outcomes.append(False)
+            failures = self.outcomes.count(False)
+            if self.trial or (failures >= self.threshold and failures * 2 >= len(self.outcomes)):
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+    def release(self):
+        """The call ended without a verdict (e.g. cancelled) - let another trial in."""
+        with self.lock:
+            self.trial = False
+
+
+_breakers = {}
+
+
+def get_breaker(name):
+    with _client_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(
+                threshold=getattr(settings, 'AI_BREAKER_FAILURES', 5),
+                cooldown=getattr(settings, 'AI_BREAKER_COOLDOWN', 30),
+                window=getattr(settings, 'AI_BREAKER_WINDOW', 20),
+            )
+        return breaker
+
+
+# ==================== BACKEND ====================
+
+class Backend:
+    def __init__(self, provider, breaker, retries, base_delay, max_delay):
+        self.provider = provider
+        self.breaker = breaker
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @property
+    def name(self):
+        return self.provider.name
+
+    def backoff(self, attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def should_retry(self, error, attempt):
+        """Count the failure for the breaker; True if another attempt is worth it."""
+        if not self.provider.is_transient(error):
+            # The upstream answered (e.g. 400) - it is not down
+            self.breaker.success()
+            return False
+        self.breaker.failure()
+        return attempt <= self.retries
+
+    def complete(self, messages, max_tokens, use_case='chat'):
+        model = get_model(use_case)
+        started = time.monotonic()
+        attempt, status, usage, trial = 0, 'error', None, False
+        try:
+            while True:
+                permit = self.breaker.allow()
+                if permit is None:
+                    status = 'rejected'
+                    raise ProviderUnavailable(f"{self.name}: circuit open")
+                trial = trial or permit == 'trial'
+                attempt += 1
+                try:
+                    text, usage = self.provider.complete(messages, model, max_tokens)
+                except Exception as e:
+                    if not self.should_retry(e, attempt):
+                        raise
+                    time.sleep(self.backoff(attempt))
+                    continue
+                self.breaker.success()
+                status = 'ok'
+                return text
+        finally:
+            if trial:
+                self.breaker.release()
+            if metrics.record(self.name, model, use_case, status, attempt, time.monotonic() - started, usage):
+                metrics.flush()
+
+    async def stream(self, messages, max_tokens, use_case='chat'):
+        """Yield text deltas. Retries only happen before the first token."""
+        from asgiref.sync import sync_to_async
+
+        model = get_model(use_case)
+        started = time.monotonic()
+        # 'cancelled' stays if the client goes away mid-stream
+        attempt, status, usage, sent, trial = 0, 'cancelled', None, False, False
+        try:
+            while True:
+                permit = self.breaker.allow()
+                if permit is None:
+                    status = 'rejected'
+                    raise ProviderUnavailable(f"{self.name}: circuit open")
+                trial = trial or permit == 'trial'
+                attempt += 1
+                try:
+                    async for item in self.provider.stream(messages, model, max_tokens):
+                        if isinstance(item, Usage):
+                            usage = item
+                            continue
+                        if not sent:
+                            # The upstream answers - whatever happens next, it is not down
+                            self.breaker.success()
+                            sent = True
+                        yield item
+                except Exception as e:
+                    if sent or not self.should_retry(e, attempt):
+                        status = 'error'
+                        raise
+                    await asyncio.sleep(self.backoff(attempt))
+                    continue
+                self.breaker.success()
+                status = 'ok'
+                return
+        finally:
+            if trial:
+                self.breaker.release()
+            if metrics.record(self.name, model, use_case, status, attempt, time.monotonic() - started, usage):
+                await sync_to_async(metrics.flush)()
+
+
+_fake_providers = {}
+
+
+def get_provider():
+    """Configured provider, or None when the AI service is not available."""
+    name = getattr(settings, 'AI_BACKEND', 'openai')
+    if name == 'fake':
+        # One per process, so the seeded failure sequence runs on across requests
+        config = (
+            getattr(settings, 'AI_FAKE_TOKEN_DELAY', 0.02),
+            getattr(settings, 'AI_FAKE_FAILURE_RATE', 0.0),
+            getattr(settings, 'AI_FAKE_SEED', 0),
+        )
+        with _client_lock:
+            if config not in _fake_providers:
+                _fake_providers[config] = FakeProvider(*config)
+            return _fake_providers[config]
+
+    api_key = getattr(settings, 'OPENAI_API_KEY', None)
+    if not api_key:
+        return None
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        return None
+    return OpenAIProvider(api_key=api_key, timeout=getattr(settings, 'AI_TIMEOUT', 30))
+
+
+def get_backend():
+    """Configured backend, or None when the AI service is not available."""
+    provider = get_provider()
+    if provider is None:
+        return None
+    return Backend(
+        provider,
+        get_breaker(provider.name),
+        retries=getattr(settings, 'AI_MAX_RETRIES', 2),
+        base_delay=getattr(settings, 'AI_RETRY_BASE_DELAY', 0.5),
+        max_delay=getattr(settings, 'AI_RETRY_MAX_DELAY', 4),
+    )
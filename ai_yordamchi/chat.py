@@ -0,0 +1,205 @@
+"""
+One chat turn, shared by the form post and the streaming endpoint:
+validate -> save the user message and charge a coin -> answer from the
+response cache or build the model context (context.py) and call the
+model -> save the assistant reply.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from coin.models import ActivityLog
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE_REPLY = "⚠️ AI xizmati hozirda mavjud emas. Iltimos, keyinroq urinib ko'ring."
+
+SYSTEM_PROMPT = """Siz LMS o'quv platformasining AI yordamchisisiz. O'zbek tilida javob bering.
+
+JAVOB FORMATI:
+
+1. STRUKTURA:
+   - Avval qisqa tushuntirish (1-2 gap)
+   - Keyin kod bloklari
+   - Oxirida "Qanday ishlatish" bo'limi
+
+2. KOD BLOKLARI:
+   - Har doim Markdown code block ishlatilsin
+   - Code block boshida til nomi bo'lsin: ```python, ```html, ```css, ```javascript
+   - Kod ichida oddiy matn bo'lmasin
+   - Izohlar faqat kod tashqarisida
+
+3. KO'P FAYLLAR:
+   - Har bir fayl alohida sarlavha bilan:
+   
+   **HTML (index.html)**
+   ```html
+   <h1>Salom</h1>
+   ```
+   
+   **CSS (style.css)**
+   ```css
+   h1 { color: red; }
+   ```
+
+4. FORMATLASH:
+   - Havolalar: [matn](URL)
+   - Ro'yxatlar: - yoki 1. 2. 3.
+   - Muhim so'zlar: **qalin**
+
+5. USLUB:
+   - Boshlovchilar uchun tushunarli
+   - Do'stona va rag'batlantiruvchi
+   - Qisqa va aniq
+
+6. TAQIQLANGAN:
+   - < yoki > belgilarini escape qilish
+   - \\n yoki \\u000A ko'rinishlar
+   - Kod ichida tushuntirish yozish"""
+
+
+def get_max_tokens():
+    return getattr(settings, 'AI_MAX_TOKENS', 2000)
+
+
+def error_reply(error):
+    """User-facing text for a failed call; details go to the log, not to the user."""
+    from .backends import ProviderUnavailable
+
+    if isinstance(error, ProviderUnavailable):
+        return UNAVAILABLE_REPLY
+    return "⚠️ AI javob bera olmadi. Iltimos, birozdan keyin qayta urinib ko'ring."
+
+
+def validate_turn(user, content, image):
+    """Error message for the user, or None if the turn may start."""
+    if not content and not image:
+        return "Xabar yoki rasm yuborishingiz kerak."
+    if image:
+        from accounts.storage_usage import check_quota, StorageQuotaError
+        from .images import validate_upload
+        error = validate_upload(image)
+        if error:
+            return error
+        try:
+            check_quota(user, image.size)
+        except StorageQuotaError as e:
+            return str(e)
+    if user.coins < 1:
+        return "Sizda yetarli coin yo'q. AI bilan suhbatlashish uchun 1 coin kerak."
+    return None
+
+
+@transaction.atomic
+def start_turn(user, session, content, image, ip_address):
+    """Save the user message, deduct the coin and log it."""
+    if image:
+        from .images import upload_name
+        image.name = upload_name(image.name)
+    user_message = ChatMessage.objects.create(
+        session=session,
+        role='user',
+        content=content,
+        image=image,
+        coins_spent=1,
+    )
+    if user_message.image:
+        # Downscale/re-encode in the process pool once the message is committed
+        from .images import schedule_processing
+        storage, name = user_message.image.storage, user_message.image.name
+        transaction.on_commit(lambda: schedule_processing(user_message.pk, storage, name))
+    
+    # Deduct coin and log transaction
+    user.remove_coins(1, "AI yordamchi bilan suhbat")
+    
+    # Log activity
+    ActivityLog.objects.create(
+        user=user,
+        action_type='earn_coins',
+        description="AI yordamchi bilan suhbatlashdi (-1 coin)",
+        ip_address=ip_address
+    )
+    
+    # Update session title if first message
+    if session.messages.count() == 1 and content:
+        session.title = content[:50] + ('...' if len(content) > 50 else '')
+        session.save()
+    
+    return user_message
+
+
+def finish_turn(session, text, cached=False):
+    """Save the assistant reply."""
+    return ChatMessage.objects.create(
+        session=session,
+        role='assistant',
+        content=text,
+        cached=cached,
+    )
+
+
+def answer_turn(session, user_message, backend):
+    """Reply for the plain form post: from the cache, or a blocking model call."""
+    from .backends import get_model
+    from .context import build_context
+    from .response_cache import lookup, store
+
+    cached = lookup(session, user_message)
+    if cached and cached.response:
+        return finish_turn(session, cached.response, cached=True)
+
+    if not backend:
+        return finish_turn(session, UNAVAILABLE_REPLY)
+    try:
+        text = backend.complete(build_context(session, backend), get_max_tokens())
+    except Exception as e:
+        logger.exception("AI request failed")
+        return finish_turn(session, error_reply(e))
+    store(cached, text, get_model('chat'))
+    return finish_turn(session, text)
+
+
+async def reply_stream(session, user_message, backend, history, cached=None):
+    """
+    Server-sent events for one reply: ``start``, ``token`` per text delta,
+    ``done`` with the saved message id. The reply is saved when the stream
+    ends; if the client goes away mid-stream, whatever was generated is kept.
+    ``cached`` is the response cache lookup: a hit is sent as one token, a
+    complete model answer to a miss is stored.
+    """
+    from asgiref.sync import sync_to_async
+    from accounts.realtime import format_sse
+    from .backends import get_model
+    from .response_cache import store
+
+    parts = []
+    saved = False
+    from_cache = bool(cached and cached.response)
+    try:
+        yield format_sse('start', {'user_message': user_message.pk})
+        if from_cache:
+            parts.append(cached.response)
+            yield format_sse('token', {'text': cached.response})
+        elif backend is None:
+            parts.append(UNAVAILABLE_REPLY)
+            yield format_sse('token', {'text': UNAVAILABLE_REPLY})
+        else:
+            try:
+                async for token in backend.stream(history, get_max_tokens()):
+                    parts.append(token)
+                    yield format_sse('token', {'text': token})
+            except Exception as e:
+                logger.exception("AI stream failed")
+                text = ('\n\n' if parts else '') + error_reply(e)
+                parts.append(text)
+                yield format_sse('token', {'text': text})
+            else:
+                await sync_to_async(store)(cached, ''.join(parts), get_model('chat'))
+        message = await sync_to_async(finish_turn)(session, ''.join(parts), from_cache)
+        saved = True
+        yield format_sse('done', {'id': message.pk})
+    finally:
+        if not saved and parts:
+            await sync_to_async(finish_turn)(session, ''.join(parts))
@@ -0,0 +1,218 @@
+"""
+Model context for a chat turn, kept within a token budget.
+
+Recent messages are sent verbatim. When they no longer fit in
+AI_CONTEXT_TOKENS, the oldest ones are folded into a rolling summary stored
+on the session (``summary`` / ``summary_until``) and never read again, so
+building the context costs the same for the 10th and the 1000th turn.
+Folding goes down to half the budget, so it happens once every few turns,
+not on every send.
+
+Images are sent as the processed variant from images.py (downscaled,
+re-encoded once after upload); its data URL is kept in the cache.
+"""
+import base64
+import logging
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .chat import SYSTEM_PROMPT
+from .images import ensure_processed, mime_type
+from .models import ChatMessage, ChatSession
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD = 4
+SUMMARY_LINE_CHARS = 160
+SUMMARY_INPUT_CHARS = 1000
+
+SUMMARY_PROMPT = (
+    "Siz suhbat xulosasini yozasiz. Oldingi xulosa va suhbatning yangi qismini "
+    "qisqa, bandma-band xulosaga birlashtiring: foydalanuvchi nima so'radi, "
+    "qanday javob va kod berildi, qaysi savollar ochiq qoldi. Faqat xulosani yozing."
+)
+
+
+def get_context_budget():
+    return getattr(settings, 'AI_CONTEXT_TOKENS', 6000)
+
+
+def get_summary_budget():
+    return getattr(settings, 'AI_SUMMARY_TOKENS', 600)
+
+
+def get_image_tokens():
+    return getattr(settings, 'AI_IMAGE_TOKENS', 765)
+
+
+# ==================== TOKENS ====================
+
+_encoding = None
+
+
+def estimate_tokens(text):
+    """Token count: tiktoken if installed, otherwise about 4 characters per token."""
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding('o200k_base')
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(content, has_image):
+    return MESSAGE_OVERHEAD + estimate_tokens(content) + (get_image_tokens() if has_image else 0)
+
+
+def prompt_tokens(history):
+    """Estimated prompt size of a list of API messages."""
+    total = 0
+    for message in history:
+        content = message['content']
+        if isinstance(content, list):
+            text = ' '.join(part['text'] for part in content if part['type'] == 'text')
+            images = sum(1 for part in content if part['type'] == 'image_url')
+            total += MESSAGE_OVERHEAD + estimate_tokens(text) + images * get_image_tokens()
+        else:
+            total += message_tokens(content, False)
+    return total
+
+
+# ==================== IMAGES ====================
+
+def image_data_url(storage, name, message_id=None):
+    """data: URL of the processed image (images.py); read once, then served from the cache."""
+    key = f'ai_image:{name}'
+    url = cache.get(key)
+    if url:
+        return url
+
+    processed = ensure_processed(storage, name, message_id)
+    if processed is None:
+        return None
+    with storage.open(processed, 'rb') as f:
+        data = f.read()
+    url = f"data:{mime_type(processed)};base64,{base64.b64encode(data).decode('ascii')}"
+    cache.set(key, url, getattr(settings, 'AI_IMAGE_CACHE_TIMEOUT', 3600))
+    return url
+
+
+# ==================== ROLLING SUMMARY ====================
+
+def _clip(text, limit):
+    text = re.sub(r'```.*?(```|$)', ' [kod] ', text or '', flags=re.S)
+    text = ' '.join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def _transcript(messages, limit):
+    lines = []
+    for role, content, image in messages:
+        speaker = 'Foydalanuvchi' if role == 'user' else 'AI'
+        text = _clip(content, limit)
+        if image:
+            text = f"[rasm] {text}".strip()
+        if text:
+            lines.append(f"- {speaker}: {text}")
+    return lines
+
+
+def _fit_summary(text):
+    """Keep the newest lines of the summary that fit in AI_SUMMARY_TOKENS."""
+    budget = get_summary_budget()
+    lines = [line for line in text.splitlines() if line.strip()]
+    kept, used = [], 0
+    for line in reversed(lines):
+        used += estimate_tokens(line) + 1
+        if used > budget:
+            break
+        kept.append(line)
+    return '\n'.join(reversed(kept))
+
+
+def summarize(previous, messages, backend=None):
+    """
+    Fold messages (role, content, image) into the previous summary.
+    With a backend the model writes the summary; without one, or if the call
+    fails, each message contributes one clipped line.
+    """
+    if backend is not None:
+        transcript = '\n'.join(_transcript(messages, SUMMARY_INPUT_CHARS))
+        prompt = f"Oldingi xulosa:\n{previous or '-'}\n\nSuhbatning yangi qismi:\n{transcript}"
+        try:
+            text = backend.complete(
+                [{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": prompt}],
+                get_summary_budget(),
+                use_case='summary',
+            )
+            if text.strip():
+                return _fit_summary(text)
+        except Exception:
+            logger.exception("AI context: summary request failed")
+
+    lines = previous.splitlines() if previous else []
+    return _fit_summary('\n'.join(lines + _transcript(messages, SUMMARY_LINE_CHARS)))
+
+
+# ==================== CONTEXT ====================
+
+def _split(rows, budget):
+    """
+    rows - unsummarized messages, newest first. Returns (keep, fold): keep
+    fits in the budget (the newest message is always kept); if anything
+    overflows, keep is cut down to half the budget and the rest is folded.
+    """
+    costs = [message_tokens(content, bool(image)) for _, _, content, image in rows]
+    if sum(costs) <= budget:
+        return rows, []
+    used, cut = 0, 0
+    for cost in costs:
+        if cut and used + cost > budget // 2:
+            break
+        used += cost
+        cut += 1
+    return rows[:cut], rows[cut:]
+
+
+def build_context(session, backend=None):
+    """Messages for the model: system prompt, rolling summary, recent turns."""
+    rows = list(
+        session.messages.filter(pk__gt=session.summary_until)
+        .order_by('-pk')
+        .values_list('pk', 'role', 'content', 'image')
+    )
+    keep, fold = _split(rows, get_context_budget())
+
+    if fold:
+        fold.reverse()
+        summary = summarize(session.summary, [row[1:] for row in fold], backend)
+        # update() - the session's updated_at (chat list order) is not touched
+        ChatSession.objects.filter(pk=session.pk).update(summary=summary, summary_until=fold[-1][0])
+        session.summary, session.summary_until = summary, fold[-1][0]
+
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if session.summary:
+        history.append({"role": "system", "content": f"Suhbatning oldingi qismi qisqacha:\n{session.summary}"})
+
+    storage = ChatMessage._meta.get_field('image').storage
+    for pk, role, content, image in reversed(keep):
+        if role != 'user':
+            if content:
+                history.append({"role": "assistant", "content": content})
+            continue
+        url = image and image_data_url(storage, image, pk)
+        if url:
+            parts = [{"type": "text", "text": content}] if content else []
+            parts.append({"type": "image_url", "image_url": {"url": url}})
+            history.append({"role": "user", "content": parts})
+        elif content:
+            history.append({"role": "user", "content": content})
+    return history
@@ -0,0 +1,221 @@
+"""
+Images attached to AI chat messages.
+
+On upload only the header is checked (format, size, pixel count). After the
+message is committed the image is processed in a process pool: downscaled
+to AI_IMAGE_MAX_SIDE, re-encoded as compact JPEG or WebP (AI_IMAGE_FORMAT)
+without EXIF/metadata and written next to the original as
+``<name>.ai.jpg`` / ``<name>.ai.webp``. Unless AI_IMAGE_KEEP_ORIGINAL is
+set, the message then points at the processed file and the original is
+deleted. Every history rebuild (context.py) sends the processed file; if it
+is not ready yet the builder waits for the job, and images from before the
+pipeline are processed on first use.
+
+process_image() does not depend on Django - it runs in the pool.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF', 'BMP'}
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+MIME_TYPES = {'jpg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+def process_image(src_path, dest_path, max_side, fmt='JPEG', quality=85):
+    """Downscale and re-encode; metadata is not copied. Returns (width, height, size)."""
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as img:
+        # JPEG is reduced by the decoder itself - the full image is never loaded
+        img.draft('RGB', (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_side, max_side))
+        if img.mode not in ('RGB', 'L') and not (fmt == 'WEBP' and img.mode == 'RGBA'):
+            rgba = img.convert('RGBA')
+            if fmt == 'WEBP':
+                img = rgba
+            else:
+                background = Image.new('RGB', img.size, 'white')
+                background.paste(rgba, mask=rgba.getchannel('A'))
+                img = background
+        options = {'quality': quality, 'method': 4} if fmt == 'WEBP' else {'quality': quality, 'optimize': True}
+        # Written under a temporary name - a reader never sees half a file
+        tmp_path = f'{dest_path}.{uuid.uuid4().hex}.tmp'
+        img.save(tmp_path, fmt, **options)
+        os.replace(tmp_path, dest_path)
+        return img.width, img.height, os.path.getsize(dest_path)
+
+
+# ==================== DJANGO SIDE ====================
+
+def _settings():
+    from django.conf import settings
+
+    fmt = getattr(settings, 'AI_IMAGE_FORMAT', 'JPEG').upper()
+    return {
+        'max_side': getattr(settings, 'AI_IMAGE_MAX_SIDE', 1024),
+        'fmt': fmt if fmt in EXTENSIONS else 'JPEG',
+        'quality': getattr(settings, 'AI_IMAGE_QUALITY', 85),
+    }
+
+
+def is_processed(name):
+    return name.endswith(tuple(f'.ai.{ext}' for ext in EXTENSIONS.values()))
+
+
+def processed_name(name):
+    return name if is_processed(name) else f"{name}.ai.{EXTENSIONS[_settings()['fmt']]}"
+
+
+def upload_name(name):
+    """An upload must not look like a processed file (``x.ai.jpg``)."""
+    return name.replace('.ai.', '.') if is_processed(name) else name
+
+
+def mime_type(name):
+    return MIME_TYPES[name.rsplit('.', 1)[-1]]
+
+
+def validate_upload(uploaded):
+    """Error message for the user, or None. Reads only the image header."""
+    from django.conf import settings
+    from django.template.defaultfilters import filesizeformat
+    from PIL import Image
+
+    max_size = getattr(settings, 'AI_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+    if uploaded.size > max_size:
+        return f"Rasm juda katta: {filesizeformat(uploaded.size)} (ko'pi bilan {filesizeformat(max_size)})."
+    try:
+        with Image.open(uploaded) as img:
+            fmt, (width, height) = img.format, img.size
+    except Exception:
+        return "Fayl rasm emas yoki buzilgan."
+    finally:
+        uploaded.seek(0)
+    if fmt not in ALLOWED_FORMATS:
+        return "Faqat JPEG, PNG, WebP, GIF yoki BMP rasm yuborish mumkin."
+    if width * height > getattr(settings, 'AI_IMAGE_MAX_PIXELS', 40_000_000):
+        return f"Rasm o'lchami juda katta: {width}×{height}."
+    return None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# image name -> Future of the job running in this process
+_pending = {}
+
+
+def get_pool():
+    """Process pool (spawn - fork is not safe inside a threaded web server), created on first use."""
+    global _pool
+    from django.conf import settings
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'AI_IMAGE_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def schedule_processing(message_id, storage, name):
+    """Process a freshly uploaded image in the pool (called after commit)."""
+    try:
+        src_path = storage.path(name)
+    except NotImplementedError:
+        return
+    options = _settings()
+    try:
+        future = get_pool().submit(
+            process_image, src_path, storage.path(processed_name(name)),
+            options['max_side'], options['fmt'], options['quality'],
+        )
+    except Exception:
+        # Pool is broken or shutting down - the context builder processes it inline
+        logger.exception("AI image %s was not scheduled", name)
+        return
+    with _pool_lock:
+        _pending[name] = future
+
+    def done(future):
+        from django.db import close_old_connections
+        try:
+            future.result()
+            replace_original(message_id, storage, name)
+        except Exception:
+            logger.exception("AI image %s was not processed", name)
+        finally:
+            with _pool_lock:
+                _pending.pop(name, None)
+            close_old_connections()
+
+    future.add_done_callback(done)
+
+
+def replace_original(message_id, storage, name):
+    """Point the message at the processed file and delete the original (AI_IMAGE_KEEP_ORIGINAL off)."""
+    from django.conf import settings
+    from django.core.cache import cache
+    from .models import ChatMessage
+
+    if getattr(settings, 'AI_IMAGE_KEEP_ORIGINAL', False):
+        return
+    message = ChatMessage.objects.filter(pk=message_id, image=name).first()
+    if message is None:
+        return
+    message.image.name = processed_name(name)
+    # save() - the storage usage index swaps the original's size for the processed one
+    message.save(update_fields=['image'])
+    storage.delete(name)
+    cache.delete(f'ai_image:{name}')
+
+
+def ensure_processed(storage, name, message_id=None):
+    """
+    Name of the processed file, or None if the image cannot be read. Waits
+    for a job still running in this process; otherwise processes inline and,
+    given message_id, replaces the original like the pool job does.
+    """
+    from django.conf import settings
+    from django.core.files.base import ContentFile
+
+    target = processed_name(name)
+    if storage.exists(target):
+        return target
+    with _pool_lock:
+        future = _pending.get(name)
+    if future is not None:
+        try:
+            future.result(timeout=getattr(settings, 'AI_IMAGE_PROCESS_TIMEOUT', 15))
+        except Exception:
+            pass
+        if storage.exists(target):
+            return target
+    if not storage.exists(name):
+        return None
+
+    options = _settings()
+    try:
+        try:
+            process_image(storage.path(name), storage.path(target), **options)
+        except NotImplementedError:
+            import io
+            import tempfile
+            with storage.open(name, 'rb') as f, tempfile.TemporaryDirectory() as tmp:
+                dest = os.path.join(tmp, 'image')
+                process_image(io.BytesIO(f.read()), dest, **options)
+                with open(dest, 'rb') as out:
+                    storage.save(target, ContentFile(out.read()))
+    except Exception as e:
+        logger.warning("AI image %s could not be processed: %s", name, e)
+        return None
+    if message_id is not None:
+        replace_original(message_id, storage, name)
+    return target
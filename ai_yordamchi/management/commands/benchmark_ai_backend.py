@@ -0,0 +1,92 @@
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ai_yordamchi import metrics
+from ai_yordamchi.backends import Backend, CircuitBreaker, FakeProvider, ProviderUnavailable
+from ai_yordamchi.models import AICall
+
+
+class Command(BaseCommand):
+    help = (
+        "Offline load test of the AI backend layer (retries, circuit breaker, metrics) "
+        "with the deterministic fake provider: many concurrent chat calls, no network."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=500, help='Total calls')
+        parser.add_argument('--concurrency', type=int, default=50, help='Calls in flight at once')
+        parser.add_argument('--mode', choices=['stream', 'complete'], default='stream')
+        parser.add_argument('--token-delay', type=float, default=0.005, help='Fake provider pause per token (s)')
+        parser.add_argument('--failure-rate', type=float, default=0.1, help='Share of fake upstream errors (0..1)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--retries', type=int, default=2)
+        parser.add_argument('--breaker-failures', type=int, default=5)
+        parser.add_argument('--breaker-window', type=int, default=20)
+        parser.add_argument('--breaker-cooldown', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        backend = Backend(
+            FakeProvider(options['token_delay'], options['failure_rate'], options['seed']),
+            CircuitBreaker(options['breaker_failures'], options['breaker_cooldown'], options['breaker_window']),
+            retries=options['retries'],
+            base_delay=0.05,
+            max_delay=0.5,
+        )
+        messages = [{"role": "user", "content": "Flexbox nima? Qisqa misol bilan tushuntiring, iltimos."}]
+        self.stdout.write(
+            f"{options['calls']} {options['mode']} calls, concurrency {options['concurrency']}, "
+            f"failure rate {options['failure_rate']:.0%}"
+        )
+
+        recorded = AICall.objects.count()
+        started = time.monotonic()
+        if options['mode'] == 'stream':
+            results = asyncio.run(self.run_streams(backend, messages, options['calls'], options['concurrency']))
+        else:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                results = list(pool.map(lambda _: self.call(backend, messages), range(options['calls'])))
+        elapsed = time.monotonic() - started
+
+        outcomes = Counter(outcome for outcome, _ in results)
+        latencies = sorted(latency for outcome, latency in results if outcome == 'ok')
+        p50 = latencies[len(latencies) // 2] if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        self.stdout.write(f"Finished in {elapsed:.2f}s, {len(results) / elapsed:.0f} calls/s")
+        self.stdout.write(
+            f"ok {outcomes['ok']}, failed after retries {outcomes['error']}, "
+            f"rejected by breaker {outcomes['rejected']}"
+        )
+        self.stdout.write(f"Latency of answered calls: p50 {p50 * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms")
+        metrics.flush()
+        self.stdout.write(f"Calls recorded in AICall: {AICall.objects.count() - recorded}")
+
+    def call(self, backend, messages):
+        started = time.monotonic()
+        try:
+            backend.complete(messages, 200)
+            return 'ok', time.monotonic() - started
+        except ProviderUnavailable:
+            return 'rejected', time.monotonic() - started
+        except Exception:
+            return 'error', time.monotonic() - started
+
+    async def run_streams(self, backend, messages, calls, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    async for _ in backend.stream(messages, 200):
+                        pass
+                    return 'ok', time.monotonic() - started
+                except ProviderUnavailable:
+                    return 'rejected', time.monotonic() - started
+                except Exception:
+                    return 'error', time.monotonic() - started
+
+        return await asyncio.gather(*(one() for _ in range(calls)))
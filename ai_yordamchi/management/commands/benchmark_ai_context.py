@@ -0,0 +1,132 @@
+import base64
+import io
+import json
+import statistics
+import time
+import uuid
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from ai_yordamchi.chat import SYSTEM_PROMPT
+from ai_yordamchi.context import build_context, prompt_tokens
+from ai_yordamchi.images import processed_name
+from ai_yordamchi.models import ChatMessage, ChatSession
+
+QUESTION = "Flexbox bilan kartalarni qanday qilib bir qatorga joylashtiraman? {i}-savol, batafsil tushuntiring. "
+ANSWER = (
+    "Kartalarni bir qatorga joylashtirish uchun ota elementga `display: flex` bering. {i}-javob.\n\n"
+    "**CSS (style.css)**\n```css\n.cards {{ display: flex; gap: 16px; flex-wrap: wrap; }}\n"
+    ".card {{ flex: 1 1 240px; padding: 16px; border-radius: 12px; }}\n```\n\n"
+    "Qanday ishlatish: kartalarni `.cards` ichiga joylang. "
+)
+
+
+def legacy_history(session):
+    """The previous builder: every message, every image read and encoded again."""
+    history = [{"role": "system", "content": SYSTEM_PROMPT}]
+    for msg in session.messages.all():
+        if msg.role == 'user':
+            if msg.image:
+                image_data = base64.b64encode(msg.image.read()).decode('utf-8')
+                msg.image.seek(0)
+                parts = [{"type": "text", "text": msg.content}] if msg.content else []
+                parts.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}})
+                history.append({"role": "user", "content": parts})
+            elif msg.content:
+                history.append({"role": "user", "content": msg.content})
+        elif msg.content:
+            history.append({"role": "assistant", "content": msg.content})
+    return history
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark building the AI chat context: prompt size and build time for a long session, "
+        "full history (previous behaviour) vs token budget + rolling summary + cached images. "
+        "Creates a temporary bench_* user and removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200, help='Messages in the session')
+        parser.add_argument('--image-every', type=int, default=10, help='Every Nth user message has a photo (0 - none)')
+        parser.add_argument('--runs', type=int, default=5, help='Builds per measurement (median is reported)')
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        user = CustomUser.objects.create(username=f'bench_{tag}', role='student', phone=f'bench_{tag}')
+        session = ChatSession.objects.create(user=user, title='benchmark')
+        images = []
+        try:
+            images = self.create_messages(session, options['messages'], options['image_every'])
+            self.stdout.write(f"Session: {options['messages']} messages, {len(images)} photos")
+            runs = options['runs']
+
+            self.report('Before (full history)', *self.measure(lambda: legacy_history(session), runs))
+
+            history, cold = self.timed(lambda: build_context(session))
+            self.report('After, first build (folds + encodes)', history, [cold])
+            self.report('After, next builds', *self.measure(lambda: build_context(session), runs))
+
+            for i in range(2):
+                ChatMessage.objects.create(session=session, role='user', content=QUESTION.format(i=i))
+                ChatMessage.objects.create(session=session, role='assistant', content=ANSWER.format(i=i))
+            self.report('After, 2 more turns', *self.measure(lambda: build_context(session), runs))
+
+            session.refresh_from_db()
+            self.stdout.write(
+                f"Rolling summary: {len(session.summary.splitlines())} lines, "
+                f"messages up to #{session.summary_until} folded"
+            )
+        finally:
+            storage = ChatMessage._meta.get_field('image').storage
+            for name in images:
+                cache.delete(f'ai_image:{name}')
+                storage.delete(name)
+                storage.delete(processed_name(name))
+            user.delete()
+
+    def create_messages(self, session, count, image_every):
+        from PIL import Image
+
+        images = []
+        for i in range(count):
+            if i % 2:
+                ChatMessage.objects.create(session=session, role='assistant', content=ANSWER.format(i=i) * 3)
+                continue
+            message = ChatMessage(session=session, role='user', content=QUESTION.format(i=i))
+            if image_every and (i // 2) % image_every == image_every - 1:
+                # Phone-camera sized photo; noise keeps the JPEG realistically large
+                photo = Image.effect_noise((2000, 1500), 60).convert('RGB')
+                out = io.BytesIO()
+                photo.save(out, 'JPEG', quality=90)
+                message.image.save(f'bench_{i}.jpg', ContentFile(out.getvalue()), save=False)
+                images.append(message.image.name)
+            message.save()
+        return images
+
+    def timed(self, build):
+        started = time.perf_counter()
+        history = build()
+        return history, time.perf_counter() - started
+
+    def measure(self, build, runs):
+        timings = []
+        for _ in range(runs):
+            history, elapsed = self.timed(build)
+            timings.append(elapsed)
+        return history, timings
+
+    def report(self, label, history, timings):
+        images = sum(
+            1 for message in history if isinstance(message['content'], list)
+            for part in message['content'] if part['type'] == 'image_url'
+        )
+        size = len(json.dumps(history).encode('utf-8'))
+        self.stdout.write(
+            f"{label}: {len(history)} messages, {images} images, "
+            f"~{prompt_tokens(history)} tokens, {size / 1024:.0f} KB payload, "
+            f"build {statistics.median(timings) * 1000:.1f}ms"
+        )
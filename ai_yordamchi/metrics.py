@@ -0,0 +1,117 @@
+"""
+Per-call AI metrics: provider, model, use case, outcome, attempts, latency
+and token usage. Calls are buffered in process memory and written to the
+AICall table with one bulk insert every AI_METRICS_FLUSH_SECONDS, so a
+request never waits on a metrics write. Rows older than
+AI_METRICS_RETENTION_DAYS are pruned on flush, at most once an hour.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 3600
+
+_buffer = []
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_last_prune = 0
+
+
+def get_flush_interval():
+    return getattr(settings, 'AI_METRICS_FLUSH_SECONDS', 10)
+
+
+def record(provider, model, use_case, status, attempts, latency, usage=None):
+    """Buffer one call. Returns True when the buffer is due to be flushed."""
+    row = {
+        'provider': provider,
+        'model': model,
+        'use_case': use_case,
+        'status': status,
+        'attempts': attempts,
+        'latency_ms': int(latency * 1000),
+        'prompt_tokens': usage.prompt_tokens if usage else 0,
+        'completion_tokens': usage.completion_tokens if usage else 0,
+        'created_at': timezone.now(),
+    }
+    with _lock:
+        _buffer.append(row)
+        return time.monotonic() - _last_flush >= get_flush_interval()
+
+
+def flush():
+    """Write buffered calls to the database. On failure they go back to the buffer."""
+    global _buffer, _last_flush, _last_prune
+    from .models import AICall
+
+    with _lock:
+        pending, _buffer = _buffer, []
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    try:
+        AICall.objects.bulk_create([AICall(**row) for row in pending])
+        if time.monotonic() - _last_prune >= PRUNE_INTERVAL:
+            _last_prune = time.monotonic()
+            days = getattr(settings, 'AI_METRICS_RETENTION_DAYS', 30)
+            AICall.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()
+    except Exception:
+        logger.exception("AI metrics were not saved - will retry on the next flush")
+        with _lock:
+            _buffer[:0] = pending
+        return 0
+    return len(pending)
+
+
+def summary(hours=24):
+    """Totals for the admin page: calls, outcomes, latency percentiles, tokens per model, cache hit rate."""
+    from django.db.models import Count, Q, Sum
+    from .models import AICall
+
+    flush()
+    recent = AICall.objects.filter(created_at__gte=timezone.now() - timedelta(hours=hours))
+    calls = recent.exclude(use_case='cache')
+    totals = calls.aggregate(
+        total=Count('id'),
+        errors=Count('id', filter=Q(status='error')),
+        rejected=Count('id', filter=Q(status='rejected')),
+        retried=Count('id', filter=Q(attempts__gt=1)),
+        prompt_tokens=Sum('prompt_tokens'),
+        completion_tokens=Sum('completion_tokens'),
+    )
+    answered = calls.filter(status='ok').order_by('latency_ms')
+    count = answered.count()
+    for name, q in (('p50', 0.5), ('p95', 0.95)):
+        totals[name] = answered.values_list('latency_ms', flat=True)[int((count - 1) * q)] if count else None
+    totals['models'] = list(
+        calls.values('use_case', 'model')
+        .annotate(calls=Count('id'), tokens=Sum('prompt_tokens') + Sum('completion_tokens'))
+        .order_by('-calls')
+    )
+    # Response cache lookups (response_cache.py)
+    lookups = dict(recent.filter(use_case='cache').values_list('status').annotate(n=Count('id')))
+    totals['cache_hits'] = lookups.get('exact', 0) + lookups.get('similar', 0)
+    totals['cache_similar'] = lookups.get('similar', 0)
+    totals['cache_lookups'] = totals['cache_hits'] + lookups.get('miss', 0)
+    totals['cache_hit_rate'] = (
+        round(100 * totals['cache_hits'] / totals['cache_lookups']) if totals['cache_lookups'] else None
+    )
+    return totals
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
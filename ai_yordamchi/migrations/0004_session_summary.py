@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_yordamchi', '0003_alter_chatmessage_role'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary',
+            field=models.TextField(blank=True, default='', verbose_name='Oldingi qism xulosasi'),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='summary_until',
+            field=models.PositiveIntegerField(default=0, verbose_name='Xulosaga kirgan oxirgi xabar ID'),
+        ),
+    ]
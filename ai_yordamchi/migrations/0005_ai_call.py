@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_yordamchi', '0004_session_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AICall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=30)),
+                ('model', models.CharField(max_length=100)),
+                ('use_case', models.CharField(max_length=30)),
+                ('status', models.CharField(choices=[('ok', 'Muvaffaqiyatli'), ('error', 'Xato'), ('rejected', 'Rad etildi (circuit breaker)'), ('cancelled', 'Bekor qilindi')], max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('latency_ms', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': "AI so'rovi",
+                'verbose_name_plural': "AI so'rovlari",
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_yordamchi', '0005_ai_call'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='cached',
+            field=models.BooleanField(default=False, verbose_name='Keshdan berilgan'),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='cache_enabled',
+            field=models.BooleanField(default=True, verbose_name='Javoblar keshi'),
+        ),
+        migrations.AlterField(
+            model_name='aicall',
+            name='status',
+            field=models.CharField(choices=[('ok', 'Muvaffaqiyatli'), ('error', 'Xato'), ('rejected', 'Rad etildi (circuit breaker)'), ('cancelled', 'Bekor qilindi'), ('exact', 'Keshda bor'), ('similar', "Keshda o'xshashi bor"), ('miss', "Keshda yo'q")], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='CachedResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('scope', models.CharField(max_length=50, verbose_name="Yo'nalish")),
+                ('prompt', models.TextField(verbose_name='Savol (normallashtirilgan)')),
+                ('vector', models.JSONField(default=dict)),
+                ('response', models.TextField(verbose_name='Javob')),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Ishlatilgan')),
+                ('created_at', models.DateTimeField()),
+                ('last_hit_at', models.DateTimeField(db_index=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Keshlangan javob',
+                'verbose_name_plural': 'Keshlangan javoblar',
+                'ordering': ['-last_hit_at'],
+                'indexes': [models.Index(fields=['scope', 'last_hit_at'], name='ai_cache_scope_idx')],
+            },
+        ),
+    ]
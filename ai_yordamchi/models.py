@@ -8,6 +8,11 @@ class ChatSession(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Budjetga sig'magan eski xabarlar xulosasi (ai_yordamchi/context.py)
+    summary = models.TextField(blank=True, default='', verbose_name="Oldingi qism xulosasi")
+    summary_until = models.PositiveIntegerField(default=0, verbose_name="Xulosaga kirgan oxirgi xabar ID")
+    # Admin bitta suhbat uchun javoblar keshini o'chirishi mumkin (ai_yordamchi/response_cache.py)
+    cache_enabled = models.BooleanField(default=True, verbose_name="Javoblar keshi")
     
     class Meta:
         ordering = ['-updated_at']
@@ -29,6 +34,7 @@ class ChatMessage(models.Model):
     content = models.TextField()
     image = models.ImageField(upload_to='chat_images/', blank=True, null=True)
     coins_spent = models.IntegerField(default=0)
+    cached = models.BooleanField(default=False, verbose_name="Keshdan berilgan")
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -38,3 +44,60 @@ class ChatMessage(models.Model):
     
     def __str__(self):
         return f"{self.role}: {self.content[:50]}"
+
+
+class AICall(models.Model):
+    """Bitta AI so'rovi: natija, urinishlar, kechikish va tokenlar (ai_yordamchi.metrics yozadi)"""
+    STATUS_CHOICES = (
+        ('ok', 'Muvaffaqiyatli'),
+        ('error', 'Xato'),
+        ('rejected', 'Rad etildi (circuit breaker)'),
+        ('cancelled', 'Bekor qilindi'),
+        # Javoblar keshi (use_case='cache')
+        ('exact', 'Keshda bor'),
+        ('similar', "Keshda o'xshashi bor"),
+        ('miss', "Keshda yo'q"),
+    )
+    
+    provider = models.CharField(max_length=30)
+    model = models.CharField(max_length=100)
+    use_case = models.CharField(max_length=30)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    latency_ms = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "AI so'rovi"
+        verbose_name_plural = "AI so'rovlari"
+    
+    def __str__(self):
+        return f"{self.use_case} ({self.model}): {self.status}, {self.latency_ms}ms"
+
+
+class CachedResponse(models.Model):
+    """Takroriy savolga saqlangan javob (ai_yordamchi.response_cache)"""
+    key = models.CharField(max_length=64, unique=True)
+    scope = models.CharField(max_length=50, verbose_name="Yo'nalish")
+    prompt = models.TextField(verbose_name="Savol (normallashtirilgan)")
+    vector = models.JSONField(default=dict)
+    response = models.TextField(verbose_name="Javob")
+    model = models.CharField(max_length=100, blank=True)
+    hits = models.PositiveIntegerField(default=0, verbose_name="Ishlatilgan")
+    created_at = models.DateTimeField()
+    last_hit_at = models.DateTimeField(db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        ordering = ['-last_hit_at']
+        indexes = [
+            models.Index(fields=['scope', 'last_hit_at'], name='ai_cache_scope_idx'),
+        ]
+        verbose_name = "Keshlangan javob"
+        verbose_name_plural = "Keshlangan javoblar"
+    
+    def __str__(self):
+        return f"{self.scope}: {self.prompt[:50]}"
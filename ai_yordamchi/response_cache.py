@@ -0,0 +1,195 @@
+"""
+Cache of assistant answers for repeated questions.
+
+Students of the same course ask nearly the same things ("flexbox nima?",
+the same homework task). A standalone question - the first one in a
+session, without an image - is looked up before the model is called:
+
+1. exact: sha256 of the scope (the user's profession) + the normalized prompt;
+2. similar (AI_CACHE_SIMILARITY): cosine similarity of hashed word
+   unigram/bigram vectors - local, no network - above
+   AI_CACHE_SIMILARITY_THRESHOLD, among the most recently used entries.
+
+Entries live AI_CACHE_TTL seconds; above AI_CACHE_MAX_ENTRIES the least
+recently used are evicted. Every lookup is recorded in the AI metrics
+(use_case 'cache', status exact/similar/miss) for the hit rate. Admins can
+turn the cache off for a single session (ChatSession.cache_enabled).
+"""
+import hashlib
+import math
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+
+DIMENSIONS = 1 << 20
+TOKEN_RE = re.compile(r'\w+')
+APOSTROPHES = re.compile(r"[‘’ʻʼ`´]")
+
+# Savolning mazmunini o'zgartirmaydigan so'zlar (o'zbek/ingliz/rus)
+STOP_WORDS = {
+    'nima', 'qanday', 'qilib', 'qilish', 'kerak', 'menga', 'iltimos', 'haqida',
+    'bu', 'u', 'va', 'bilan', 'uchun', 'ham', 'esa', 'mi', 'men', 'sen', 'siz',
+    'tushuntir', 'tushuntiring', 'ayting', 'aytib', 'bering', 'ber', 'degani',
+    'what', 'is', 'are', 'the', 'a', 'an', 'how', 'to', 'do', 'does', 'i', 'in',
+    'of', 'please', 'explain', 'me', 'can', 'you',
+    'что', 'такое', 'как', 'это', 'и', 'в', 'на', 'мне', 'пожалуйста',
+}
+
+
+def is_enabled():
+    return getattr(settings, 'AI_CACHE_ENABLED', True)
+
+
+def get_ttl():
+    return getattr(settings, 'AI_CACHE_TTL', 7 * 24 * 3600)
+
+
+def get_max_entries():
+    return getattr(settings, 'AI_CACHE_MAX_ENTRIES', 5000)
+
+
+# ==================== NORMALIZATION ====================
+
+def normalize(text):
+    """Lowercase, one kind of apostrophe, single spaces, no trailing punctuation."""
+    text = APOSTROPHES.sub("'", text.lower())
+    text = ' '.join(text.split())
+    return text.strip(' ?!.,;:')
+
+
+def vectorize(text):
+    """
+    Hashed, L2-normalized vector of word unigrams and bigrams (sublinear tf),
+    stop words removed: {dimension: weight}. Keys are strings for JSONField.
+    """
+    tokens = [token for token in TOKEN_RE.findall(text) if token not in STOP_WORDS]
+    features = tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    counts = Counter(zlib.crc32(feature.encode('utf-8')) % DIMENSIONS for feature in features)
+    weights = {key: 1 + math.log(count) for key, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {str(key): round(w / norm, 5) for key, w in weights.items()} if norm else {}
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(key, 0.0) for key, w in a.items())
+
+
+# ==================== LOOKUP / STORE ====================
+
+@dataclass
+class Lookup:
+    key: str
+    scope: str
+    prompt: str
+    vector: dict
+    response: str = None
+    kind: str = 'miss'
+
+
+def _scope(user):
+    return f'profession:{user.profession_id}' if user.profession_id else 'general'
+
+
+def lookup(session, user_message):
+    """
+    Cached answer for the turn. None if the turn cannot be cached (cache
+    off, image attached, not the first question of the session); otherwise
+    a Lookup - with .response on a hit, and usable for store() on a miss.
+    """
+    from .models import CachedResponse
+
+    if not is_enabled() or not session.cache_enabled or user_message.image:
+        return None
+    prompt = normalize(user_message.content)
+    if not prompt or len(prompt) > getattr(settings, 'AI_CACHE_MAX_PROMPT_CHARS', 4000):
+        return None
+    # A follow-up depends on the conversation before it - only standalone questions
+    if session.messages.filter(pk__lt=user_message.pk).exists():
+        return None
+
+    started = time.monotonic()
+    scope = _scope(session.user)
+    result = Lookup(
+        key=hashlib.sha256(f'{scope}\n{prompt}'.encode('utf-8')).hexdigest(),
+        scope=scope,
+        prompt=prompt,
+        vector=vectorize(prompt),
+    )
+    now = timezone.now()
+    live = CachedResponse.objects.filter(scope=scope, expires_at__gt=now)
+
+    entry = live.filter(key=result.key).values_list('pk', 'response').first()
+    if entry:
+        result.kind = 'exact'
+    elif result.vector and getattr(settings, 'AI_CACHE_SIMILARITY', True):
+        threshold = getattr(settings, 'AI_CACHE_SIMILARITY_THRESHOLD', 0.9)
+        candidates = live.order_by('-last_hit_at').values_list('pk', 'vector')[
+            :getattr(settings, 'AI_CACHE_SIMILARITY_CANDIDATES', 500)
+        ]
+        best_pk, best = None, threshold
+        for pk, vector in candidates:
+            score = cosine(result.vector, vector)
+            if score >= best:
+                best_pk, best = pk, score
+        if best_pk:
+            entry = live.filter(pk=best_pk).values_list('pk', 'response').first()
+            result.kind = 'similar' if entry else 'miss'
+
+    if entry:
+        CachedResponse.objects.filter(pk=entry[0]).update(hits=F('hits') + 1, last_hit_at=now)
+        result.response = entry[1]
+    if metrics.record('cache', '', 'cache', result.kind, 0, time.monotonic() - started):
+        metrics.flush()
+    return result
+
+
+def store(result, response, model):
+    """Save the model's answer for a missed lookup and evict what is over the limits."""
+    from .models import CachedResponse
+
+    if result is None or result.response is not None or not response.strip():
+        return
+    now = timezone.now()
+    fields = {
+        'scope': result.scope,
+        'prompt': result.prompt,
+        'vector': result.vector,
+        'response': response,
+        'model': model,
+        'hits': 0,
+        'created_at': now,
+        'last_hit_at': now,
+        'expires_at': now + timedelta(seconds=get_ttl()),
+    }
+    try:
+        CachedResponse.objects.update_or_create(key=result.key, defaults=fields)
+    except IntegrityError:
+        # Another request stored the same question at the same moment
+        return
+    evict()
+
+
+def evict():
+    """Drop expired entries; above AI_CACHE_MAX_ENTRIES drop the least recently used."""
+    from .models import CachedResponse
+
+    CachedResponse.objects.filter(expires_at__lte=timezone.now()).delete()
+    limit = get_max_entries()
+    excess = CachedResponse.objects.count() - limit
+    if excess > 0:
+        # Down to 90% of the limit, so eviction does not run on every store
+        excess += limit // 10
+        stale = CachedResponse.objects.order_by('last_hit_at').values_list('pk', flat=True)[:excess]
+        CachedResponse.objects.filter(pk__in=list(stale)).delete()
@@ -1,25 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
-from django.conf import settings
 from django.core.paginator import Paginator
-import base64
+import logging
 
-from .models import ChatSession, ChatMessage
-from coin.models import CoinTransaction, ActivityLog
+from .backends import get_backend
+from .chat import answer_turn, reply_stream, start_turn, validate_turn
+from .context import build_context
+from .response_cache import lookup as cache_lookup
+from .models import ChatSession
 
-
-def get_openai_client():
-    """Get OpenAI client if API key is configured."""
-    if not getattr(settings, 'OPENAI_API_KEY', None):
-        return None
-    try:
-        from openai import OpenAI
-        return OpenAI(api_key=settings.OPENAI_API_KEY, timeout=30)
-    except Exception:
-        return None
+logger = logging.getLogger(__name__)
 
 
 @login_required
@@ -54,156 +47,66 @@ def chat_session(request, pk):
 @login_required
 @require_POST
 def send_message(request, pk):
-    """Send message to AI and get response."""
+    """Send message to AI and get response (plain form post, blocks until the reply is ready)."""
     session = get_object_or_404(ChatSession, pk=pk, user=request.user)
     
     content = request.POST.get('content', '').strip()
     image = request.FILES.get('image')
     
-    if not content and not image:
-        messages.error(request, "Xabar yoki rasm yuborishingiz kerak.")
-        return redirect('ai_yordamchi:chat_session', pk=pk)
-    
-    # Check coins
-    if request.user.coins < 1:
-        messages.error(request, "Sizda yetarli coin yo'q. AI bilan suhbatlashish uchun 1 coin kerak.")
+    error = validate_turn(request.user, content, image)
+    if error:
+        messages.error(request, error)
         return redirect('ai_yordamchi:chat_session', pk=pk)
     
-    # Save user message
-    user_message = ChatMessage.objects.create(
-        session=session,
-        role='user',
-        content=content,
-        image=image,
-        coins_spent=1,
-    )
-    
-    # Deduct coin
-    request.user.coins -= 1
-    request.user.save()
+    user_message = start_turn(request.user, session, content, image, get_client_ip(request))
     
-    # Log transaction
-    CoinTransaction.objects.create(
-        user=request.user,
-        amount=-1,
-        reason="AI yordamchi bilan suhbat"
-    )
+    # Get AI response (from the cache when the question was answered before) and save it
+    answer_turn(session, user_message, get_backend())
     
-    # Log activity
-    ActivityLog.objects.create(
-        user=request.user,
-        action_type='earn_coins',
-        description="AI yordamchi bilan suhbatlashdi (-1 coin)",
-        ip_address=get_client_ip(request)
-    )
+    return redirect('ai_yordamchi:chat_session', pk=pk)
+
+
+@login_required
+async def stream_message(request, pk):
+    """
+    Send message to AI and stream the reply token by token as server-sent
+    events (ASGI only). Under WSGI answers 204 and the page falls back to
+    the plain form post.
+    """
+    from asgiref.sync import sync_to_async
+    from accounts.realtime import is_asgi_request
+    
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST only'}, status=405)
+    if not is_asgi_request(request):
+        return HttpResponse(status=204)
+    
+    user = await request.auser()
+    session = await ChatSession.objects.filter(pk=pk, user=user).afirst()
+    if session is None:
+        return JsonResponse({'success': False, 'error': 'not found'}, status=404)
     
-    # Update session title if first message
-    if session.messages.count() == 1 and content:
-        session.title = content[:50] + ('...' if len(content) > 50 else '')
-        session.save()
+    content = request.POST.get('content', '').strip()
+    image = request.FILES.get('image')
     
-    # Get AI response
-    client = get_openai_client()
+    error = await sync_to_async(validate_turn)(user, content, image)
+    if error:
+        return JsonResponse({'success': False, 'error': error}, status=400)
     
-    if not client:
-        ai_response = "⚠️ AI xizmati hozirda mavjud emas. Iltimos, keyinroq urinib ko'ring."
-    else:
-        try:
-            # Build messages history
-            system_prompt = """Siz LMS o'quv platformasining AI yordamchisisiz. O'zbek tilida javob bering.
-
-JAVOB FORMATI:
-
-1. STRUKTURA:
-   - Avval qisqa tushuntirish (1-2 gap)
-   - Keyin kod bloklari
-   - Oxirida "Qanday ishlatish" bo'limi
-
-2. KOD BLOKLARI:
-   - Har doim Markdown code block ishlatilsin
-   - Code block boshida til nomi bo'lsin: ```python, ```html, ```css, ```javascript
-   - Kod ichida oddiy matn bo'lmasin
-   - Izohlar faqat kod tashqarisida
-
-3. KO'P FAYLLAR:
-   - Har bir fayl alohida sarlavha bilan:
-   
-   **HTML (index.html)**
-   ```html
-   <h1>Salom</h1>
-   ```
-   
-   **CSS (style.css)**
-   ```css
-   h1 { color: red; }
-   ```
-
-4. FORMATLASH:
-   - Havolalar: [matn](URL)
-   - Ro'yxatlar: - yoki 1. 2. 3.
-   - Muhim so'zlar: **qalin**
-
-5. USLUB:
-   - Boshlovchilar uchun tushunarli
-   - Do'stona va rag'batlantiruvchi
-   - Qisqa va aniq
-
-6. TAQIQLANGAN:
-   - < yoki > belgilarini escape qilish
-   - \\n yoki \\u000A ko'rinishlar
-   - Kod ichida tushuntirish yozish"""
-            
-            history = [
-                {"role": "system", "content": system_prompt}
-            ]
-            
-            for msg in session.messages.all():
-                if msg.role == 'user':
-                    if msg.image:
-                        # Handle image message
-                        try:
-                            image_data = base64.b64encode(msg.image.read()).decode('utf-8')
-                            msg.image.seek(0)
-                            content_parts = []
-                            if msg.content:
-                                content_parts.append({"type": "text", "text": msg.content})
-                            content_parts.append({
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}
-                            })
-                            history.append({"role": "user", "content": content_parts})
-                        except Exception:
-                            if msg.content:
-                                history.append({"role": "user", "content": msg.content})
-                    else:
-                        if msg.content:
-                            history.append({"role": "user", "content": msg.content})
-                else:
-                    if msg.content:
-                        history.append({"role": "assistant", "content": msg.content})
-            
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=history,
-                max_tokens=2000,
-            )
-            
-            ai_response = response.choices[0].message.content
-            
-        except Exception as e:
-            import traceback
-            print(f"OpenAI Error: {str(e)}")
-            print(traceback.format_exc())
-            ai_response = f"⚠️ AI bilan bog'lanishda xatolik: {str(e)}"
+    user_message = await sync_to_async(start_turn)(user, session, content, image, get_client_ip(request))
+    cached = await sync_to_async(cache_lookup)(session, user_message)
+    backend = get_backend()
+    history = None
+    if backend and not (cached and cached.response):
+        history = await sync_to_async(build_context)(session, backend)
     
-    # Save AI response
-    ChatMessage.objects.create(
-        session=session,
-        role='assistant',
-        content=ai_response,
+    response = StreamingHttpResponse(
+        reply_stream(session, user_message, backend, history, cached),
+        content_type='text/event-stream',
     )
-    
-    return redirect('ai_yordamchi:chat_session', pk=pk)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @login_required
@@ -213,6 +116,8 @@ def clear_history(request, pk):
     session = get_object_or_404(ChatSession, pk=pk, user=request.user)
     session.messages.all().delete()
     session.title = "Yangi suhbat"
+    session.summary = ''
+    session.summary_until = 0
     session.save()
     messages.success(request, "Suhbat tarixi tozalandi.")
     return redirect('ai_yordamchi:chat_session', pk=pk)
@@ -253,11 +158,29 @@ def admin_chats(request):
     page = request.GET.get('page')
     sessions = paginator.get_page(page)
     
+    from .metrics import summary
+    backend = get_backend()
+    
     return render(request, 'ai_yordamchi/admin/chats.html', {
         'sessions': sessions,
+        'ai_stats': summary(),
+        'breaker_state': backend.breaker.state if backend else None,
     })
 
 
+@login_required
+@admin_required
+@require_POST
+def admin_toggle_cache(request, pk):
+    """Turn the response cache on/off for one session."""
+    session = get_object_or_404(ChatSession, pk=pk)
+    session.cache_enabled = not session.cache_enabled
+    session.save(update_fields=['cache_enabled'])
+    status = "yoqildi" if session.cache_enabled else "o'chirildi"
+    messages.success(request, f"Suhbat uchun javoblar keshi {status}.")
+    return redirect('ai_yordamchi:admin_chat_detail', pk=pk)
+
+
 @login_required
 @admin_required
 def admin_chat_detail(request, pk):
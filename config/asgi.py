@@ -3,6 +3,11 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Server-sent event streams (messages/stream/, homework/<pk>/chat/stream/,
+ai/session/<pk>/stream/) need this entry point, e.g. ``uvicorn config.asgi:application``. Under
+WSGI those endpoints answer 204 and clients fall back to the delta
+polling endpoints.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -19,6 +19,60 @@ import os
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# AI yordamchi: 'openai' yoki 'fake' (tarmoqsiz, deterministik - testlar va development uchun)
+AI_BACKEND = os.getenv("AI_BACKEND", "openai")
+AI_MODEL = "gpt-4o-mini"
+# Har bir vazifa uchun model (berilmagani - AI_MODEL)
+AI_MODELS = {
+    'chat': AI_MODEL,
+    'summary': AI_MODEL,
+}
+AI_MAX_TOKENS = 2000
+AI_TIMEOUT = 30
+# Jarayon bo'yicha umumiy HTTP ulanishlar puli
+AI_POOL_SIZE = 20
+# Vaqtinchalik xatolarda qayta urinish (eksponensial kutish + jitter)
+AI_MAX_RETRIES = 2
+AI_RETRY_BASE_DELAY = 0.5
+AI_RETRY_MAX_DELAY = 4
+# Circuit breaker: oxirgi AI_BREAKER_WINDOW so'rovdan kamida AI_BREAKER_FAILURES tasi va
+# kamida yarmi xato bo'lsa, so'rovlar AI_BREAKER_COOLDOWN soniya darhol rad etiladi
+AI_BREAKER_FAILURES = 5
+AI_BREAKER_WINDOW = 20
+AI_BREAKER_COOLDOWN = 30
+# So'rovlar statistikasi (AICall) bazaga shuncha soniyada bir yoziladi va shuncha kun saqlanadi
+AI_METRICS_FLUSH_SECONDS = 10
+AI_METRICS_RETENTION_DAYS = 30
+# Takroriy savollar uchun javoblar keshi: aniq moslik, keyin (yoqilgan bo'lsa) o'xshashlik
+# bo'yicha. Yozuvlar AI_CACHE_TTL soniya yashaydi, ko'pi bilan AI_CACHE_MAX_ENTRIES ta
+AI_CACHE_ENABLED = True
+AI_CACHE_TTL = 7 * 24 * 3600
+AI_CACHE_MAX_ENTRIES = 5000
+AI_CACHE_MAX_PROMPT_CHARS = 4000
+AI_CACHE_SIMILARITY = True
+AI_CACHE_SIMILARITY_THRESHOLD = 0.9
+AI_CACHE_SIMILARITY_CANDIDATES = 500
+# fake backend tokenlar orasidagi pauza (soniya) - streamni brauzerda ko'rish uchun
+AI_FAKE_TOKEN_DELAY = 0.02
+# fake backend: xatolar ulushi (0..1) va tasodifiy ketma-ketlik urug'i - yuklama testlari uchun
+AI_FAKE_FAILURE_RATE = 0.0
+AI_FAKE_SEED = 0
+# Modelga yuboriladigan tarix budjeti (token): oxirgi xabarlar to'liq, eskilari
+# sessiyadagi xulosaga qo'shiladi. Rasmlar bir marta kichraytirilib keshlanadi
+AI_CONTEXT_TOKENS = 6000
+AI_SUMMARY_TOKENS = 600
+AI_IMAGE_MAX_SIDE = 1024
+AI_IMAGE_TOKENS = 765
+AI_IMAGE_CACHE_TIMEOUT = 3600
+# Chatga yuklangan rasmlar: tekshiruv cheklovlari, so'ng jarayonlar pulida kichraytirish va
+# JPEG/WEBP ga qayta kodlash (metadata olib tashlanadi). Asl nusxa faqat KEEP_ORIGINAL bo'lsa qoladi
+AI_IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+AI_IMAGE_MAX_PIXELS = 40_000_000
+AI_IMAGE_FORMAT = 'JPEG'
+AI_IMAGE_QUALITY = 85
+AI_IMAGE_KEEP_ORIGINAL = False
+AI_IMAGE_WORKERS = 2
+AI_IMAGE_PROCESS_TIMEOUT = 15
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -289,6 +343,75 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Xabarlarni saqlash muddati (kun): muddati o'tgan o'qilgan xabarlar
+# archive_messages buyrug'i bilan arxivga ko'chiriladi.
+# Ro'yxatda yo'q turlar (personal, payment, security ...) arxivlanmaydi.
+MESSAGE_RETENTION_DAYS = {
+    'motivation': 30,
+    'reminder': 14,
+    'recommendation': 30,
+    'achievement': 90,
+    'warning': 60,
+    'system': 180,
+    'digest': 30,
+}
+
+# Past ustuvorlikdagi bildirishnomalar darhol yuborilmaydi - send_notification_digests
+# buyrug'i (soatlik yoki kunlik cron) ularni bitta jamlanma xabarga yig'adi.
+# security, payment va baholash xabarlari (system/warning) bu ro'yxatga kirmaydi.
+NOTIFICATION_DIGEST_TYPES = ['motivation', 'achievement', 'recommendation', 'reminder']
+
+# Real-time (SSE) broker. InProcessBroker - development / bitta ASGI jarayon uchun
+REALTIME_BROKER = 'accounts.realtime.InProcessBroker'
+
+# Vazifa fayllarini bo'laklab yuklash
+HOMEWORK_UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024  # 2 MB
+HOMEWORK_UPLOAD_MAX_SIZE = 500 * 1024 * 1024  # 500 MB
+
+# Baholash navbati: o'qituvchi olgan vazifa shu muddatgacha unga band qilinadi
+GRADING_LEASE_MINUTES = 20
+GRADING_CLAIM_BATCH = 5
+# Navbat tartibi: kech topshirilganlar, qayta topshirilganlar, keyin eng eskilari
+GRADING_QUEUE_ORDER = ['-is_late', '-revision_count', 'submitted_at', 'id']
+
+# Ko'chirmachilik: MinHash bo'yicha shu o'xshashlikdan yuqori juftlar ko'rsatiladi
+HOMEWORK_SIMILARITY_THRESHOLD = 0.6
+# Yangi topshiriqlar imzosini hisoblaydigan fondagi jarayonlar soni
+HOMEWORK_SIMILARITY_WORKERS = 1
+
+# Fayl preview'lari: fondagi jarayonlar soni va eng katta tomoni (px)
+PREVIEW_WORKERS = 2
+PREVIEW_MAX_SIZE = 640
+
+# Deploy fayllarini berish. None - Django o'zi stream qiladi;
+# 'nginx' - X-Accel-Redirect (nginx'da: location /_deploys/ { internal; alias <MEDIA_ROOT>/deploys/; });
+# 'sendfile' - X-Sendfile (Apache mod_xsendfile, lighttpd)
+DEPLOY_SENDFILE_BACKEND = None
+DEPLOY_ACCEL_PREFIX = '/_deploys/'
+# HTML bo'lmagan fayllar (rasm, css, js) brauzerda shuncha soniya keshlanadi
+DEPLOY_CACHE_MAX_AGE = 300
+# Deploy marshrutlari va fayllar ro'yxati keshi (soniya). Bir nechta jarayonda
+# ishlaganda CACHES umumiy backend (Redis/Memcached) bo'lishi kerak - aks holda
+# boshqa jarayonlardagi kesh shu muddat ichida eskirgan bo'lishi mumkin
+DEPLOY_ROUTE_CACHE_TIMEOUT = 300
+# Deploy ko'rishlari/trafigi xotirada yig'ilib, shuncha soniyada bir bazaga yoziladi
+DEPLOY_COUNTER_FLUSH_SECONDS = 10
+# ZIP loyihalar matnli fayllarini oldindan siqish (gzip, brotli o'rnatilgan bo'lsa - br)
+DEPLOY_COMPRESS_WORKERS = 4
+DEPLOY_COMPRESS_MAX_SIZE = 10 * 1024 * 1024
+# ZIP loyihalarni ochish cheklovlari: fayllar soni, ochilgan hajm, siqish nisbati
+# (zip-bomba) va bitta foydalanuvchining barcha loyihalari uchun kvota
+DEPLOY_MAX_ENTRIES = 2000
+DEPLOY_MAX_UNCOMPRESSED_SIZE = 200 * 1024 * 1024
+DEPLOY_MAX_COMPRESSION_RATIO = 100
+DEPLOY_USER_QUOTA = 500 * 1024 * 1024
+# Shu hajmdan katta arxivlar bir nechta oqimda ochiladi
+DEPLOY_EXTRACT_WORKERS = 4
+DEPLOY_PARALLEL_EXTRACT_MIN_SIZE = 20 * 1024 * 1024
+# Bitta foydalanuvchining barcha fayllari (deploylar, vazifalar, chat, hujjatlar) uchun
+# umumiy kvota; None - cheklanmagan. Hisob: StorageUsage, farqlar - reconcile_storage
+STORAGE_USER_QUOTA = 2 * 1024 * 1024 * 1024
+
 # Login settings
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'